@@ -0,0 +1,27 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Export Cloud Trace Service Traces of the last 30 days
+"""
+
+import datetime
+
+import openstack
+
+openstack.enable_logging(True)
+conn = openstack.connect(cloud="otc")
+to_time = datetime.datetime.now(datetime.timezone.utc)
+from_time = to_time - datetime.timedelta(days=30)
+result = conn.ctsv3.export_traces(
+    "traces.jsonl.gz", from_time, to_time, trace_type="system"
+)
+print(result)
@@ -16,7 +16,16 @@ __all__ = ["__version__"]
 
 
 version_info = pbr.version.VersionInfo("otcextensions")
-try:
-    __version__ = version_info.version_string()
-except AttributeError:
-    __version__ = None
+
+
+def __getattr__(name):
+    # The version is resolved on first access, as pbr falls back to
+    # importing setuptools when the package metadata is not available
+    if name == "__version__":
+        global __version__
+        try:
+            __version__ = version_info.version_string()
+        except AttributeError:
+            __version__ = None
+        return __version__
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -15,18 +15,25 @@
 
 from __future__ import print_function
 
+import base64
 import collections
+import concurrent.futures
+import datetime
 import hashlib
+import mmap
 
 # import errno
 # import functools
 # import json
 import os
+import queue
 
 # import re
 # import sys
 import re
+import sqlite3
 import threading
+import time
 from urllib import parse
 
 # import uuid
@@ -48,6 +55,8 @@ _memoized_property_lock = threading.Lock()
 
 SENSITIVE_HEADERS = ("X-Auth-Token",)
 REQUIRED_FIELDS_ON_DATA = ("disk_format", "container_format")
+# Number of items buffered per queue by merge_producers
+DEFAULT_MERGE_BUFFER = 1000
 
 
 def merge_two_dicts(x, y):
@@ -77,41 +86,240 @@ def _get_file_hashes(filename):
     return _md5
 
 
+def _get_file_etag(filename, segment_size):
+    """Calculate MD5 and multipart upload ETag of a file in a single pass.
+
+    The multipart ETag is the MD5 of the concatenated binary MD5 digests of
+    all parts followed by ``-<number of parts>``. For files not larger than
+    ``segment_size`` it equals the plain MD5.
+
+    :returns: A tuple of the MD5 hex digest and the ETag.
+    """
+    _md5 = hashlib.md5(usedforsecurity=False)
+    part_digests = []
+    with open(filename, "rb") as file_obj:
+        while True:
+            part_md5 = hashlib.md5(usedforsecurity=False)
+            remaining = segment_size
+            while remaining:
+                chunk = file_obj.read(min(remaining, 1048576))
+                if not chunk:
+                    break
+                _md5.update(chunk)
+                part_md5.update(chunk)
+                remaining -= len(chunk)
+            if remaining == segment_size:
+                break
+            part_digests.append(part_md5.digest())
+            if remaining:
+                break
+
+    md5 = _md5.hexdigest()
+    if len(part_digests) <= 1:
+        return md5, md5
+    etag = hashlib.md5(b"".join(part_digests), usedforsecurity=False).hexdigest()
+    return md5, "%s-%d" % (etag, len(part_digests))
+
+
+class FileHashCache:
+    """Persistent cache of file MD5 and multipart ETag values.
+
+    Entries are stored in a SQLite database and keyed by device, inode,
+    size and modification time (in ns) of the file, so an unchanged file
+    costs a single ``stat`` call. Once ``max_entries`` is exceeded, the
+    least recently used entries are evicted down to 90% of the limit, so
+    the table is only counted and sorted every few thousand inserts.
+    """
+
+    _where = "dev = ? AND ino = ? AND size = ? AND mtime_ns = ? AND segment_size = ?"
+
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                "dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, "
+                "segment_size INTEGER, hash TEXT, atime REAL, "
+                "PRIMARY KEY (dev, ino, size, mtime_ns, segment_size))"
+            )
+            # Estimated number of entries, entries added by other processes
+            # are only seen on eviction
+            (self._count,) = self._db.execute("SELECT COUNT(*) FROM hashes").fetchone()
+
+    @staticmethod
+    def _key(st, segment_size):
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, segment_size or 0)
+
+    def get(self, filename, segment_size=None, st=None):
+        """Return the cached hash of a file or ``None``.
+
+        Without ``segment_size`` the plain MD5 is returned, otherwise the
+        multipart ETag for parts of ``segment_size`` bytes.
+        """
+        key = self._key(st or os.stat(filename), segment_size)
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT hash FROM hashes WHERE " + self._where, key
+            ).fetchone()
+            if row:
+                self._db.execute(
+                    "UPDATE hashes SET atime = ? WHERE " + self._where,
+                    (time.time(),) + key,
+                )
+        return row[0] if row else None
+
+    def set(self, filename, value, segment_size=None, st=None):
+        """Store the hash of a file."""
+        st = st or os.stat(filename)
+        self._store([(self._key(st, segment_size), value)])
+
+    def _store(self, entries):
+        now = time.time()
+        with self._lock, self._db:
+            for key, value in entries:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    key + (value, now),
+                )
+                if cursor.rowcount:
+                    self._count += 1
+                else:
+                    self._db.execute(
+                        "UPDATE hashes SET hash = ?, atime = ? WHERE " + self._where,
+                        (value, now) + key,
+                    )
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        # Must be called with self._lock held
+        (count,) = self._db.execute("SELECT COUNT(*) FROM hashes").fetchone()
+        if count > self.max_entries:
+            keep = self.max_entries - self.max_entries // 10
+            self._db.execute(
+                "DELETE FROM hashes WHERE rowid IN (SELECT rowid FROM "
+                "hashes ORDER BY atime LIMIT ?)",
+                (count - keep,),
+            )
+            count = keep
+        self._count = count
+
+    def md5(self, filename):
+        """Return the MD5 of a file, calculating it on a cache miss."""
+        st = os.stat(filename)
+        value = self.get(filename, st=st)
+        if value is None:
+            value = _get_file_hashes(filename)
+            self.set(filename, value, st=st)
+        return value
+
+    def etag(self, filename, segment_size):
+        """Return the multipart ETag of a file, calculating it on a miss."""
+        st = os.stat(filename)
+        value = self.get(filename, segment_size, st=st)
+        if value is None:
+            md5, value = _get_file_etag(filename, segment_size)
+            self._store(
+                [(self._key(st, None), md5), (self._key(st, segment_size), value)]
+            )
+        return value
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
 class FileSegment:
-    """File-like object to pass to requests."""
+    """File-like object to pass to requests.
+
+    The segment is backed by a read-only memory map of the file region.
+    ``read`` returns ``bytes`` copied from the map, while :meth:`md5` hashes
+    the mapped pages without copying them. The file size is checked before
+    every access, as touching pages of a truncated file kills the process
+    with SIGBUS instead of raising an error.
+    """
 
     def __init__(self, filename, offset, length):
         self.filename = filename
         self.offset = offset
         self.length = length
         self.pos = 0
+        self._mmap = None
+        self._view = memoryview(b"")
         self._file = open(filename, "rb")
-        self.seek(0)
+        if length:
+            # mmap offset has to be aligned to the allocation granularity
+            delta = offset % mmap.ALLOCATIONGRANULARITY
+            self._mmap = mmap.mmap(
+                self._file.fileno(),
+                length + delta,
+                access=mmap.ACCESS_READ,
+                offset=offset - delta,
+            )
+            self._view = memoryview(self._mmap)[delta : delta + length]
+
+    def _check_size(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self.offset + self.length:
+            raise IOError(
+                "%s was truncated to %d bytes while reading bytes %d-%d"
+                % (self.filename, size, self.offset, self.offset + self.length - 1)
+            )
+
+    def __len__(self):
+        return self.length
 
     def tell(self):
-        return self._file.tell() - self.offset
+        return self.pos
 
     def seek(self, offset, whence=0):
         if whence == 0:
-            self._file.seek(self.offset + offset, whence)
+            pos = offset
         elif whence == 1:
-            self._file.seek(offset, whence)
+            pos = self.pos + offset
         elif whence == 2:
-            self._file.seek(self.offset + self.length - offset, 0)
+            pos = self.length + offset
+        else:
+            raise ValueError("invalid whence (%r)" % whence)
+        self.pos = min(max(pos, 0), self.length)
+        return self.pos
 
     def read(self, size=-1):
         remaining = self.length - self.pos
         if remaining <= 0:
             return b""
 
-        to_read = remaining if size < 0 else min(size, remaining)
-        chunk = self._file.read(to_read)
-        self.pos += len(chunk)
+        to_read = remaining if size is None or size < 0 else min(size, remaining)
+        self._check_size()
+        chunk = bytes(self._view[self.pos : self.pos + to_read])
+        self.pos += to_read
 
         return chunk
 
     def reset(self):
-        self._file.seek(self.offset, 0)
+        self.pos = 0
+
+    def md5(self, chunk_size=1048576):
+        """Return the base64 encoded MD5 digest (Content-MD5) of the segment.
+
+        The digest is calculated incrementally over the mapped region.
+        """
+        _md5 = hashlib.md5(usedforsecurity=False)
+        for start in range(0, self.length, chunk_size):
+            self._check_size()
+            _md5.update(self._view[start : start + chunk_size])
+        return base64.b64encode(_md5.digest()).decode()
+
+    def close(self):
+        if self._mmap is not None:
+            self._view.release()
+            self._mmap.close()
+            self._mmap = None
+            self._view = memoryview(b"")
+        self._file.close()
 
 
 def _get_file_segments(endpoint, filename, file_size, segment_size):
@@ -181,3 +389,138 @@ def normalize_tags(tags):
         except IndexError:
             result.append({"key": tag[0], "value": ""})
     return result
+
+
+def to_milliseconds(value):
+    """Convert a datetime or a timestamp in seconds to milliseconds"""
+    if isinstance(value, datetime.datetime):
+        value = value.timestamp()
+    return int(value * 1000)
+
+
+def dimensions_list(dimensions):
+    """Return metric dimensions in the API representation
+
+    :param dimensions: A dict of dimension names and values or a list of
+        ``{"name": ..., "value": ...}`` dicts.
+    """
+    if not dimensions:
+        return []
+    if isinstance(dimensions, dict):
+        return [{"name": k, "value": v} for k, v in dimensions.items()]
+    return list(dimensions)
+
+
+class _ProducerDone:
+    """Marks the end of the items of one producer of merge_producers."""
+
+    def __init__(self, index, error=None):
+        self.index = index
+        self.error = error
+
+
+def merge_producers(
+    producers,
+    max_workers=None,
+    ordered=False,
+    buffer_size=DEFAULT_MERGE_BUFFER,
+    on_error=None,
+    timeout=None,
+):
+    """Run producers in threads and merge their items into one generator.
+
+    Every producer is a callable accepting ``put`` and ``stop``.
+    ``put(item)`` hands an item to the consumer, blocking while the buffer
+    is full, and returns ``False`` once the consumer stopped, in which case
+    the producer should return. ``stop`` is a :class:`threading.Event` set
+    when the consumer stopped, to interrupt waits of long running
+    producers.
+
+    Without ``ordered`` all producers share one bounded queue and items are
+    yielded as they arrive. With ``ordered`` each producer has its own
+    bounded queue, the items of a producer are yielded before the items of
+    the next one, and at most ``max_workers`` producers are started ahead
+    of the consumer.
+
+    :param list producers: The producer callables.
+    :param int max_workers: Number of producers run at the same time.
+        Defaults to all of them.
+    :param bool ordered: Whether to keep the order of the producers.
+    :param int buffer_size: Number of items buffered per queue.
+    :param on_error: Callable receiving the index of a failed producer and
+        its exception. By default the exception is raised to the consumer
+        after the items the producer put before.
+    :param float timeout: Stop when no item arrived for this many seconds.
+        (Optional) By default wait until all producers are done.
+
+    :returns: A generator of the produced items.
+    """
+    producers = list(producers)
+    if not producers:
+        return
+    max_workers = min(max_workers or len(producers), len(producers))
+    stop = threading.Event()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def run(index, out):
+        def put(item):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        error = None
+        try:
+            producers[index](put, stop)
+        except Exception as e:
+            error = e
+        put(_ProducerDone(index, error))
+
+    def drain(out, pending):
+        # Yield the items of out until pending producers are done
+        while pending:
+            try:
+                item = out.get(timeout=timeout)
+            except queue.Empty:
+                return False
+            if isinstance(item, _ProducerDone):
+                pending -= 1
+                if item.error is not None:
+                    if on_error is None:
+                        raise item.error
+                    on_error(item.index, item.error)
+                continue
+            yield item
+        return True
+
+    try:
+        if not ordered:
+            out = queue.Queue(buffer_size)
+            for index in range(len(producers)):
+                executor.submit(run, index, out)
+            yield from drain(out, len(producers))
+            return
+
+        queues = []
+
+        def submit():
+            out = queue.Queue(buffer_size)
+            executor.submit(run, len(queues), out)
+            queues.append(out)
+
+        for _ in range(max_workers):
+            submit()
+        for index in range(len(producers)):
+            # Keep at most max_workers producers ahead of the consumer to
+            # bound the buffered items
+            if len(queues) < len(producers):
+                submit()
+            if not (yield from drain(queues[index], 1)):
+                return
+            queues[index] = None
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
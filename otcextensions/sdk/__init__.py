@@ -11,18 +11,12 @@
 # under the License.
 import importlib
 import os
+import threading
 import time
 
 import openstack
 from openstack import _log
 from openstack import utils
-from otcextensions.common import exc
-from otcextensions.sdk import proxy
-from otcextensions.sdk.cloud import cce as _cce
-from otcextensions.sdk.cloud import dds as _dds
-from otcextensions.sdk.cloud import rds as _rds
-from otcextensions.sdk.compute.v2 import server
-from otcextensions.sdk.network.v2 import service_provider
 
 _logger = _log.setup_logging("openstack")
 
@@ -440,6 +434,13 @@ def extend_instance(obj, cls):
 
 
 def patch_openstack_resources():
+    # Imported on demand to keep "import otcextensions.sdk" cheap, it is
+    # paid by every openstack CLI invocation
+    from otcextensions.common import exc
+    from otcextensions.sdk import proxy
+    from otcextensions.sdk.compute.v2 import server
+    from otcextensions.sdk.network.v2 import service_provider
+
     openstack.proxy.Proxy._report_stats_statsd = proxy.Proxy._report_stats_statsd
     openstack.proxy.Proxy._report_stats_influxdb = proxy.Proxy._report_stats_influxdb
     openstack.compute.v2.server.Server._get_tag_struct = server.Server._get_tag_struct
@@ -476,18 +477,15 @@ def register_single_service(conn, service_name, project_id=None, service=None):
     if service.get("append_project_id", False):
         # If service requires project_id, but it is not present in the
         # service catalog - set endpoint_override
-        ep = conn.endpoint_for(sd.service_type)
+        key = "_".join([sd.service_type.lower().replace("-", "_"), "endpoint_override"])
+        ep = None if key in conn.config.config else conn.endpoint_for(sd.service_type)
         if (
             ep
             and not ep.rstrip("/").endswith("\\%(project_id)s")
             and not ep.rstrip("/").endswith("$(tenant_id)s")
             and not ep.rstrip("/").endswith(project_id)
         ):
-            key = "_".join(
-                [sd.service_type.lower().replace("-", "_"), "endpoint_override"]
-            )
-            if key not in conn.config.config:
-                conn.config.config[key] = utils.urljoin(ep, "%(project_id)s")
+            conn.config.config[key] = utils.urljoin(ep, "%(project_id)s")
 
     elif service.get("set_endpoint_override", False):
         # SDK respects skip_discovery only if endpoint_override is set.
@@ -504,22 +502,125 @@ def register_single_service(conn, service_name, project_id=None, service=None):
     setattr(conn, "get_ak_sk", get_ak_sk)
 
 
-def load(conn, **kwargs):
+class _LazyConnection:
+    """Mixin giving a connection its own class for lazy service stubs"""
+
+
+class _LazyService(property):
+    """Property registering an OTC service on first access"""
+
+
+_lazy_lock = threading.RLock()
+
+
+def _lazy_service_names(service):
+    """Return the attribute names a service is registered with"""
+    names = {service["service_type"]}
+    names.add(service.get("endpoint_service_type", service["service_type"]))
+    return {name.replace("-", "_") for name in names}
+
+
+def _lazy_service_property(service_name, service, attr_name):
+    """Build a stub registering the service on first access"""
+
+    def getter(conn):
+        with _lazy_lock:
+            if service_name not in conn._otc_registered:
+                register_single_service(conn, service_name, service=service)
+                conn._otc_registered.add(service_name)
+                if conn._otc_cache:
+                    conn._otc_cache.save(
+                        conn, _endpoint_overrides(conn, conn._otc_config_keys)
+                    )
+        # add_service has installed the real descriptor, which is found
+        # first unless the registration failed to provide this name
+        for klass in type(conn).__mro__:
+            attr = klass.__dict__.get(attr_name)
+            if attr is not None and not isinstance(attr, _LazyService):
+                return attr.__get__(conn, type(conn))
+        raise AttributeError(attr_name)
+
+    return _LazyService(fget=getter)
+
+
+def _endpoint_overrides(conn, known=()):
+    """Return endpoint overrides not present in the given config keys"""
+    return {
+        key: value
+        for key, value in conn.config.config.items()
+        if key.endswith("_endpoint_override") and key not in known
+    }
+
+
+def load(conn, lazy=None, services=None, **kwargs):
     """Register supported OTC services and make them known to the OpenStackSDK
 
+    When the ``otc_connection_cache`` cloud config option is set, the token,
+    the service catalog and the computed endpoint overrides are stored on
+    disk and reused by subsequent processes until the token expires.
+
     :param conn: An established OpenStack cloud connection
+    :param bool lazy: When set to ``True`` services are only registered
+        when the connection attribute of the service is accessed first, so
+        service modules are imported and endpoints are resolved only for
+        services which are actually used. Defaults to the
+        ``otc_lazy_services`` cloud config option.
+    :param services: Names of the services to register. (Optional) All
+        known services are registered by default.
 
     :returns: none
     """
-    conn.authorize()
-    project_id = conn._get_project_info().id
+    if lazy is None:
+        lazy = bool(conn.config.config.get("otc_lazy_services", False))
+    if services is None:
+        selected = OTC_SERVICES
+    else:
+        selected = {}
+        for service_name in services:
+            if service_name not in OTC_SERVICES:
+                _logger.warning("unknown service %s was requested" % service_name)
+                continue
+            selected[service_name] = OTC_SERVICES[service_name]
+
+    from otcextensions.sdk.connection_cache import ConnectionCache
+
+    # Config keys present before endpoint overrides are computed
+    known = set(conn.config.config)
+    conn._otc_config_keys = known
+    cache = ConnectionCache.from_config(conn)
+    if cache:
+        cache.load(conn)
+
+    if lazy:
+        # Stubs are installed on a class of this connection only
+        extend_instance(conn, _LazyConnection)
+        conn._otc_registered = set()
+        conn._otc_cache = cache
+        for service_name, service in selected.items():
+            for name in _lazy_service_names(service):
+                setattr(
+                    conn.__class__,
+                    name,
+                    _lazy_service_property(service_name, service, name),
+                )
+        setattr(conn, "get_ak_sk", get_ak_sk)
+    else:
+        conn.authorize()
+        project_id = conn._get_project_info().id
 
-    for service_name, service in OTC_SERVICES.items():
-        # _logger.debug('trying to register service %s' % service_name)
-        register_single_service(conn, service_name, project_id, service)
+        for service_name, service in selected.items():
+            # _logger.debug('trying to register service %s' % service_name)
+            register_single_service(conn, service_name, project_id, service)
+
+        if cache:
+            cache.save(conn, _endpoint_overrides(conn, known))
 
     patch_openstack_resources()
 
+    from otcextensions.sdk.cloud import cce as _cce
+    from otcextensions.sdk.cloud import dds as _dds
+    from otcextensions.sdk.cloud import rds as _rds
+
     extend_instance(conn, _rds.RdsMixin)
     extend_instance(conn, _cce.CceMixin)
     extend_instance(conn, _dds.DdsMixin)
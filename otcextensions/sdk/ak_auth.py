@@ -9,22 +9,19 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import base64
 import datetime
 import functools
 import hashlib
 import hmac
-from http import client as http_client
+import threading
 from urllib.parse import quote
-from urllib.parse import urlparse
 from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
 
 import requests
 
 
-class HTTPHeaders(http_client.HTTPMessage):
-    pass
-
-
 def ensure_unicode(s, encoding=None, errors=None):
     # NOOP in Python 3, because every string is already unicode
     return s
@@ -43,6 +40,7 @@ SIGNED_HEADERS_BLACKLIST = [
 ]
 ISO8601 = "%Y-%m-%dT%H:%M:%SZ"
 SIGV4_TIMESTAMP = "%Y%m%dT%H%M%SZ"
+PRESIGN_V4_MAX_EXPIRES = 604800  # 7 days
 
 
 class AKRequestsAuth(requests.auth.AuthBase):
@@ -75,6 +73,8 @@ class AKRequestsAuth(requests.auth.AuthBase):
         self.aws_region = region
         self.service = service
         self.aws_token = token
+        self._local = threading.local()
+        self._signing_key = None
 
     def __call__(self, r):
         """
@@ -86,6 +86,16 @@ class AKRequestsAuth(requests.auth.AuthBase):
         self.add_auth(r)
         return r
 
+    @property
+    def timestamp(self):
+        # The timestamp is per thread, so one instance can sign requests
+        # of several threads concurrently
+        return getattr(self._local, "timestamp", None)
+
+    @timestamp.setter
+    def timestamp(self, value):
+        self._local.timestamp = value
+
     def add_auth(self, request):
         """
         Returns a dictionary containing the necessary headers for Amazon's
@@ -100,16 +110,21 @@ class AKRequestsAuth(requests.auth.AuthBase):
         }
         """
 
-        datetime_now = datetime.datetime.utcnow()
+        datetime_now = datetime.datetime.now(datetime.timezone.utc)
         self.timestamp = datetime_now.strftime(SIGV4_TIMESTAMP)
         # This could be a retry.  Make sure the previous
         # authorization header is removed first.
         self._modify_request_before_signing(request)
-        canonical_request = self.canonical_request(request)
+        # Parse the URL and select the signed headers only once
+        url_parts = urlsplit(request.url)
+        headers_to_sign = self.headers_to_sign(request, url_parts)
+        canonical_request = self.canonical_request(
+            request, headers_to_sign=headers_to_sign, url_parts=url_parts
+        )
         string_to_sign = self.string_to_sign(request, canonical_request)
         signature = self.signature(string_to_sign, request)
 
-        self._inject_signature_to_request(request, signature)
+        self._inject_signature_to_request(request, signature, headers_to_sign)
 
     def _modify_request_before_signing(self, request):
         if "Authorization" in request.headers:
@@ -142,9 +157,10 @@ class AKRequestsAuth(requests.auth.AuthBase):
             del request.headers["X-Amz-Date"]
         request.headers["X-Amz-Date"] = self.timestamp
 
-    def _inject_signature_to_request(self, request, signature):
+    def _inject_signature_to_request(self, request, signature, headers_to_sign=None):
+        if headers_to_sign is None:
+            headers_to_sign = self.headers_to_sign(request)
         hdrs = ["AWS4-HMAC-SHA256 Credential=%s" % self.scope(request)]
-        headers_to_sign = self.headers_to_sign(request)
         hdrs.append("SignedHeaders=%s" % self.signed_headers(headers_to_sign))
         hdrs.append("Signature=%s" % signature)
         request.headers["Authorization"] = ", ".join(hdrs)
@@ -189,11 +205,8 @@ class AKRequestsAuth(requests.auth.AuthBase):
         them into a string, separated by newlines.
         """
         headers = []
-        sorted_header_names = sorted(set(headers_to_sign))
-        for key in sorted_header_names:
-            value = ",".join(
-                self._header_value(v) for v in sorted(headers_to_sign.get_all(key))
-            )
+        for key in sorted(headers_to_sign):
+            value = self._header_value(headers_to_sign[key])
             headers.append("%s:%s" % (key, ensure_unicode(value)))
         return "\n".join(headers)
 
@@ -206,19 +219,19 @@ class AKRequestsAuth(requests.auth.AuthBase):
         return " ".join(value.split())
 
     @classmethod
-    def get_canonical_path(cls, r):
+    def get_canonical_path(cls, r, url_parts=None):
         """
         Create canonical URI--the part of the URI from domain to query
         string (use '/' if no path)
         """
-        parsedurl = urlparse(r.url)
+        path = (url_parts or urlsplit(r.url)).path
 
         # safe chars adapted from boto's use of urllib.parse.quote
         # https://github.com/boto/boto/blob/d9e5cfe900e1a58717e393c76a6e3580305f217a/boto/auth.py#L393
-        return quote(parsedurl.path if parsedurl.path else "/", safe="/-_.~")
+        return quote(path if path else "/", safe="/-_.~")
 
     @classmethod
-    def get_canonical_querystring(cls, r):
+    def get_canonical_querystring(cls, r, url_parts=None):
         """
         Create the canonical query string. According to AWS, by the
         end of this function our query string values must
@@ -234,47 +247,45 @@ class AKRequestsAuth(requests.auth.AuthBase):
         will be your responsibility to urleconde your query params before
         this method is called.
         """
-        canonical_querystring = ""
-
-        parsedurl = urlparse(r.url)
-        querystring_sorted = "&".join(sorted(parsedurl.query.split("&")))
+        return cls._canonical_query((url_parts or urlsplit(r.url)).query)
 
-        for query_param in querystring_sorted.split("&"):
-            key_val_split = query_param.split("=", 1)
-
-            key = key_val_split[0]
-            if len(key_val_split) > 1:
-                val = key_val_split[1]
-            else:
-                val = ""
+    @staticmethod
+    def _canonical_query(query):
+        if not query:
+            return ""
 
+        params = []
+        for query_param in sorted(query.split("&")):
+            key, _, val = query_param.partition("=")
             if key:
-                if canonical_querystring:
-                    canonical_querystring += "&"
-                canonical_querystring += "=".join([key, val])
+                params.append(key + "=" + val)
 
-        return canonical_querystring
+        return "&".join(params)
 
-    def headers_to_sign(self, request):
+    def headers_to_sign(self, request, url_parts=None):
         """
         Select the headers from the request that need to be included
         in the StringToSign.
+
+        :returns: A dict of the lower case header names and their values.
         """
-        header_map = HTTPHeaders()
+        header_map = {}
         for name, value in request.headers.items():
             lname = name.lower()
             if lname not in SIGNED_HEADERS_BLACKLIST:
                 header_map[lname] = value
         if "host" not in header_map:
-            header_map["host"] = self._canonical_host(request.url)
+            header_map["host"] = self._canonical_host(request.url, url_parts)
         return header_map
 
-    def canonical_request(self, request):
+    def canonical_request(self, request, headers_to_sign=None, url_parts=None):
+        if url_parts is None:
+            url_parts = urlsplit(request.url)
+        if headers_to_sign is None:
+            headers_to_sign = self.headers_to_sign(request, url_parts)
         cr = [request.method.upper()]
-        path = self.get_canonical_path(request)
-        cr.append(path)
-        cr.append(self.get_canonical_querystring(request))
-        headers_to_sign = self.headers_to_sign(request)
+        cr.append(self.get_canonical_path(request, url_parts))
+        cr.append(self.get_canonical_querystring(request, url_parts))
         cr.append(self.canonical_headers(headers_to_sign) + "\n")
         cr.append(self.signed_headers(headers_to_sign))
         if "X-Amz-Content-SHA256" in request.headers:
@@ -284,8 +295,8 @@ class AKRequestsAuth(requests.auth.AuthBase):
         cr.append(body_checksum)
         return "\n".join(cr)
 
-    def _canonical_host(self, url):
-        url_parts = urlsplit(url)
+    def _canonical_host(self, url, url_parts=None):
+        url_parts = url_parts or urlsplit(url)
         default_ports = {"http": 80, "https": 443}
         if any(
             url_parts.scheme == scheme and url_parts.port == port
@@ -309,7 +320,7 @@ class AKRequestsAuth(requests.auth.AuthBase):
         return "\n".join(sts)
 
     def signed_headers(self, headers_to_sign):
-        hdrs = ["%s" % n.lower().strip() for n in set(headers_to_sign)]
+        hdrs = ["%s" % n.lower().strip() for n in headers_to_sign]
         hdrs = sorted(hdrs)
         return ";".join(hdrs)
 
@@ -324,12 +335,26 @@ class AKRequestsAuth(requests.auth.AuthBase):
             sig = hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
         return sig
 
-    def signature(self, string_to_sign, request):
+    def signing_key(self, datestamp):
+        """Return the signing key for a day.
+
+        The key only depends on the date, region and service, so it is
+        derived once and reused for all requests of the same day.
+        """
+        cached = self._signing_key
+        if cached and cached[0] == datestamp:
+            return cached[1]
         key = self.aws_secret_access_key
-        k_date = self._sign(("AWS4" + key).encode("utf-8"), self.timestamp[0:8])
+        k_date = self._sign(("AWS4" + key).encode("utf-8"), datestamp)
         k_region = self._sign(k_date, self.aws_region)
         k_service = self._sign(k_region, self.service)
         k_signing = self._sign(k_service, "aws4_request")
+        # A tuple is replaced atomically, no lock is needed
+        self._signing_key = (datestamp, k_signing)
+        return k_signing
+
+    def signature(self, string_to_sign, request):
+        k_signing = self.signing_key(self.timestamp[0:8])
         return self._sign(k_signing, string_to_sign, hex=True)
 
     def credential_scope(self, request):
@@ -347,3 +372,113 @@ class AKRequestsAuth(requests.auth.AuthBase):
         scope.append(self.service)
         scope.append("aws4_request")
         return "/".join(scope)
+
+    def presign_url(
+        self, method, url, expires=3600, signature_version="v4", bucket=None
+    ):
+        """Sign a URL with query string authentication.
+
+        The signature is calculated offline, the URL can be used by any
+        HTTP client until it expires.
+
+        :param method: HTTP method the URL is used with.
+        :param url: The URL with an already URL-encoded path.
+        :param int expires: Validity of the URL in seconds.
+        :param signature_version: ``v4`` for AWS signature version 4 or
+            ``v2`` for the OBS signature.
+        :param bucket: Name of the bucket, required for ``v2`` signatures
+            of virtual hosted style URLs.
+        :returns: The presigned URL.
+        """
+        if signature_version == "v4":
+            return self._presign_url_v4(method, url, expires)
+        if signature_version == "v2":
+            return self._presign_url_v2(method, url, expires, bucket)
+        raise ValueError("Unsupported signature version %s" % signature_version)
+
+    def _presign_url_v4(self, method, url, expires):
+        if not 0 < int(expires) <= PRESIGN_V4_MAX_EXPIRES:
+            raise ValueError(
+                "expires must be between 1 and %d seconds" % PRESIGN_V4_MAX_EXPIRES
+            )
+        timestamp = datetime.datetime.now(datetime.timezone.utc).strftime(
+            SIGV4_TIMESTAMP
+        )
+        credential_scope = "/".join(
+            [timestamp[0:8], self.aws_region, self.service, "aws4_request"]
+        )
+        params = [
+            ("X-Amz-Algorithm", "AWS4-HMAC-SHA256"),
+            ("X-Amz-Credential", self.aws_access_key + "/" + credential_scope),
+            ("X-Amz-Date", timestamp),
+            ("X-Amz-Expires", str(int(expires))),
+            ("X-Amz-SignedHeaders", "host"),
+        ]
+        if self.aws_token:
+            params.append(("X-Amz-Security-Token", self.aws_token))
+
+        url_parts = urlsplit(url)
+        query = "&".join(
+            filter(None, [url_parts.query] + [_quote_param(*p) for p in params])
+        )
+        # The path is signed as it is sent, it must not be encoded again
+        canonical_request = "\n".join(
+            [
+                method.upper(),
+                url_parts.path or "/",
+                self._canonical_query(query),
+                "host:%s\n" % self._canonical_host(url, url_parts),
+                "host",
+                UNSIGNED_PAYLOAD,
+            ]
+        )
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                timestamp,
+                credential_scope,
+                hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+            ]
+        )
+        signature = self._sign(
+            self.signing_key(timestamp[0:8]), string_to_sign, hex=True
+        )
+        query += "&" + _quote_param("X-Amz-Signature", signature)
+        return urlunsplit(url_parts._replace(query=query))
+
+    def _presign_url_v2(self, method, url, expires, bucket=None):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expires_at = str(int(now.timestamp()) + int(expires))
+
+        url_parts = urlsplit(url)
+        resource = url_parts.path or "/"
+        if bucket:
+            resource = "/" + bucket + resource
+        sub_resources = []
+        if self.aws_token:
+            sub_resources.append(("x-obs-security-token", self.aws_token))
+        if sub_resources:
+            resource += "?" + "&".join("%s=%s" % p for p in sub_resources)
+        # Content-MD5 and Content-Type are not known in advance
+        string_to_sign = "\n".join([method.upper(), "", "", expires_at, resource])
+        signature = base64.b64encode(
+            hmac.new(
+                self.aws_secret_access_key.encode("utf-8"),
+                string_to_sign.encode("utf-8"),
+                hashlib.sha1,
+            ).digest()
+        ).decode()
+
+        params = sub_resources + [
+            ("AccessKeyId", self.aws_access_key),
+            ("Expires", expires_at),
+            ("Signature", signature),
+        ]
+        query = "&".join(
+            filter(None, [url_parts.query] + [_quote_param(*p) for p in params])
+        )
+        return urlunsplit(url_parts._replace(query=query))
+
+
+def _quote_param(key, value):
+    return quote(key, safe="-_.~") + "=" + quote(value, safe="-_.~")
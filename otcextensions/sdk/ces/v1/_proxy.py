@@ -9,13 +9,34 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
+import concurrent.futures
+import itertools
+
+from openstack import exceptions
 from openstack import proxy
+from otcextensions.common import utils
+from otcextensions.sdk.ces.v1 import _publisher
 from otcextensions.sdk.ces.v1 import alarm as _alarm
 from otcextensions.sdk.ces.v1 import event_data as _event_data
 from otcextensions.sdk.ces.v1 import metric as _metric
 from otcextensions.sdk.ces.v1 import metric_data as _metric_data
 from otcextensions.sdk.ces.v1 import quota as _quota
 
+# Maximum number of metrics of a batch query
+DEFAULT_BATCH_QUERY_METRICS = 10
+DEFAULT_BATCH_QUERY_WORKERS = 4
+
+
+def _chunks(iterable, size):
+    """Yield lists of up to ``size`` items of an iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class Proxy(proxy.Proxy):
 
@@ -118,26 +139,165 @@ class Proxy(proxy.Proxy):
         return self._list(_metric.Metric, **query)
 
     # ======== Metric-Data ========
-    def metric_data(self, **query):
+    def metric_data(self, columnar=False, **query):
         """Return a generator of Metric Data
 
+        :param bool columnar: When set to ``True`` the datapoints are
+                              returned in columns of a
+                              :class:`~otcextensions.sdk.ces.v1.metric_data.MetricSeries`
+                              instead of a resource per datapoint.
         :param kwargs query: Optional query parameters to be sent to limit
                               the resources being returned.
         :returns: A generator of metric data objects
         :rtype: :class:`~otcextensions.sdk.ces.v1.metric_data.MetricData`
         """
+        if columnar:
+            return self._metric_series(**query)
         return self._list(_metric_data.MetricData, **query)
 
-    # skipped due to lag of compliant API (resource is list not JSON)
-    '''
-    def create_metric_data(self, **attrs):
-       """Create a new Alarm from attributes
+    def _metric_series(self, **query):
+        """Query metric data into a columnar series"""
+        query_params = _metric_data.MetricData._query_mapping._transpose(
+            query, _metric_data.MetricData
+        )
+        response = self.get(_metric_data.MetricData.base_path, params=query_params)
+        exceptions.raise_from_response(response)
+        data = response.json()
+        dimensions = dict(
+            value.split(",", 1)
+            for key, value in sorted(query.items())
+            if key.startswith("dim.") and "," in value
+        )
+        yield _metric_data.MetricSeries.from_datapoints(
+            data.get("metric_name") or query.get("metric_name"),
+            query.get("filter"),
+            data.get("datapoints") or [],
+            dimensions=dimensions,
+        )
+
+    def batch_metric_data(
+        self,
+        metrics,
+        from_time,
+        to_time,
+        period=1,
+        filter="average",
+        chunk_size=DEFAULT_BATCH_QUERY_METRICS,
+        max_workers=DEFAULT_BATCH_QUERY_WORKERS,
+    ):
+        """Query the data of many metrics
+
+        The metrics are queried in chunks of ``chunk_size`` metrics per
+        request, and up to ``max_workers`` requests are sent at the same
+        time. Series are yielded in the order of ``metrics``.
+
+        :param metrics: Iterable of metrics, each a dict with
+            ``namespace``, ``metric_name`` and ``dimensions``, either as
+            a dict or as a list of dicts with ``name`` and ``value``.
+        :param from_time: Start of the range as :class:`~datetime.datetime`
+            or UNIX timestamp in seconds.
+        :param to_time: End of the range as :class:`~datetime.datetime` or
+            UNIX timestamp in seconds.
+        :param period: Granularity of the data in seconds, ``1`` for the
+            raw data.
+        :param str filter: The statistic, e.g. ``average`` or ``max``.
+        :param int chunk_size: Number of metrics per request.
+        :param int max_workers: Number of requests sent in parallel.
+        :returns: A generator of metric series objects
+        :rtype: :class:`~otcextensions.sdk.ces.v1.metric_data.MetricSeries`
+        """
+        body = {
+            "from": utils.to_milliseconds(from_time),
+            "to": utils.to_milliseconds(to_time),
+            "period": str(period),
+            "filter": filter,
+        }
+        chunks = _chunks(metrics, chunk_size)
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        pending = collections.deque()
+        try:
+            # Keep at most max_workers chunks ahead of the consumer
+            for chunk in itertools.islice(chunks, max_workers):
+                pending.append(executor.submit(self._batch_query, chunk, body))
+            while pending:
+                series = pending.popleft().result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append(executor.submit(self._batch_query, chunk, body))
+                yield from series
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _batch_query(self, metrics, body):
+        """Query a single chunk of metrics into columnar series"""
+        body = dict(
+            body,
+            metrics=[
+                {
+                    "namespace": metric["namespace"],
+                    "metric_name": metric["metric_name"],
+                    "dimensions": utils.dimensions_list(metric.get("dimensions")),
+                }
+                for metric in metrics
+            ],
+        )
+        response = self.post("/batch-query-metric-data", json=body)
+        exceptions.raise_from_response(response)
+        result = []
+        for data in response.json().get("metrics", []):
+            series = _metric_data.MetricSeries.from_datapoints(
+                data.get("metric_name"),
+                body["filter"],
+                data.get("datapoints") or [],
+                dimensions={
+                    d["name"]: d["value"] for d in data.get("dimensions") or []
+                },
+            )
+            series.unit = data.get("unit") or series.unit
+            result.append(series)
+        return result
+
+    def create_metric_data(self, data):
+        """Add custom metric data
+
+        :param list data: Points in the API representation, each a dict
+            with ``metric`` (``namespace``, ``metric_name`` and
+            ``dimensions``), ``ttl``, ``collect_time`` in milliseconds,
+            ``value`` and optionally ``unit`` and ``type``.
+        :returns: ``None``
+        """
+        # The request body is a list, so it can not be built by a resource
+        response = self.post(_metric_data.MetricData.base_path, json=list(data))
+        exceptions.raise_from_response(response)
+
+    def metric_publisher(
+        self,
+        batch_size=_publisher.DEFAULT_BATCH_SIZE,
+        flush_interval=_publisher.DEFAULT_FLUSH_INTERVAL,
+        aggregate=None,
+        ttl=_publisher.DEFAULT_TTL,
+    ):
+        """Create a buffered publisher of custom metric data
 
-       :param dict attrs: Keyword arguments which will be used to create
-           a :class:`~otcextensions.sdk.ces.v1.metric_data.MetricData`
-       """
-       return self._create(_metric_data.MetricData, **attrs)
-    '''
+        :param int batch_size: Maximum number of points per request.
+        :param float flush_interval: Interval in seconds of sending the
+            buffered points.
+        :param str aggregate: Combine the points of a metric between two
+            flushes into one, e.g. ``average`` or ``sum``.
+        :param int ttl: Retention of the points in seconds.
+        :returns: A publisher to be closed after use, also usable as
+            a context manager
+            :class:`~otcextensions.sdk.ces.v1._publisher.MetricPublisher`
+        """
+        return _publisher.MetricPublisher(
+            self,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            aggregate=aggregate,
+            ttl=ttl,
+        )
 
     # ======== Quotas ========
     def quotas(self):
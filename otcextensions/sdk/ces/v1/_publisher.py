@@ -0,0 +1,222 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import threading
+import time
+
+from openstack import _log
+from openstack import exceptions
+from otcextensions.common import utils
+from otcextensions.sdk.ces.v1 import metric_data as _metric_data
+
+_logger = _log.setup_logging("openstack")
+
+# Number of points per request, keeping the request far below its size limit
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 10.0
+# Retention of the points in seconds
+DEFAULT_TTL = 172800
+
+
+class MetricPublisher:
+    """Buffered publisher of custom metric data.
+
+    Points passed to :meth:`add` are buffered and sent in batches of up to
+    ``batch_size`` points, once the buffer is full and every
+    ``flush_interval`` seconds.
+
+    With ``aggregate`` set, points of the same metric, dimensions and unit
+    collected between two flushes are combined into a single point using
+    one of the functions of
+    :data:`~otcextensions.sdk.ces.v1.metric_data.DOWNSAMPLE_FUNCTIONS`.
+
+    Errors of the background flushes are raised by :meth:`flush` and
+    :meth:`close`. The publisher is a context manager closing itself on
+    exit.
+    """
+
+    def __init__(
+        self,
+        proxy,
+        batch_size=DEFAULT_BATCH_SIZE,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        aggregate=None,
+        ttl=DEFAULT_TTL,
+    ):
+        if aggregate is not None and aggregate not in _metric_data.DOWNSAMPLE_FUNCTIONS:
+            raise ValueError(
+                "Unsupported aggregation %s, use one of %s"
+                % (aggregate, ", ".join(_metric_data.DOWNSAMPLE_FUNCTIONS))
+            )
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.aggregate = aggregate
+        self.ttl = ttl
+        #: Number of points sent successfully
+        self.sent = 0
+        #: Number of points of failed requests
+        self.failed = 0
+
+        self._proxy = proxy
+        # Points in the API representation, or values per metric key when
+        # aggregating
+        self._points = []
+        self._series = {}
+        self._lock = threading.Lock()
+        self._errors = []
+        self._closed = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add(
+        self,
+        namespace,
+        metric_name,
+        value,
+        dimensions=None,
+        unit=None,
+        value_type=None,
+        collect_time=None,
+    ):
+        """Buffer a single point.
+
+        :param str namespace: Custom namespace of the metric, e.g.
+            ``MINE.APP``.
+        :param str metric_name: Name of the metric.
+        :param value: Value of the point.
+        :param dimensions: Dimensions of the metric, either a dict or a list
+            of dicts with ``name`` and ``value``.
+        :param str unit: Unit of the value.
+        :param str value_type: Type of the value, ``int`` or ``float``.
+        :param collect_time: Collection time as UNIX timestamp in seconds.
+            Defaults to now.
+        """
+        if self._closed.is_set():
+            raise exceptions.SDKException("Metric publisher is closed")
+        if collect_time is None:
+            collect_time = time.time()
+        dimensions = utils.dimensions_list(dimensions)
+        with self._lock:
+            if self.aggregate:
+                key = (
+                    namespace,
+                    metric_name,
+                    tuple((d["name"], d["value"]) for d in dimensions),
+                    unit,
+                    value_type,
+                )
+                values, _ = self._series.get(key, ([], None))
+                values.append(value)
+                self._series[key] = (values, collect_time)
+                size = len(self._series)
+            else:
+                self._points.append(
+                    self._point(
+                        namespace,
+                        metric_name,
+                        dimensions,
+                        value,
+                        unit,
+                        value_type,
+                        collect_time,
+                    )
+                )
+                size = len(self._points)
+        if size >= self.batch_size:
+            self._send(self._take_points())
+
+    def flush(self):
+        """Send all buffered points.
+
+        :raises: The first error of a failed request since the last flush.
+        """
+        self._send(self._take_points())
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """Flush the buffered points and stop the publisher."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flush_thread.join()
+        try:
+            self.flush()
+        finally:
+            _logger.debug(
+                "Metric publisher sent %d points, %d failed", self.sent, self.failed
+            )
+
+    def _point(
+        self, namespace, metric_name, dimensions, value, unit, value_type, collect_time
+    ):
+        point = {
+            "metric": {
+                "namespace": namespace,
+                "metric_name": metric_name,
+                "dimensions": dimensions,
+            },
+            "ttl": self.ttl,
+            "collect_time": int(collect_time * 1000),
+            "value": value,
+        }
+        if unit is not None:
+            point["unit"] = unit
+        if value_type is not None:
+            point["type"] = value_type
+        return point
+
+    def _take_points(self):
+        with self._lock:
+            points, self._points = self._points, []
+            series, self._series = self._series, {}
+        if series:
+            aggregate = _metric_data.DOWNSAMPLE_FUNCTIONS[self.aggregate]
+            for key, (values, collect_time) in series.items():
+                namespace, metric_name, dimensions, unit, value_type = key
+                points.append(
+                    self._point(
+                        namespace,
+                        metric_name,
+                        [{"name": k, "value": v} for k, v in dimensions],
+                        aggregate(values),
+                        unit,
+                        value_type,
+                        collect_time,
+                    )
+                )
+        return points
+
+    def _send(self, points):
+        for start in range(0, len(points), self.batch_size):
+            batch = points[start : start + self.batch_size]
+            try:
+                self._proxy.create_metric_data(batch)
+            except Exception as e:
+                _logger.warning("Publishing %d metric points failed: %s", len(batch), e)
+                with self._lock:
+                    self.failed += len(batch)
+                    self._errors.append(e)
+            else:
+                with self._lock:
+                    self.sent += len(batch)
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            self._send(self._take_points())
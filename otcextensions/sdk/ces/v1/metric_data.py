@@ -9,6 +9,8 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import array
+
 from openstack import resource
 
 
@@ -46,3 +48,172 @@ class MetricData(resource.Resource):
     datapoints = resource.Body("datapoints", type=list, list_type=DatapointsSpec)
     # Metric Name like 'cpu_util'
     metric_name = resource.Body("metric_name")
+
+
+#: Aggregations supported by :meth:`MetricSeries.downsample`
+DOWNSAMPLE_FUNCTIONS = {
+    "average": lambda values: sum(values) / len(values),
+    "max": max,
+    "min": min,
+    "sum": sum,
+    "count": len,
+    "first": lambda values: values[0],
+    "last": lambda values: values[-1],
+}
+
+
+class MetricSeries:
+    """Datapoints of a metric stored in columns.
+
+    Timestamps (milliseconds) and values of the datapoints are kept in
+    two :class:`array.array` columns instead of a resource per datapoint.
+    The columns support the buffer protocol, so :meth:`to_numpy` does not
+    copy them.
+    """
+
+    __slots__ = (
+        "metric_name",
+        "statistic",
+        "unit",
+        "dimensions",
+        "timestamps",
+        "values",
+    )
+
+    def __init__(
+        self,
+        metric_name,
+        statistic,
+        unit=None,
+        dimensions=None,
+        timestamps=(),
+        values=(),
+    ):
+        self.metric_name = metric_name
+        self.statistic = statistic
+        self.unit = unit
+        self.dimensions = dimensions or {}
+        self.timestamps = array.array("q", timestamps)
+        self.values = array.array("d", values)
+
+    @classmethod
+    def from_datapoints(cls, metric_name, statistic, datapoints, dimensions=None):
+        """Build the columns from raw datapoints of the API.
+
+        :param str metric_name: Name of the metric.
+        :param str statistic: The statistic of the datapoints (the
+            ``filter`` of the query), e.g. ``average``. Guessed from the
+            first datapoint when not given.
+        :param list datapoints: Datapoint dicts of the API response.
+        :param dict dimensions: Dimensions of the metric.
+        """
+        unit = None
+        if datapoints:
+            unit = datapoints[0].get("unit")
+            if not statistic:
+                statistic = next(
+                    (k for k in datapoints[0] if k not in ("timestamp", "unit")),
+                    None,
+                )
+        return cls(
+            metric_name,
+            statistic,
+            unit=unit,
+            dimensions=dimensions,
+            timestamps=(point["timestamp"] for point in datapoints),
+            values=(point.get(statistic, float("nan")) for point in datapoints),
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __iter__(self):
+        return zip(self.timestamps, self.values)
+
+    def __repr__(self):
+        return "%s(metric_name=%r, statistic=%r, points=%d)" % (
+            self.__class__.__name__,
+            self.metric_name,
+            self.statistic,
+            len(self),
+        )
+
+    def downsample(self, interval, how="average"):
+        """Aggregate the datapoints into buckets of a fixed length.
+
+        :param int interval: Length of a bucket in seconds. The bucket
+            timestamp is the start of the bucket.
+        :param str how: Aggregation of the values of a bucket, one of
+            ``average``, ``max``, ``min``, ``sum``, ``count``, ``first``
+            and ``last``.
+
+        :returns: A new :class:`MetricSeries`.
+        """
+        try:
+            aggregate = DOWNSAMPLE_FUNCTIONS[how]
+        except KeyError:
+            raise ValueError(
+                "Unsupported aggregation %s, use one of %s"
+                % (how, ", ".join(DOWNSAMPLE_FUNCTIONS))
+            )
+        step = int(interval * 1000)
+        if step <= 0:
+            raise ValueError("interval must be positive")
+
+        points = iter(self)
+        if any(a > b for a, b in zip(self.timestamps, self.timestamps[1:])):
+            points = iter(sorted(points))
+        timestamps = array.array("q")
+        values = array.array("d")
+        bucket = None
+        bucket_values = []
+        for timestamp, value in points:
+            start = timestamp - timestamp % step
+            if start != bucket and bucket_values:
+                timestamps.append(bucket)
+                values.append(aggregate(bucket_values))
+                bucket_values = []
+            bucket = start
+            bucket_values.append(value)
+        if bucket_values:
+            timestamps.append(bucket)
+            values.append(aggregate(bucket_values))
+
+        return MetricSeries(
+            self.metric_name,
+            self.statistic,
+            unit=self.unit,
+            dimensions=self.dimensions,
+            timestamps=timestamps,
+            values=values,
+        )
+
+    def to_numpy(self):
+        """Return the columns as NumPy arrays without copying them.
+
+        Requires ``numpy``.
+
+        :returns: A tuple of ``int64`` timestamps in milliseconds and
+            ``float64`` values.
+        """
+        import numpy
+
+        return (
+            numpy.frombuffer(self.timestamps, dtype=numpy.int64),
+            numpy.frombuffer(self.values, dtype=numpy.float64),
+        )
+
+    def to_pandas(self):
+        """Return the datapoints as a :class:`pandas.Series`.
+
+        Requires ``pandas``. The series is indexed by UTC timestamps and
+        named after the metric.
+        """
+        import pandas
+
+        timestamps, values = self.to_numpy()
+        return pandas.Series(
+            values,
+            index=pandas.to_datetime(timestamps, unit="ms", utc=True),
+            name=self.metric_name,
+        )
@@ -0,0 +1,138 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import hashlib
+import json
+import os
+import time
+
+from openstack import _log
+
+_logger = _log.setup_logging("openstack")
+
+DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "otcextensions")
+# Cached tokens expiring within this number of seconds are not used
+EXPIRY_MARGIN = 300
+
+
+class ConnectionCache:
+    """On-disk cache of the authentication state of a connection.
+
+    The cache holds the token together with the service catalog and the
+    endpoint overrides computed during service registration, so a new
+    process can skip authentication and the catalog walk. Entries are keyed
+    by cloud, region and a hash of the auth options and are only used until
+    shortly before the token expires. Files are created readable by the
+    owner only, as they contain a valid token.
+    """
+
+    def __init__(self, path=None):
+        self.path = os.path.expanduser(path or DEFAULT_CACHE_DIR)
+
+    @classmethod
+    def from_config(cls, conn):
+        """Return the cache configured with ``otc_connection_cache``.
+
+        The option is either ``true`` to use the default cache directory
+        or the path of the cache directory.
+        """
+        value = conn.config.config.get("otc_connection_cache")
+        if not value:
+            return None
+        return cls(value if isinstance(value, str) else None)
+
+    def _filename(self, conn):
+        config = conn.config
+        key = json.dumps(
+            [config.name, config.region_name, config.config.get("auth")],
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, digest + ".json")
+
+    def load(self, conn):
+        """Restore the cached state into the connection.
+
+        :returns: ``True`` if a valid cache entry was restored.
+        """
+        auth = conn.session.auth
+        if not hasattr(auth, "set_auth_state"):
+            return False
+        filename = self._filename(conn)
+        try:
+            with open(filename) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError:
+            _logger.warning("Ignoring corrupted connection cache %s", filename)
+            return False
+        if data.get("expires", 0) - EXPIRY_MARGIN < time.time():
+            _logger.debug("Cached token in %s is expired", filename)
+            return False
+
+        auth.set_auth_state(data["auth_state"])
+        self._invalidate_on_reauth(conn, auth)
+        for key, value in data.get("config", {}).items():
+            conn.config.config.setdefault(key, value)
+        _logger.debug("Connection state restored from %s", filename)
+        return True
+
+    def _invalidate_on_reauth(self, conn, auth):
+        # keystoneauth invalidates the plugin when a request is answered
+        # with 401, so the restored token was revoked and must not be
+        # restored again
+        invalidate = auth.invalidate
+
+        def _invalidate():
+            auth.invalidate = invalidate
+            _logger.debug("Cached token of %s was rejected", conn.config.name)
+            self.invalidate(conn)
+            return invalidate()
+
+        auth.invalidate = _invalidate
+
+    def save(self, conn, config=None):
+        """Store the state of the connection.
+
+        :param dict config: Computed config values, e.g. endpoint overrides,
+            restored together with the token.
+        """
+        auth = conn.session.auth
+        if not hasattr(auth, "get_auth_state"):
+            return
+        state = auth.get_auth_state()
+        expires = getattr(getattr(auth, "auth_ref", None), "expires", None)
+        if not state or not expires:
+            return
+        data = {
+            "auth_state": state,
+            "expires": expires.timestamp(),
+            "config": config or {},
+        }
+        filename = self._filename(conn)
+        tmp_filename = "%s.%d.tmp" % (filename, os.getpid())
+        try:
+            os.makedirs(self.path, mode=0o700, exist_ok=True)
+            fd = os.open(tmp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_filename, filename)
+        except OSError as e:
+            _logger.warning("Failed to write connection cache %s: %s", filename, e)
+
+    def invalidate(self, conn):
+        """Remove the cache entry of the connection."""
+        try:
+            os.remove(self._filename(conn))
+        except FileNotFoundError:
+            pass
@@ -9,12 +9,29 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import functools
+import gzip
+import json
+import os
+import time
+
+from openstack import _log
 from openstack import proxy
+from otcextensions.common import utils
 from otcextensions.sdk.ctsv3.v3 import key_event as _key_event
 from otcextensions.sdk.ctsv3.v3 import quota as _quota
 from otcextensions.sdk.ctsv3.v3 import trace as _trace
 from otcextensions.sdk.ctsv3.v3 import tracker as _tracker
 
+_logger = _log.setup_logging("openstack")
+
+DEFAULT_TRACE_WINDOW = 3600
+DEFAULT_TRACE_WORKERS = 4
+# Maximum page size of the traces API
+DEFAULT_TRACE_LIMIT = 200
+# Number of traces buffered ahead of the consumer per window
+DEFAULT_TRACE_BUFFER = 1000
+
 
 class Proxy(proxy.Proxy):
     skip_discovery = True
@@ -64,7 +81,104 @@ class Proxy(proxy.Proxy):
         :returns: A generator of trace object of a
             :class:`~otcextensions.sdk.ctsv3.v3.trace.Trace`
         """
-        return self._list(_trace.Trace, paginated=False, **attrs)
+        return self._list(_trace.Trace, **attrs)
+
+    def traces_between(
+        self,
+        from_time,
+        to_time,
+        trace_type="system",
+        window=DEFAULT_TRACE_WINDOW,
+        max_workers=DEFAULT_TRACE_WORKERS,
+        limit=DEFAULT_TRACE_LIMIT,
+        **attrs,
+    ):
+        """Query traces of a time range in concurrently fetched windows
+
+        The range is split into windows of ``window`` seconds. Up to
+        ``max_workers`` windows are fetched at the same time, each of them
+        following the pagination markers. Traces are yielded window by
+        window in the order of the windows, and only a bounded number of
+        traces per window is buffered ahead of the consumer.
+
+        :param from_time: Start of the range (inclusive) as
+            :class:`~datetime.datetime` or UNIX timestamp in seconds.
+        :param to_time: End of the range (exclusive) as
+            :class:`~datetime.datetime` or UNIX timestamp in seconds.
+        :param str trace_type: Type of the traces, ``system`` or ``data``.
+        :param int window: Length of a window in seconds.
+        :param int max_workers: Number of windows fetched at the same time.
+        :param int limit: Number of traces per request.
+        :param dict attrs: Optional query parameters to be sent to limit the
+            resources being returned.
+
+        :returns: A generator of trace object of a
+            :class:`~otcextensions.sdk.ctsv3.v3.trace.Trace`
+        """
+        start = utils.to_milliseconds(from_time)
+        end = utils.to_milliseconds(to_time)
+        step = max(utils.to_milliseconds(window), 1)
+        windows = [(lower, min(lower + step, end)) for lower in range(start, end, step)]
+
+        producers = []
+        for lower, upper in windows:
+            query = dict(attrs, trace_type=trace_type, limit=limit)
+            # The upper bound of the API is inclusive
+            query["from"] = lower
+            query["to"] = upper - 1
+            producers.append(functools.partial(self._list_window, query))
+        yield from utils.merge_producers(
+            producers,
+            max_workers=max_workers,
+            ordered=True,
+            buffer_size=DEFAULT_TRACE_BUFFER,
+        )
+
+    def _list_window(self, query, put, stop):
+        """List the traces of one window."""
+        for trace in self._list(_trace.Trace, **query):
+            if not put(trace):
+                break
+
+    def export_traces(self, filename, from_time, to_time, **attrs):
+        """Export traces of a time range into a JSON lines file
+
+        The traces are fetched with :meth:`traces_between` and written one
+        JSON object per line while they arrive, so the memory use does not
+        depend on the number of traces. A file name ending with ``.gz`` is
+        gzip compressed. The file is replaced only after a complete export.
+
+        :param str filename: Path of the target file.
+        :param from_time: Start of the range (inclusive) as
+            :class:`~datetime.datetime` or UNIX timestamp in seconds.
+        :param to_time: End of the range (exclusive) as
+            :class:`~datetime.datetime` or UNIX timestamp in seconds.
+        :param dict attrs: Further arguments of :meth:`traces_between`.
+
+        :returns: A dict with the number of exported ``traces`` and the
+            elapsed ``seconds``.
+        """
+        started = time.monotonic()
+        count = 0
+        tmp_filename = filename + ".tmp"
+        opener = gzip.open if filename.endswith(".gz") else open
+        try:
+            with opener(tmp_filename, "wt", encoding="utf-8") as f:
+                for trace in self.traces_between(from_time, to_time, **attrs):
+                    f.write(json.dumps(trace.to_dict(computed=False)))
+                    f.write("\n")
+                    count += 1
+            os.replace(tmp_filename, filename)
+        except BaseException:
+            try:
+                os.remove(tmp_filename)
+            except FileNotFoundError:
+                pass
+            raise
+
+        seconds = time.monotonic() - started
+        _logger.debug("Exported %d traces to %s in %.2fs", count, filename, seconds)
+        return {"traces": count, "seconds": seconds}
 
     def trackers(self, **attrs):
         """Query notification events
@@ -73,3 +73,15 @@ class Trace(resource.Resource):
     location_info = resource.Body("location_info")
     endpoint = resource.Body("endpoint")
     resource_url = resource.Body("resource_url")
+
+    @classmethod
+    def _get_next_link(cls, uri, response, data, marker, limit, total_yielded):
+        # The marker of the next page is returned in the metadata and
+        # passed back as the next query parameter
+        next_marker = (data.get("meta_data") or {}).get("marker")
+        if not next_marker:
+            return None, {}
+        params = {"next": next_marker}
+        if limit:
+            params["limit"] = limit
+        return uri, params
@@ -12,18 +12,90 @@
 
 import base64
 import binascii
+import concurrent.futures
 import csv
+import functools
+import itertools
+import time
+import zlib
 from pathlib import Path
 
+from openstack import _log
+from openstack import exceptions
 from openstack import proxy
-
-# from openstack import exceptions
+from otcextensions.common import utils
+from otcextensions.sdk import retry
 from otcextensions.sdk.dis.v2 import app as _app
 from otcextensions.sdk.dis.v2 import checkpoint as _checkpoint
 from otcextensions.sdk.dis.v2 import data as _data
 from otcextensions.sdk.dis.v2 import dump_task as _dump_task
 from otcextensions.sdk.dis.v2 import stream as _stream
 
+_logger = _log.setup_logging("openstack")
+
+# Limits of a single PutRecords request
+DEFAULT_UPLOAD_BATCH_RECORDS = 500
+DEFAULT_UPLOAD_BATCH_BYTES = 4 * 1024 * 1024
+DEFAULT_UPLOAD_CONCURRENCY = 4
+DEFAULT_UPLOAD_RETRIES = 3
+DEFAULT_CHECKPOINT_INTERVAL = 10.0
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_CONSUME_BUFFER = 10000
+
+_READABLE_PARTITION_STATES = ("ACTIVE", "DELETED")
+
+_RECORD_KEYS = ("partition_key", "partition_id", "explicit_hash_key")
+
+# Error code of an expired partition cursor
+_EXPIRED_CURSOR_ERROR = "DIS.4319"
+
+# Status of a sent record missing in a truncated upload response
+_MISSING_RESULT = {
+    "error_code": "MissingResult",
+    "error_message": "No result returned for the record",
+}
+
+
+def _is_expired_cursor(response):
+    """Whether a failed response was caused by an expired cursor"""
+    if response.status_code != 400:
+        return False
+    try:
+        return response.json().get("errorCode") == _EXPIRED_CURSOR_ERROR
+    except ValueError:
+        return False
+
+
+def _record_key(record):
+    """Return the partition id or key of a record, if it has one"""
+    return next((str(record[k]) for k in _RECORD_KEYS if record.get(k)), None)
+
+
+def _encode_record(record, encoded):
+    """Return the record as a dict with Base64 encoded data"""
+    if not isinstance(record, dict):
+        record = {"data": record}
+    data = record.get("data")
+    if not data:
+        raise ValueError("data is missing in the attributes")
+    if not encoded:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        data = base64.b64encode(data).decode("ascii")
+    elif isinstance(data, bytes):
+        data = data.decode("ascii")
+    return dict(record, data=data)
+
+
+def _read_csv_records(filename):
+    """Yield the rows of a CSV file with a data column"""
+    with Path(filename).open("r") as csv_content:
+        reader = csv.DictReader(csv_content, delimiter=",")
+        if "data" not in (reader.fieldnames or ()):
+            raise ValueError(f"data column is missing in the header of {filename}")
+        for record in reader:
+            yield {k: v for k, v in record.items() if v}
+
 
 class Proxy(proxy.Proxy):
 
@@ -226,6 +298,9 @@ class Proxy(proxy.Proxy):
     def upload_data(self, stream_name, stream_id=None, records=None, filename=None):
         """Upload data to DIS stream.
 
+        All records are sent in a single request, use
+        :meth:`upload_records` for large amounts of records.
+
         :param stream_name: Name of the stream.
         :param stream_id: Optional stream ID.
         :param records: List of records (if filename is not used).
@@ -270,9 +345,203 @@ class Proxy(proxy.Proxy):
 
         request_attrs = {"stream_name": stream_name, "records": records_data}
         if stream_id:
-            request_attrs.append(stream_id=stream_id)
+            request_attrs["stream_id"] = stream_id
         return self._create(_data.Data, **request_attrs)
 
+    def upload_records(
+        self,
+        stream_name,
+        records=None,
+        stream_id=None,
+        filename=None,
+        encoded=False,
+        batch_records=DEFAULT_UPLOAD_BATCH_RECORDS,
+        batch_bytes=DEFAULT_UPLOAD_BATCH_BYTES,
+        max_concurrency=DEFAULT_UPLOAD_CONCURRENCY,
+        max_retries=DEFAULT_UPLOAD_RETRIES,
+    ):
+        """Upload a stream of records to a DIS stream in parallel batches.
+
+        Records are consumed lazily and grouped into batches limited by
+        count and size. Batches are sent over ``max_concurrency`` lanes in
+        parallel. Records with the same partition id or key always use the
+        same lane, which has a single batch in flight, so their order is
+        kept. Records rejected in the response are retried with backoff.
+        To keep the order, records following a rejected record of the same
+        partition id or key are sent again with it, so they may be written
+        twice. Records without a partition id or key have no order and only
+        rejected ones are sent again. Batches failing with an error are
+        reported in ``failed`` and do not abort the upload.
+
+        :param stream_name: Name of the stream.
+        :param records: Iterable of records, either dicts with ``data`` and
+            optionally ``partition_key``, ``partition_id`` or
+            ``explicit_hash_key``, or the data itself.
+        :param stream_id: Optional stream ID.
+        :param filename: Path to a CSV file with a ``data`` column, read
+            instead of ``records``.
+        :param bool encoded: Whether the data is already Base64 encoded.
+            Otherwise ``bytes`` and ``str`` (as UTF-8) data is encoded.
+        :param int batch_records: Maximum number of records per request.
+        :param int batch_bytes: Maximum size of the encoded data per
+            request.
+        :param int max_concurrency: Number of requests sent in parallel.
+        :param int max_retries: Number of retries of rejected records.
+
+        :returns: A dict with the number of uploaded ``records`` and
+            ``bytes``, the ``failed`` records with their ``error_code`` and
+            ``error_message``, the elapsed ``seconds`` and the throughput in
+            ``records_per_second``.
+        """
+        if filename:
+            records = _read_csv_records(filename)
+        policy = retry.RetryPolicy(max_retries=max_retries)
+        result = {"records": 0, "bytes": 0, "failed": []}
+        started = time.monotonic()
+
+        lanes = [[] for _ in range(max_concurrency)]
+        lane_bytes = [0] * max_concurrency
+        in_flight = [None] * max_concurrency
+        unkeyed = itertools.count()
+
+        def collect(lane):
+            if in_flight[lane] is not None:
+                sent, sent_bytes, failed = in_flight[lane].result()
+                in_flight[lane] = None
+                result["records"] += sent
+                result["bytes"] += sent_bytes
+                result["failed"].extend(failed)
+
+        def flush(lane):
+            # Keep a single batch per lane in flight
+            collect(lane)
+            if lanes[lane]:
+                in_flight[lane] = executor.submit(
+                    self._put_records,
+                    stream_name,
+                    stream_id,
+                    lanes[lane],
+                    policy,
+                )
+                lanes[lane] = []
+                lane_bytes[lane] = 0
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency)
+        try:
+            for record in records or ():
+                record = _encode_record(record, encoded)
+                size = len(record["data"])
+                key = _record_key(record)
+                if key is not None:
+                    lane = zlib.crc32(key.encode("utf-8")) % max_concurrency
+                else:
+                    # Records without a key fill the lanes in turns
+                    lane = next(unkeyed) // batch_records % max_concurrency
+                if lanes[lane] and (
+                    len(lanes[lane]) >= batch_records
+                    or lane_bytes[lane] + size > batch_bytes
+                ):
+                    flush(lane)
+                lanes[lane].append(record)
+                lane_bytes[lane] += size
+            for lane in range(max_concurrency):
+                flush(lane)
+            for lane in range(max_concurrency):
+                collect(lane)
+        finally:
+            executor.shutdown(wait=False)
+
+        result["seconds"] = time.monotonic() - started
+        result["records_per_second"] = result["records"] / max(result["seconds"], 1e-9)
+        _logger.debug(
+            "Uploaded %d records (%d bytes) to %s in %.2fs, %d failed",
+            result["records"],
+            result["bytes"],
+            stream_name,
+            result["seconds"],
+            len(result["failed"]),
+        )
+        return result
+
+    def _put_records(self, stream_name, stream_id, records, policy):
+        """Send a batch, retrying the records rejected by the service.
+
+        To keep the order of a partition, records following a rejected
+        record with the same partition id or key are sent again together
+        with it, even if they were written.
+
+        :returns: Tuple of the number and size of written records and the
+            list of records failed finally.
+        """
+        sent = sent_bytes = 0
+        attempt = 0
+        while True:
+            body = {"stream_name": stream_name, "records": records}
+            if stream_id:
+                body["stream_id"] = stream_id
+            try:
+                response = self.post(_data.Data.base_path, json=body)
+                exceptions.raise_from_response(response)
+            except Exception as e:
+                # Report the batch instead of aborting the whole upload
+                _logger.warning(
+                    "Uploading %d records to %s failed: %s",
+                    len(records),
+                    stream_name,
+                    e,
+                )
+                error_code = getattr(e, "status_code", None) or type(e).__name__
+                failed = [
+                    dict(record, error_code=str(error_code), error_message=str(e))
+                    for record in records
+                ]
+                return sent, sent_bytes, failed
+            results = response.json().get("records", [])
+            if len(results) < len(records):
+                # The outcome of the remaining records is unknown, they are
+                # retried or reported as failed
+                _logger.warning(
+                    "Upload response of %s has %d results for %d records",
+                    stream_name,
+                    len(results),
+                    len(records),
+                )
+                results = results + [_MISSING_RESULT] * (len(records) - len(results))
+            if attempt < policy.max_retries and any(
+                status.get("error_code") for status in results
+            ):
+                delay = policy.get_delay(attempt)
+            else:
+                delay = None
+
+            failed = []
+            retry = []
+            blocked = set()
+            for record, status in zip(records, results):
+                key = _record_key(record)
+                if delay is not None and (
+                    status.get("error_code") or (key is not None and key in blocked)
+                ):
+                    if key is not None:
+                        blocked.add(key)
+                    retry.append(record)
+                elif status.get("error_code"):
+                    failed.append(dict(record, **status))
+                else:
+                    sent += 1
+                    sent_bytes += len(record["data"])
+            if not retry:
+                return sent, sent_bytes, failed
+            _logger.debug(
+                "Retrying %d rejected records of %s in %.2fs",
+                len(retry),
+                stream_name,
+                delay,
+            )
+            time.sleep(delay)
+            attempt += 1
+            records = retry
+
     def download_data(self, partititon_cursor, max_fetch_bytes=None, filename=None):
         """Download data from a DIS stream.
 
@@ -323,6 +592,192 @@ class Proxy(proxy.Proxy):
         obj = _data.Data("")
         return obj.get_data_cursor(self, **params)
 
+    def consume_records(
+        self,
+        stream_name,
+        app_name=None,
+        partitions=None,
+        cursor_type="TRIM_HORIZON",
+        max_fetch_bytes=None,
+        checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL,
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        idle_timeout=None,
+        buffer_size=DEFAULT_CONSUME_BUFFER,
+    ):
+        """Consume the records of all partitions of a stream continuously.
+
+        Every partition is read by its own thread following the
+        ``next_partition_cursor`` of the responses. Records of all
+        partitions are merged into one stream, the order is kept within a
+        partition.
+
+        With ``app_name`` reading starts after the checkpoints of the app
+        and the sequence numbers of consumed records are committed as
+        checkpoints every ``checkpoint_interval`` seconds and when the
+        iteration ends. A record counts as consumed once the next record
+        is requested, so records are delivered at least once.
+
+        :param stream_name: Name of the stream.
+        :param app_name: Name of the app whose checkpoints are used.
+            (Optional) Without an app no checkpoints are read or committed.
+        :param partitions: IDs of the partitions to read. (Optional)
+            Defaults to all readable partitions of the stream.
+        :param cursor_type: Cursor type of partitions without a checkpoint,
+            e.g. ``TRIM_HORIZON`` or ``LATEST``.
+        :param max_fetch_bytes: Maximum number of bytes fetched per request.
+        :param float checkpoint_interval: Seconds between checkpoint
+            commits.
+        :param float poll_interval: Seconds to wait before reading a
+            partition again when it returned no records.
+        :param float idle_timeout: Stop when no records were received for
+            this many seconds. (Optional) By default the stream is consumed
+            until the iteration is stopped.
+        :param int buffer_size: Number of records buffered ahead of the
+            consumer.
+
+        :returns: a generator of
+            (:class:`~otcextensions.sdk.dis.v2.data.Record`) tuples
+        """
+        if partitions is None:
+            partitions = [
+                partition["partition_id"]
+                for partition in self.get_stream(stream_name).partitions or []
+                if partition.get("status") in _READABLE_PARTITION_STATES
+            ]
+        if not partitions:
+            return
+
+        # Sequence numbers of consumed records to commit per partition
+        consumed = {}
+        committed = {}
+        next_commit = time.monotonic() + checkpoint_interval
+
+        def commit():
+            for partition_id, sequence_number in list(consumed.items()):
+                if committed.get(partition_id) == sequence_number:
+                    continue
+                self.create_checkpoint(
+                    stream_name=stream_name,
+                    app_name=app_name,
+                    partition_id=partition_id,
+                    sequence_number=sequence_number,
+                )
+                committed[partition_id] = sequence_number
+
+        records = utils.merge_producers(
+            [
+                functools.partial(
+                    self._read_partition,
+                    stream_name,
+                    app_name,
+                    partition_id,
+                    cursor_type,
+                    max_fetch_bytes,
+                    poll_interval,
+                )
+                for partition_id in partitions
+            ],
+            buffer_size=buffer_size,
+            timeout=idle_timeout,
+        )
+        try:
+            for item in records:
+                yield item
+                # The consumer asked for the next record
+                consumed[item.partition_id] = item.sequence_number
+                if app_name and time.monotonic() >= next_commit:
+                    commit()
+                    next_commit = time.monotonic() + checkpoint_interval
+        finally:
+            records.close()
+            if app_name:
+                try:
+                    commit()
+                except Exception as e:
+                    _logger.warning(
+                        "Failed to commit checkpoints of %s: %s", app_name, e
+                    )
+
+    def _read_partition(
+        self,
+        stream_name,
+        app_name,
+        partition_id,
+        cursor_type,
+        max_fetch_bytes,
+        poll_interval,
+        put,
+        stop,
+    ):
+        """Read a partition until ``stop`` is set."""
+
+        def get_cursor(params):
+            return self.get_data_cursor(
+                stream_name, partition_id, **params
+            ).partition_cursor
+
+        def after(sequence_number):
+            return {
+                "cursor-type": "AFTER_SEQUENCE_NUMBER",
+                "starting-sequence-number": sequence_number,
+            }
+
+        last = None
+        if app_name:
+            last = self._get_checkpoint_sequence(stream_name, app_name, partition_id)
+        if last is not None:
+            start = after(last)
+        else:
+            start = {"cursor-type": cursor_type}
+        started = int(time.time() * 1000)
+        cursor = get_cursor(start)
+        if start["cursor-type"] == "LATEST":
+            # A new LATEST cursor would skip the records written meanwhile,
+            # so a refresh starts at the time of the first cursor
+            start = {"cursor-type": "AT_TIMESTAMP", "timestamp": started}
+        refreshed = False
+        while cursor and not stop.is_set():
+            params = {"partition-cursor": cursor}
+            if max_fetch_bytes:
+                params["max_fetch_bytes"] = max_fetch_bytes
+            response = self.get(_data.Data.base_path, params=params)
+            if not refreshed and _is_expired_cursor(response):
+                # Cursors expire after some minutes, continue after the
+                # last record read or at the start position
+                cursor = get_cursor(after(last) if last is not None else start)
+                refreshed = True
+                continue
+            exceptions.raise_from_response(response)
+            refreshed = False
+            body = response.json()
+            cursor = body.get("next_partition_cursor")
+            records = body.get("records") or []
+            for record in records:
+                last = record.get("sequence_number")
+                if not put(
+                    _data.Record(
+                        partition_id,
+                        last,
+                        record.get("data"),
+                        record.get("timestamp"),
+                        record.get("timestamp_type"),
+                    )
+                ):
+                    return
+            if not records:
+                stop.wait(poll_interval)
+
+    def _get_checkpoint_sequence(self, stream_name, app_name, partition_id):
+        """Return the checkpointed sequence number of a partition or None"""
+        try:
+            checkpoint = self.get_checkpoint(stream_name, app_name, partition_id)
+        except exceptions.NotFoundException:
+            return None
+        sequence_number = checkpoint.sequence_number
+        if sequence_number in (None, "", "-1", -1):
+            return None
+        return str(sequence_number)
+
     # ======== Stream ========
     def create_dump_task(self, stream_name, **attrs):
         """Add OBS dump tasks.
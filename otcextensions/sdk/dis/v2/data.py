@@ -9,10 +9,17 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import collections
 
 from openstack import resource
 from openstack import utils
 
+#: A record read from a partition of a stream
+Record = collections.namedtuple(
+    "Record",
+    ["partition_id", "sequence_number", "data", "timestamp", "timestamp_type"],
+)
+
 
 class RecordSpec(resource.Resource):
     #: Data to be uploaded.
@@ -24,6 +31,12 @@ class RecordSpec(resource.Resource):
     partition_id = resource.Body("partition_id")
     #: Partition to which data is written.
     partition_key = resource.Body("partition_key")
+    #: Sequence number of the written record.
+    sequence_number = resource.Body("sequence_number")
+    #: Error code of a record which could not be written.
+    error_code = resource.Body("error_code")
+    #: Error message of a record which could not be written.
+    error_message = resource.Body("error_message")
 
 
 class Data(resource.Resource):
@@ -43,6 +56,8 @@ class Data(resource.Resource):
     allow_list = True
 
     # Properties
+    #: Number of records which could not be uploaded.
+    failed_record_count = resource.Body("failed_record_count", type=int)
     #: Partition key set when data is being uploaded.
     partition_key = resource.Body("partition_key")
     #: Sequence number of the data record.
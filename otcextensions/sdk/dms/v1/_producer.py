@@ -0,0 +1,210 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import concurrent.futures
+import json
+import threading
+import time
+
+from openstack import _log
+from openstack import exceptions
+from otcextensions.sdk.dms.v1 import message as _message
+
+_logger = _log.setup_logging("openstack")
+
+# Limits of a single send messages request
+DEFAULT_BATCH_MESSAGES = 10
+DEFAULT_BATCH_BYTES = 512 * 1024
+DEFAULT_LINGER = 0.05
+DEFAULT_MAX_IN_FLIGHT = 8
+
+
+def _message_dict(message):
+    """Return the request representation of a message"""
+    if isinstance(message, _message.Message):
+        return message.to_dict(computed=False, ignore_none=True)
+    return {k: v for k, v in message.items() if v is not None}
+
+
+class MessageProducer:
+    """Batching producer of DMS queue messages.
+
+    Messages passed to :meth:`send` are collected into batches limited by
+    count and size. A batch is sent once it is full or once its oldest
+    message waited ``linger`` seconds. Up to ``max_in_flight`` batches are
+    sent in parallel, :meth:`send` blocks while all of them are busy.
+
+    Errors of the background sends are raised by :meth:`flush` and
+    :meth:`close`. The producer is a context manager closing itself on
+    exit.
+    """
+
+    def __init__(
+        self,
+        proxy,
+        queue_id,
+        batch_messages=DEFAULT_BATCH_MESSAGES,
+        batch_bytes=DEFAULT_BATCH_BYTES,
+        linger=DEFAULT_LINGER,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    ):
+        self.queue_id = queue_id
+        self.batch_messages = batch_messages
+        self.batch_bytes = batch_bytes
+        self.linger = linger
+        #: Number of messages sent successfully
+        self.sent = 0
+        #: Number of messages of failed requests
+        self.failed = 0
+
+        self._proxy = proxy
+        self._uri = _message.Messages.base_path % {"queue_id": queue_id}
+        self._batch = []
+        self._batch_size = 0
+        self._batch_started = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._futures = set()
+        self._errors = []
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_in_flight
+        )
+        self._linger_thread = threading.Thread(target=self._linger_loop, daemon=True)
+        self._linger_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def send(self, body=None, **attrs):
+        """Queue a single message for sending.
+
+        :param body: A str/json object representing message body
+        :param dict attrs: Additional message attributes
+        """
+        attrs["body"] = body
+        self.send_messages([attrs])
+
+    def send_messages(self, messages):
+        """Queue messages for sending.
+
+        :param list messages: A list of message dictionaries or instances of
+            :class:`~otcextensions.sdk.dms.v1.message.Message`
+        """
+        for message in messages:
+            message = _message_dict(message)
+            size = len(json.dumps(message))
+            with self._cond:
+                if self._closed:
+                    raise exceptions.SDKException("Message producer is closed")
+                if self._batch and (
+                    len(self._batch) >= self.batch_messages
+                    or self._batch_size + size > self.batch_bytes
+                ):
+                    self._submit_batch()
+                if not self._batch:
+                    self._batch_started = time.monotonic()
+                    self._cond.notify()
+                self._batch.append(message)
+                self._batch_size += size
+
+    def flush(self):
+        """Send all queued messages and wait for the requests in flight.
+
+        :raises: The first error of a failed request since the last flush.
+        """
+        with self._cond:
+            self._submit_batch()
+        with self._lock:
+            futures = list(self._futures)
+        concurrent.futures.wait(futures)
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        """Flush the queued messages and stop the producer."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._linger_thread.join()
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown(wait=False)
+            _logger.debug(
+                "Message producer of queue %s sent %d messages, %d failed",
+                self.queue_id,
+                self.sent,
+                self.failed,
+            )
+
+    def _submit_batch(self):
+        # Must be called with self._cond held, so that a batch is in
+        # self._futures as soon as it left self._batch
+        batch, self._batch = self._batch, []
+        self._batch_size = 0
+        self._batch_started = None
+        if not batch:
+            return
+        # Block while all request slots are in use
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._send_batch, batch)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._batch_done)
+
+    def _linger_loop(self):
+        with self._cond:
+            while not self._closed:
+                if self._batch_started is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._batch_started + self.linger - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                else:
+                    self._submit_batch()
+
+    def _send_batch(self, batch):
+        try:
+            response = self._proxy.post(
+                self._uri, json={"messages": batch, "returnId": False}
+            )
+            exceptions.raise_from_response(response)
+        except Exception:
+            with self._lock:
+                self.failed += len(batch)
+            raise
+        with self._lock:
+            self.sent += len(batch)
+
+    def _batch_done(self, future):
+        self._slots.release()
+        with self._lock:
+            self._futures.discard(future)
+            error = future.exception()
+            if error is not None:
+                _logger.warning(
+                    "Sending messages to queue %s failed: %s", self.queue_id, error
+                )
+                self._errors.append(error)
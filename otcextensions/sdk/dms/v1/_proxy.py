@@ -10,9 +10,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import concurrent.futures
+import time
+
+from openstack import _log
 from openstack import exceptions
 from openstack import proxy
 from openstack import resource
+from otcextensions.sdk.dms.v1 import _producer
 from otcextensions.sdk.dms.v1 import az as _az
 from otcextensions.sdk.dms.v1 import group as _group
 from otcextensions.sdk.dms.v1 import instance as _instance
@@ -22,6 +27,11 @@ from otcextensions.sdk.dms.v1 import product as _product
 from otcextensions.sdk.dms.v1 import queue as _queue
 from otcextensions.sdk.dms.v1 import topic as _topic
 
+_logger = _log.setup_logging("openstack")
+
+DEFAULT_CONSUME_MESSAGES = 10
+DEFAULT_POLL_INTERVAL = 1.0
+
 
 class Proxy(proxy.Proxy):
 
@@ -234,6 +244,135 @@ class Proxy(proxy.Proxy):
 
         return group_obj.ack(self, queue_obj, messages, status=status)
 
+    def message_producer(
+        self,
+        queue,
+        batch_messages=_producer.DEFAULT_BATCH_MESSAGES,
+        batch_bytes=_producer.DEFAULT_BATCH_BYTES,
+        linger=_producer.DEFAULT_LINGER,
+        max_in_flight=_producer.DEFAULT_MAX_IN_FLIGHT,
+    ):
+        """Create a batching producer of messages for a given queue
+
+        The queue is resolved once. Messages are sent in batches of up to
+        ``batch_messages`` messages and ``batch_bytes`` bytes, a batch
+        which is not full is sent after ``linger`` seconds. Up to
+        ``max_in_flight`` batches are sent in parallel.
+
+        :param queue: The queue id or an instance of
+            :class:`~otcextensions.sdk.dms.v1.queue.Queue`
+        :param int batch_messages: Maximum number of messages per request.
+        :param int batch_bytes: Maximum size of the messages per request.
+        :param float linger: Maximum time in seconds a message waits for
+            its batch to fill.
+        :param int max_in_flight: Number of requests sent in parallel.
+        :returns: A producer to be closed after use, also usable as
+            a context manager
+            :class:`~otcextensions.sdk.dms.v1._producer.MessageProducer`
+        """
+        queue_obj = self._get_resource(_queue.Queue, queue)
+        return _producer.MessageProducer(
+            self,
+            queue_obj.id,
+            batch_messages=batch_messages,
+            batch_bytes=batch_bytes,
+            linger=linger,
+            max_in_flight=max_in_flight,
+        )
+
+    def consume_messages(
+        self,
+        queue,
+        group,
+        max_msgs=DEFAULT_CONSUME_MESSAGES,
+        time_wait=None,
+        ack_wait=None,
+        status="success",
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        idle_timeout=None,
+    ):
+        """Continuously consume and acknowledge queue's messages
+
+        Queue and group are resolved once. Once all messages of a batch
+        were processed by the caller, they are acknowledged while the
+        next batch is already being fetched. A message is considered to be
+        processed when the next one is requested, so messages not processed
+        when the consumer is closed are delivered again after ``ack_wait``.
+
+        :param queue: The queue id or an instance of
+          :class:`~otcextensions.sdk.dms.v1.queue.Queue`
+        :param group: The consume group id or an instance of
+          :class:`~otcextensions.sdk.dms.v1.group.Group`
+        :param int max_msgs: Maximum number of messages per request.
+        :param int time_wait: Time in seconds the service waits for
+          messages when the queue is empty.
+        :param int ack_wait: Time in seconds to acknowledge a message before
+          it is delivered again.
+        :param status: The status the messages are acknowledged with.
+        :param float poll_interval: Pause in seconds after an empty batch.
+        :param float idle_timeout: Stop after no message was received for
+          the given number of seconds. Runs until closed by default.
+        :returns: A generator of
+          :class:`~otcextensions.sdk.dms.v1.message.Message` objects
+        """
+        queue_obj = self._get_resource(_queue.Queue, queue)
+        group_obj = self._get_resource(_group.Group, group)
+        uri = _message.Message.base_path % {
+            "queue_id": queue_obj.id,
+            "group_id": group_obj.id,
+        }
+        query = {"max_msgs": max_msgs}
+        if time_wait is not None:
+            query["time_wait"] = time_wait
+        if ack_wait is not None:
+            query["ack_wait"] = ack_wait
+
+        def ack(handlers):
+            group_obj.ack(self, queue_obj, handlers, status=status)
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        acking = None
+        handlers = []
+        last_message = time.monotonic()
+        try:
+            fetching = executor.submit(self._fetch_messages, uri, query)
+            while True:
+                messages = fetching.result()
+                if messages:
+                    last_message = time.monotonic()
+                elif (
+                    idle_timeout is not None
+                    and time.monotonic() - last_message >= idle_timeout
+                ):
+                    return
+                else:
+                    time.sleep(poll_interval)
+                for message in messages:
+                    yield message
+                    handlers.append(message.id)
+                # The whole batch is processed, acknowledge it while
+                # fetching the next one
+                if acking is not None:
+                    acking.result()
+                    acking = None
+                fetching = executor.submit(self._fetch_messages, uri, query)
+                if handlers:
+                    acking = executor.submit(ack, handlers)
+                    handlers = []
+        finally:
+            try:
+                if acking is not None:
+                    acking.result()
+                if handlers:
+                    ack(handlers)
+            finally:
+                executor.shutdown(wait=False)
+
+    def _fetch_messages(self, uri, query):
+        """Fetch a single batch of messages"""
+        response = self.get(uri, headers={"Accept": "application/json"}, params=query)
+        return _message.Message._from_response(response)
+
     # ======== Instances =======
     def instances(self, **kwargs):
         """List all DMS Instances
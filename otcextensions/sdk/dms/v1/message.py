@@ -69,27 +69,37 @@ class Message(resource.Resource):
                 params=query_params.copy(),
                 microversion=microversion,
             )
-            exceptions.raise_from_response(response)
-            data = response.json()
-            resources = data
-
-            if not isinstance(resources, list):
-                resources = [resources]
-
-            for raw_resource in resources:
-                attrs = raw_resource.pop("message")
-                handler = raw_resource.pop("handler")
-                value = cls.existing(
-                    microversion=microversion,
-                    connection=session._get_connection(),
-                    id=handler,
-                    **attrs
-                )
-                yield value
+            resources = cls._from_response(
+                response,
+                microversion=microversion,
+                connection=session._get_connection(),
+            )
+            yield from resources
 
             if not resources:
                 return
 
+    @classmethod
+    def _from_response(cls, response, **kwargs):
+        """Return the messages of a consume response.
+
+        :param response: The response of a consume request.
+        :param dict kwargs: Additional arguments of
+            :meth:`~openstack.resource.Resource.existing`.
+
+        :returns: A list of :class:`Message` instances.
+        """
+        exceptions.raise_from_response(response)
+        resources = response.json()
+        if not isinstance(resources, list):
+            resources = [resources]
+        return [
+            cls.existing(
+                id=raw_resource["handler"], **kwargs, **raw_resource["message"]
+            )
+            for raw_resource in resources
+        ]
+
 
 class Messages(resource.Resource):
 
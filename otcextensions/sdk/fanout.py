@@ -0,0 +1,149 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+import copy
+import functools
+
+from openstack.config import cloud_region as cloud_region_mod
+
+import openstack
+from openstack import _log
+from openstack import connection
+from otcextensions import sdk
+from otcextensions.common import utils
+
+_logger = _log.setup_logging("openstack")
+
+DEFAULT_MAX_WORKERS = 8
+# Number of listed resources buffered ahead of the consumer
+DEFAULT_BUFFER = 10000
+
+FanoutResult = collections.namedtuple(
+    "FanoutResult", ["region_name", "project", "resource"]
+)
+
+
+def connect(conn, region_name=None, **auth):
+    """Create a connection to another region or project of the same cloud.
+
+    Works like :meth:`~openstack.connection.Connection.connect_as`, but
+    also allows to switch the region. Endpoint overrides computed for the
+    OTC services of ``conn`` are dropped and the OTC services are registered
+    lazily in the new connection.
+
+    :param conn: The connection to take the settings from.
+    :param str region_name: Region of the new connection. (Optional)
+        Defaults to the region of ``conn``.
+    :param auth: Auth settings to override, e.g. ``project_name``.
+
+    :returns: A new :class:`~openstack.connection.Connection`.
+    """
+    # The settings of conn are complete, so neither clouds.yaml nor the
+    # environment are read again
+    config = openstack.config.OpenStackConfig(
+        load_yaml_config=False, load_envvars=False
+    )
+    known = getattr(conn, "_otc_config_keys", set(conn.config.config))
+    params = copy.deepcopy(conn.config.config)
+    params.pop("profile", None)
+    for key in sdk._endpoint_overrides(conn, known):
+        params.pop(key, None)
+    # Setting either the name or the id replaces both of them
+    for prefix, entity_name in (("user", "username"), ("project", "project_name")):
+        for id_key, name_key in (
+            ("%s_id" % prefix, entity_name),
+            ("%s_domain_id" % prefix, "%s_domain_name" % prefix),
+        ):
+            if id_key in auth or name_key in auth:
+                params["auth"].pop(id_key, None)
+                params["auth"].pop(name_key, None)
+    params["auth"].update(auth)
+    if region_name:
+        params["region_name"] = region_name
+
+    cloud_region = config.get_one(**params)
+    # Keep the cloud name, it is used for logging and the connection cache
+    cloud_region = cloud_region_mod.CloudRegion(
+        name=conn.name,
+        region_name=cloud_region.region_name,
+        config=cloud_region.config,
+        auth_plugin=cloud_region.get_auth(),
+        openstack_config=config,
+    )
+    new_conn = connection.Connection(config=cloud_region)
+    sdk.load(new_conn, lazy=True)
+    return new_conn
+
+
+def list_resources(
+    conn, method, targets, max_workers=DEFAULT_MAX_WORKERS, ignore_errors=False, **query
+):
+    """Run a proxy listing in several regions and projects concurrently.
+
+    The resources of all targets are merged into one stream in the order
+    they are listed.
+
+    .. code-block:: python
+
+        targets = [
+            {"region_name": "eu-de", "project_name": "eu-de_prod"},
+            {"region_name": "eu-nl", "project_name": "eu-nl_prod"},
+        ]
+        for item in fanout.list_resources(conn, "rds.instances", targets):
+            print(item.region_name, item.project, item.resource.name)
+
+    :param conn: The connection to take the settings from.
+    :param str method: Listing method of a proxy as
+        ``<service>.<method>``, e.g. ``"cce.clusters"``.
+    :param targets: Regions and projects to list, each either a dict of
+        :func:`connect` arguments, a project name or an established
+        :class:`~openstack.connection.Connection`.
+    :param int max_workers: Number of targets listed at the same time.
+    :param bool ignore_errors: When set to ``True`` failing targets are
+        logged and skipped, otherwise the first error is raised.
+    :param query: Arguments passed to the listing method.
+
+    :rtype: A generator of :class:`FanoutResult` tuples of region name,
+        project and resource.
+    """
+    service, _, method_name = method.rpartition(".")
+    targets = list(targets)
+
+    def on_error(index, error):
+        if not ignore_errors:
+            raise error
+        _logger.warning("Listing %s failed: %s", method, error)
+
+    return utils.merge_producers(
+        [
+            functools.partial(_list_target, conn, target, service, method_name, query)
+            for target in targets
+        ],
+        max_workers=max_workers,
+        buffer_size=DEFAULT_BUFFER,
+        on_error=on_error,
+    )
+
+
+def _list_target(conn, target, service, method_name, query, put, stop):
+    """List the resources of one target."""
+    if isinstance(target, str):
+        target = {"project_name": target}
+    if not isinstance(target, connection.Connection):
+        target = connect(conn, **target)
+    auth = target.config.config.get("auth", {})
+    project = auth.get("project_name") or target.current_project_id
+    region_name = target.config.region_name
+    listing = getattr(getattr(target, service), method_name)
+    for resource in listing(**query):
+        if not put(FanoutResult(region_name, project, resource)):
+            break
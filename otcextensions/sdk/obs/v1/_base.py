@@ -9,7 +9,8 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
-
+import itertools
+import xml.etree.ElementTree as ET
 from collections import defaultdict
 
 from openstack import _log
@@ -17,6 +18,8 @@ from otcextensions.sdk import sdk_resource
 
 _logger = _log.setup_logging("openstack")
 
+XML_CHUNK_SIZE = 65536
+
 
 class BaseResource(sdk_resource.Resource):
     OBS_NS = "http://obs.otc.t-systems.com/doc/2016-01-01/"
@@ -45,3 +48,58 @@ class BaseResource(sdk_resource.Resource):
             else:
                 d[t.tag] = text
         return d
+
+    @classmethod
+    def element_to_attrs(cls, element):
+        """Convert a flat resource element into resource attributes.
+
+        Only nested children are converted with :meth:`etree_to_dict`, the
+        values of leaf elements are taken over directly.
+        """
+        attrs = {}
+        for child in element:
+            if len(child) or child.attrib:
+                attrs.update(cls.etree_to_dict(child))
+                continue
+            tag = child.tag.rsplit("}", 1)[-1]
+            # strip spaces and quotes
+            attrs[tag] = child.text.strip(' "') if child.text else None
+        return attrs
+
+    @classmethod
+    def iter_response_elements(
+        cls, response, root_tag, depth=1, chunk_size=XML_CHUNK_SIZE
+    ):
+        """Incrementally parse a streamed XML response.
+
+        The response body is fed into a pull parser chunk by chunk and every
+        element completed ``depth`` levels below the root is yielded. Yielded
+        elements are detached from the tree afterwards, so memory usage does
+        not grow with the size of the document.
+
+        :param response: A response requested with ``stream=True``.
+        :param root_tag: Expected local name of the root element, used to
+            detect the namespace of the response.
+        """
+        parser = ET.XMLPullParser(events=("start", "end"))
+        stack = []
+        for chunk in itertools.chain(
+            response.iter_content(chunk_size=chunk_size), [None]
+        ):
+            if chunk is None:
+                parser.close()
+            else:
+                parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == "start":
+                    if not stack and element.tag != ET.QName(cls.OBS_NS, root_tag):
+                        _logger.warning(
+                            "Namespace in the response does not match expectation"
+                        )
+                        cls.OBS_NS = element.tag.split("}", 1)[0][1:]
+                    stack.append(element)
+                    continue
+                stack.pop()
+                if len(stack) == depth:
+                    yield element
+                    stack[-1].remove(element)
@@ -0,0 +1,86 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import json
+import os
+import threading
+
+from openstack import _log
+
+_logger = _log.setup_logging("openstack")
+
+
+class UploadCheckpoint:
+    """Local journal of a resumable multipart upload.
+
+    The journal is a small JSON file holding the upload id, attributes
+    identifying the uploaded source and the ETags of already uploaded
+    parts. It is rewritten atomically after every change.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        self._lock = threading.Lock()
+
+    @property
+    def upload_id(self):
+        return self.data.get("upload_id")
+
+    @property
+    def parts(self):
+        return {int(k): v for k, v in self.data.get("parts", {}).items()}
+
+    def load(self, **attrs):
+        """Load the journal if it belongs to the given source attributes.
+
+        :returns: ``True`` if a matching journal was loaded.
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError:
+            _logger.warning("Ignoring corrupted upload checkpoint %s", self.path)
+            return False
+        if not data.get("upload_id") or any(data.get(k) != v for k, v in attrs.items()):
+            _logger.debug("Upload checkpoint %s does not match the source", self.path)
+            return False
+        self.data = data
+        return True
+
+    def start(self, upload_id, **attrs):
+        """Start a new journal for the given upload."""
+        with self._lock:
+            self.data = dict(attrs, upload_id=upload_id, parts={})
+            self._save()
+
+    def add_part(self, part_number, etag):
+        """Record a successfully uploaded part."""
+        with self._lock:
+            self.data.setdefault("parts", {})[str(part_number)] = etag
+            self._save()
+
+    def remove(self):
+        """Remove the journal once the upload is completed."""
+        with self._lock:
+            self.data = {}
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
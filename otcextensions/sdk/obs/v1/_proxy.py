@@ -9,11 +9,17 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import concurrent.futures
+import functools
 import io
+import itertools
 import os
+import stat
+import threading
 from urllib import parse
 from urllib.parse import urlsplit
 
+import iso8601
 from urllib3.exceptions import LocationParseError
 
 from openstack import exceptions
@@ -22,11 +28,18 @@ from otcextensions.common import utils
 from otcextensions.common.utils import extract_region_from_url
 from otcextensions.sdk import ak_auth
 from otcextensions.sdk import sdk_proxy
+from otcextensions.sdk.obs.v1 import _checkpoint
 from otcextensions.sdk.obs.v1 import container as _container
 from otcextensions.sdk.obs.v1 import obj as _obj
 
 DEFAULT_OBJECT_SEGMENT_SIZE = 1073741824  # 1GB
 DEFAULT_MAX_FILE_SIZE = int((5 * 1024 * 1024 * 1024 + 2) / 2)
+DEFAULT_DOWNLOAD_PART_SIZE = 67108864  # 64MB
+DEFAULT_UPLOAD_CONCURRENCY = 4
+DEFAULT_DOWNLOAD_CHUNK_SIZE = 1048576  # 1MB
+DEFAULT_DELETE_BATCH_SIZE = 1000  # Maximum keys per multi-object delete
+DEFAULT_LIST_SHARDS = 8
+DEFAULT_LIST_BUFFER = 10000  # Objects buffered per listing shard
 EXPIRES_ISO8601_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 SHORT_EXPIRES_ISO8601_FORMAT = "%Y-%m-%d"
 
@@ -35,6 +48,24 @@ def _normalize_obs_keys(obj):
     return {k.lower(): v for k, v in obj.items()}
 
 
+_pwrite_lock = threading.Lock()
+
+
+def _pwrite(fd, data, offset):
+    """Write data into the file descriptor at the given offset."""
+    if hasattr(os, "pwrite"):
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+        return
+    # Platforms without pwrite (Windows) share the file position
+    with _pwrite_lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
 class Proxy(sdk_proxy.Proxy):
     skip_discovery = True
 
@@ -241,7 +272,9 @@ class Proxy(sdk_proxy.Proxy):
         :type container:
             :class:`~otcextensions.sdk.obs.v1.container.Container`
         :param kwargs query: Optional query parameters to be sent to limit
-                               the resources being returned.
+                               the resources being returned. Pass
+                               ``prefetch=True`` to request the next page in
+                               the background.
 
         :rtype: A generator of
             :class:`~otcextensions.sdk.obs.v1.obj.Object` objects.
@@ -255,6 +288,85 @@ class Proxy(sdk_proxy.Proxy):
             **query,
         )
 
+    def objects_parallel(
+        self,
+        container,
+        shards=DEFAULT_LIST_SHARDS,
+        split_points=None,
+        ordered=True,
+        prefix=None,
+        delimiter="/",
+        max_concurrency=None,
+    ):
+        """Return a generator listing the Container's objects in parallel.
+
+        The key space is split into disjoint lexicographic ranges which are
+        listed concurrently. Unless ``split_points`` are given, the ranges
+        are derived from the common prefixes of the keys below ``prefix``,
+        so keys should be structured with ``delimiter``. Without common
+        prefixes the container is listed serially.
+
+        :param container: A container object or the name of a container
+            that you want to retrieve objects from.
+        :param int shards: Maximum number of ranges to list in parallel.
+        :param split_points: Keys at which the key space is split.
+            (Optional) Each range ends with and includes its split point.
+        :param bool ordered: When set to ``True`` the objects are returned
+            in lexicographic order, otherwise in the order they are listed.
+        :param prefix: Only list objects whose name starts with the prefix.
+        :param delimiter: Delimiter used to discover the key space.
+        :param int max_concurrency: Number of ranges listed at the same
+            time. Defaults to ``shards``.
+
+        :rtype: A generator of
+            :class:`~otcextensions.sdk.obs.v1.obj.Object` objects.
+        """
+        container = self._get_container_name(container=container)
+        if split_points is None:
+            split_points = self._discover_split_points(
+                container, shards, prefix, delimiter
+            )
+        bounds = [None] + sorted(set(split_points)) + [None]
+        producers = [
+            functools.partial(self._list_range, container, prefix, start, end)
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        yield from utils.merge_producers(
+            producers,
+            max_workers=max_concurrency,
+            ordered=ordered,
+            buffer_size=DEFAULT_LIST_BUFFER,
+        )
+
+    def _discover_split_points(self, container, shards, prefix, delimiter):
+        """Pick up to ``shards - 1`` evenly spread common prefixes."""
+        if shards < 2:
+            return []
+        endpoint = self.get_container_endpoint(container)
+        prefixes = _obj.Object.list_common_prefixes(
+            self,
+            endpoint_override=endpoint,
+            requests_auth=self._get_req_auth(endpoint),
+            prefix=prefix,
+            delimiter=delimiter,
+        )
+        if len(prefixes) < 2:
+            # Nothing to split, list the container serially
+            return []
+        step = len(prefixes) / shards
+        return sorted({prefixes[int(i * step)] for i in range(1, shards)})
+
+    def _list_range(self, container, prefix, start, end, put, stop):
+        """List the objects after ``start`` up to and including ``end``."""
+        query = {"prefix": prefix} if prefix else {}
+        if start is not None:
+            query["marker"] = start
+        for obj in self.objects(container, **query):
+            if end is not None and obj.name > end:
+                break
+            if not put(obj):
+                break
+
     def _get_container_name(self, obj=None, container=None):
         if obj is not None:
             obj = self._get_resource(_obj.Object, obj)
@@ -291,7 +403,15 @@ class Proxy(sdk_proxy.Proxy):
             requests_auth=self._get_req_auth(endpoint),
         )
 
-    def download_object(self, obj, container=None, **attrs):
+    def download_object(
+        self,
+        obj,
+        container=None,
+        parallel=False,
+        part_size=None,
+        max_retries=3,
+        **attrs,
+    ):
         """Download the data contained inside an object.
 
         :param obj: The value can be the name of an object or a
@@ -299,47 +419,175 @@ class Proxy(sdk_proxy.Proxy):
         :param container: The value can be the name of a container or a
                :class:`~otcextensions.sdk.obs.v1.container.Container`
                instance.
+        :param file: Path of the target file. In the sequential mode this
+            can also be a writable file-like object. Required in parallel
+            mode.
+        :param bool parallel: When set to ``True`` the object is split into
+            byte ranges which are fetched concurrently and written directly
+            at their offsets into a preallocated file.
+        :param int part_size: Size of a single byte range in parallel mode.
+            (Optional) Defaults to 64MB.
+        :param int max_retries: Number of attempts for every byte range in
+            parallel mode. A failed range is resumed from the last byte
+            written.
 
         :raises: :class:`~openstack.exceptions.ResourceNotFound`
                  when no resource can be found.
         """
         container_name = self._get_container_name(obj=obj, container=container)
         endpoint = self.get_container_endpoint(container_name)
+        filename = attrs.pop("file", None)
+        if parallel and filename is None:
+            raise ValueError("file is required for a parallel download")
+        if filename is None:
+            filename = "-"
         obj = self._get_resource(_obj.Object, obj, container=container_name, **attrs)
+        if parallel:
+            return self._download_large_object(
+                obj,
+                endpoint,
+                filename,
+                part_size or DEFAULT_DOWNLOAD_PART_SIZE,
+                max_retries,
+            )
         return obj.download(
             self,
             endpoint_override=endpoint,
             requests_auth=self._get_req_auth(endpoint),
-            filename=attrs.pop("file", "-"),
+            filename=filename,
         )
 
-    def stream_object(self, obj, container=None, chunk_size=1024, **attrs):
+    def _download_large_object(self, obj, endpoint, filename, part_size, max_retries):
+        """Download an object in parallel byte ranges.
+
+        The object size and ETag are taken from a HEAD request. Every range
+        is requested with ``If-Match`` so that a concurrent overwrite of the
+        object fails the download instead of producing a mixed file. The
+        first failed range stops the other ranges and the incomplete file is
+        removed.
+        """
+        obj = self.get_object_metadata(obj, obj.container)
+        size = obj.object_size or 0
+        etag = obj.etag
+        requests_auth = self._get_req_auth(endpoint)
+        stop = threading.Event()
+
+        fd = os.open(filename, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        part_futures = []
+        completed = False
+        try:
+            os.ftruncate(fd, size)
+            for start in range(0, size, part_size):
+                end = min(start + part_size, size) - 1
+                part_futures.append(
+                    self._connection._pool_executor.submit(
+                        self._download_part,
+                        obj,
+                        fd,
+                        start,
+                        end,
+                        endpoint,
+                        requests_auth,
+                        etag,
+                        max_retries,
+                        stop,
+                    )
+                )
+            concurrent.futures.wait(
+                part_futures, return_when=concurrent.futures.FIRST_EXCEPTION
+            )
+            for part_future in part_futures:
+                if part_future.done():
+                    part_future.result()
+            completed = True
+        finally:
+            if not completed:
+                stop.set()
+                for part_future in part_futures:
+                    part_future.cancel()
+            # Every part has to be finished before the descriptor is closed
+            concurrent.futures.wait(part_futures)
+            os.close(fd)
+            if not completed:
+                # Do not leave a file of the full size with holes behind
+                try:
+                    os.remove(filename)
+                except OSError:
+                    self.log.debug("Failed to remove %s", filename, exc_info=True)
+
+    def _download_part(
+        self, obj, fd, start, end, endpoint, requests_auth, etag, max_retries, stop
+    ):
+        offset = start
+        retries = max_retries
+        while True:
+            try:
+                headers = {"If-Match": etag} if etag else None
+                for chunk in obj.stream(
+                    self,
+                    chunk_size=DEFAULT_DOWNLOAD_CHUNK_SIZE,
+                    start=offset,
+                    end=end,
+                    endpoint_override=endpoint,
+                    requests_auth=requests_auth,
+                    headers=headers,
+                ):
+                    if stop.is_set():
+                        # Another range failed, the download is abandoned
+                        return offset - start
+                    _pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+                if offset <= end:
+                    raise exceptions.SDKException(
+                        "Incomplete range bytes=%d-%d of %s" % (start, end, obj.name)
+                    )
+                return offset - start
+            except Exception as e:
+                if getattr(e, "status_code", None) == 412:
+                    # The object was overwritten since the download started,
+                    # resuming would mix data of both versions
+                    raise exceptions.SDKException(
+                        "Object %s changed during the download" % obj.name
+                    ) from e
+                retries -= 1
+                if retries <= 0 or stop.is_set():
+                    raise
+                self.log.debug("Resuming download of %s from byte %d", obj.name, offset)
+
+    def stream_object(
+        self, obj, container=None, chunk_size=1024, start=None, end=None, **attrs
+    ):
         """Stream the data contained inside an object.
 
+        The body is read from the connection lazily, so only a single chunk
+        is held in memory at a time. The request is sent when the returned
+        iterator is first consumed.
+
         :param obj: The value can be the name of an object or a
                        :class:`~otcextensions.sdk.obs.v1.obj.Object` instance.
         :param container: The value can be the name of a container or a
                :class:`~otcextensions.sdk.obs.v1.container.Container`
                instance.
+        :param int chunk_size: Amount of bytes yielded per iteration.
+        :param int start: Offset of the first byte to return. (Optional)
+        :param int end: Offset of the last byte (inclusive) to return.
+            (Optional) Defaults to the end of the object.
 
         :raises: :class:`~openstack.exceptions.ResourceNotFound`
                  when no resource can be found.
         :returns: An iterator that iterates over chunk_size bytes
         """
-        raise NotImplementedError
-        # container_name = self._get_container_name(
-        #     obj=obj, container=container)
-        container_name = self._get_container_name(container=container)
+        container_name = self._get_container_name(obj=obj, container=container)
         endpoint = self.get_container_endpoint(container_name)
-        obj = self._get_resource(
-            _obj.Object,
-            obj,
-            container=container_name,
+        obj = self._get_resource(_obj.Object, obj, container=container_name, **attrs)
+        return obj.stream(
+            self,
+            chunk_size=chunk_size,
+            start=start,
+            end=end,
             endpoint_override=endpoint,
             requests_auth=self._get_req_auth(endpoint),
-            **attrs,
         )
-        return obj.stream(self, chunk_size=chunk_size)
 
     def create_object(
         self,
@@ -350,6 +598,8 @@ class Proxy(sdk_proxy.Proxy):
         segment_size=None,
         md5=None,
         generate_checksums=None,
+        max_concurrency=None,
+        checkpoint_file=None,
         **headers,
     ):
         """Upload a new object from attributes
@@ -372,6 +622,19 @@ class Proxy(sdk_proxy.Proxy):
             with filename.
         :param filename: The path to the local file whose contents will be
             uploaded. Mutually exclusive with data.
+        :param int max_concurrency: Maximum number of parts of a data stream
+            (file-like object or iterable of bytes) which are read ahead and
+            uploaded in parallel. Memory used by the upload is bounded by
+            ``(max_concurrency + 1) * segment_size``. (Optional) Defaults
+            to 4.
+        :param checkpoint_file: Path of a local file journaling the
+            multipart upload of ``filename``. (Optional) When given, a failed
+            upload is not aborted and a later call with the same checkpoint
+            file resumes it, uploading only the parts missing on the server.
+            The file is removed once the upload is completed.
+
+        File hashes are cached persistently when the ``obs_hash_cache``
+        cloud config option is set to the path of a cache database.
         :param dict attrs: Keyword arguments which will be used to create
                a :class:`~otcextensions.sdk.obs.v1.obj.Object`,
                comprised of the properties on the Object class.
@@ -409,9 +672,25 @@ class Proxy(sdk_proxy.Proxy):
         if data is not None:
             data_size = self._try_get_size(data)
 
+            if data_size is None and not isinstance(data, (str, bytes)):
+                # Unknown length (pipe, socket, generator): peek the first
+                # segment to decide whether a multipart upload is required
+                segments = self._read_segments(data, segment_size)
+                first_segment = next(segments, b"")
+                if len(first_segment) < segment_size:
+                    data = first_segment
+                else:
+                    data = itertools.chain([first_segment], segments)
+                    data_size = segment_size + 1
+
             if data_size is not None and data_size > segment_size:
                 return self._upload_large_data(
-                    endpoint, data, name, headers, segment_size
+                    endpoint,
+                    data,
+                    name,
+                    headers,
+                    segment_size,
+                    max_concurrency=max_concurrency,
                 )
             else:
                 self.log.debug("uploading data to %(endpoint)s", {"endpoint": endpoint})
@@ -428,9 +707,11 @@ class Proxy(sdk_proxy.Proxy):
         file_size = os.path.getsize(filename)
 
         if generate_checksums and md5 is None:
-            md5 = utils._get_file_hashes(filename)
+            md5 = self._get_file_md5(filename)
 
-        if self.is_object_stale(container, name, filename, md5):
+        if self.is_object_stale(
+            container, name, filename, md5, segment_size=segment_size
+        ):
 
             self.log.debug(
                 "uploading %(filename)s to %(endpoint)s",
@@ -441,7 +722,13 @@ class Proxy(sdk_proxy.Proxy):
                 self._upload_object(endpoint, filename, headers, name)
             else:
                 self._upload_large_object(
-                    endpoint, filename, name, headers, file_size, segment_size
+                    endpoint,
+                    filename,
+                    name,
+                    headers,
+                    file_size,
+                    segment_size,
+                    checkpoint_file=checkpoint_file,
                 )
 
     # Backwards compat
@@ -461,13 +748,23 @@ class Proxy(sdk_proxy.Proxy):
             )
 
     def _upload_large_object(
-        self, endpoint, filename, name, headers, file_size, segment_size
+        self,
+        endpoint,
+        filename,
+        name,
+        headers,
+        file_size,
+        segment_size,
+        checkpoint_file=None,
     ):
         """
         If the object is big, we need to break it up into segments that
         are no larger than segment_size, upload each of them individually
         and then upload a manifest object. The segments can be uploaded in
         parallel, so we'll use the async feature of the TaskManager.
+
+        With ``checkpoint_file`` the upload id and the uploaded parts are
+        journaled locally, so that an interrupted upload can be resumed.
         """
 
         segment_futures = []
@@ -479,58 +776,127 @@ class Proxy(sdk_proxy.Proxy):
         if name:
             object_name = name
         requests_auth = self._get_req_auth(endpoint)
-        segments = utils._get_file_segments(endpoint, filename, file_size, segment_size)
-
-        upload_id = _obj.Object.initiate_multipart_upload(
-            self, endpoint, object_name, requests_auth=requests_auth
-        )
         url = f"{endpoint}/{object_name}"
-        # Schedule the segments for upload
-        for name, segment in segments.items():
-            part_number = name.rsplit("/", 1)[-1]
-            # Async call to put - schedules execution and returns a future
-            segment_future = self._connection._pool_executor.submit(
-                self.put,
-                f"{url}?partNumber={part_number}&uploadId={upload_id}",
-                headers=headers,
-                data=segment,
-                requests_auth=requests_auth,
-                raise_exc=False,
+
+        checkpoint = None
+        upload_id = None
+        committed = {}
+        if checkpoint_file:
+            checkpoint = _checkpoint.UploadCheckpoint(checkpoint_file)
+            # Attributes identifying the source of the journaled upload
+            source = dict(
+                url=url,
+                file_size=file_size,
+                mtime_ns=os.stat(filename).st_mtime_ns,
+                segment_size=segment_size,
             )
-            segment_futures.append(segment_future)
-            # dict. Then sort the list of dicts by path.
-            manifest.append(
-                dict(path="/{name}".format(name=name), size_bytes=segment.length)
+            upload_id, committed = self._resume_multipart_upload(
+                checkpoint, source, requests_auth
             )
 
-        segment_results, retry_results = self._connection._wait_for_futures(
-            segment_futures, raise_on_error=False
-        )
+        if not upload_id:
+            upload_id = _obj.Object.initiate_multipart_upload(
+                self, endpoint, object_name, requests_auth=requests_auth
+            )
+            if checkpoint:
+                checkpoint.start(upload_id, **source)
 
-        for result in retry_results:
-            # Grab the FileSegment for the failed upload so we can retry
-            name = self._object_name_from_url(result.url)
-            segment = segments[name]
-            segment.seek(0)
-            # Async call to put - schedules execution and returns a future
-            segment_future = self._connection._pool_executor.submit(
-                self.put,
-                f"{url}?partNumber={name[-1]}&uploadId={upload_id}",
-                headers=headers,
-                data=segment,
-                requests_auth=requests_auth,
+        segments = utils._get_file_segments(endpoint, filename, file_size, segment_size)
+        part_segments = {}
+        # ETags of the uploaded parts by part number. The part list used to
+        # complete the upload is built here, as ListParts returns at most
+        # 1000 parts per page
+        part_etags = {}
+        future_parts = {}
+        try:
+            # Schedule the segments for upload
+            for name, segment in segments.items():
+                part_number = name.rsplit("/", 1)[-1]
+                part = committed.get(int(part_number))
+                if part and int(part.get("Size", -1)) == segment.length:
+                    self.log.debug(
+                        "Part %s of %s is already uploaded", part_number, upload_id
+                    )
+                    part_etags[int(part_number)] = part["ETag"]
+                    continue
+                part_url = f"{url}?partNumber={part_number}&uploadId={upload_id}"
+                part_segments[part_url] = (part_number, segment)
+                # Async call to put - schedules execution and returns a future
+                segment_future = self._connection._pool_executor.submit(
+                    self._upload_segment,
+                    part_url,
+                    headers,
+                    segment,
+                    requests_auth,
+                    checkpoint=checkpoint,
+                    part_number=part_number,
+                    raise_exc=False,
+                )
+                segment_futures.append(segment_future)
+                future_parts[segment_future] = int(part_number)
+                # dict. Then sort the list of dicts by path.
+                manifest.append(
+                    dict(path="/{name}".format(name=name), size_bytes=segment.length)
+                )
+
+            segment_results, retry_results = self._connection._wait_for_futures(
+                segment_futures, raise_on_error=False
             )
-            # dict. Then sort the list of dicts by path.
-            retry_futures.append(segment_future)
 
-        # If any segments fail the second time, just throw the error
-        segment_results, retry_results = self._connection._wait_for_futures(
-            retry_futures, raise_on_error=True
-        )
+            for result in retry_results:
+                # Grab the FileSegment for the failed upload so we can retry
+                part_number, segment = part_segments[result.url]
+                # Async call to put - schedules execution and returns a future
+                segment_future = self._connection._pool_executor.submit(
+                    self._upload_segment,
+                    result.url,
+                    headers,
+                    segment,
+                    requests_auth,
+                    checkpoint=checkpoint,
+                    part_number=part_number,
+                )
+                # dict. Then sort the list of dicts by path.
+                retry_futures.append(segment_future)
+                future_parts[segment_future] = int(part_number)
 
+            # If any segments fail the second time, just throw the error
+            segment_results, retry_results = self._connection._wait_for_futures(
+                retry_futures, raise_on_error=True
+            )
+            for future, part_number in future_parts.items():
+                if future.exception() is not None:
+                    continue
+                response = future.result()
+                etag = response.headers.get("ETag")
+                if response.status_code < 400 and etag:
+                    part_etags[part_number] = etag
+        finally:
+            for segment in segments.values():
+                segment.close()
+
+        parts = [
+            {"PartNumber": str(part_number), "ETag": part_etags[part_number]}
+            for part_number in sorted(part_etags)
+        ]
         try:
-            return self._finish_large_object_upload(url, headers, upload_id)
+            if len(parts) != len(segments):
+                raise exceptions.SDKException(
+                    "Only %d of %d parts of %s were uploaded"
+                    % (len(parts), len(segments), upload_id)
+                )
+            result = self._finish_large_object_upload(
+                url, headers, upload_id, parts=parts
+            )
         except Exception:
+            if checkpoint:
+                self.log.debug(
+                    "Failed to complete large object upload %s, it can be "
+                    "resumed using %s",
+                    upload_id,
+                    checkpoint.path,
+                )
+                raise
             try:
                 self.log.debug(
                     "Failed to upload large object for %s. " "Aborting uploads.",
@@ -540,32 +906,105 @@ class Proxy(sdk_proxy.Proxy):
             except Exception:
                 self.log.exception("Failed to cleanup image objects for %s:", upload_id)
             raise
+        if checkpoint:
+            checkpoint.remove()
+        return result
+
+    def _resume_multipart_upload(self, checkpoint, source, requests_auth):
+        """Find a multipart upload to be resumed from the checkpoint.
+
+        :param checkpoint: The upload journal.
+        :param dict source: Attributes identifying the uploaded source. Has
+            to contain the ``url`` of the object.
+
+        :returns: A tuple of the upload id (or ``None`` if there is nothing
+            to resume) and a dict of parts already committed on the server
+            keyed by the part number.
+        """
+        if not checkpoint.load(**source):
+            return None, {}
+        upload_id = checkpoint.upload_id
+        try:
+            committed = self._list_committed_parts(
+                source["url"], upload_id, requests_auth
+            )
+        except exceptions.ResourceNotFound:
+            self.log.debug("Multipart upload %s can not be resumed", upload_id)
+            return None, {}
+        self.log.debug(
+            "Resuming multipart upload %s with %d committed parts",
+            upload_id,
+            len(committed),
+        )
+        return upload_id, committed
+
+    def _list_committed_parts(self, url, upload_id, requests_auth):
+        """List all parts of a multipart upload following the part marker."""
+        parts = {}
+        endpoint = f"{url}?uploadId={upload_id}"
+        while True:
+            result = _obj.Object.get_parts(self, endpoint, requests_auth)
+            if "UploadId" not in result:
+                raise exceptions.ResourceNotFound(
+                    "Multipart upload %s not found" % upload_id
+                )
+            for part in result.get("Parts", []):
+                parts[int(part["PartNumber"])] = part
+            if result.get("IsTruncated") != "true":
+                return parts
+            endpoint = (
+                f"{url}?uploadId={upload_id}"
+                f"&part-number-marker={result['NextPartNumberMarker']}"
+            )
+
+    def _upload_segment(
+        self,
+        url,
+        headers,
+        segment,
+        requests_auth,
+        checkpoint=None,
+        part_number=None,
+        **kwargs,
+    ):
+        """Upload a single part of a multipart upload.
+
+        Content-MD5 of the part is calculated in the worker thread over the
+        same memory mapped region which is then sent to the server.
+        """
+        segment.seek(0)
+        part_headers = dict(headers or {})
+        part_headers["Content-MD5"] = segment.md5()
+        result = self.put(
+            url,
+            headers=part_headers,
+            data=segment,
+            requests_auth=requests_auth,
+            **kwargs,
+        )
+        if checkpoint and result.status_code < 400:
+            checkpoint.add_part(part_number, result.headers.get("ETag"))
+        return result
 
     def parts(self, endpoint, upload_id, requests_auth):
         return _obj.Object.get_parts(
             self, f"{endpoint}?uploadId={upload_id}", requests_auth
         )
 
-    def _finish_large_object_upload(self, endpoint, headers, upload_id):
+    def _finish_large_object_upload(self, endpoint, headers, upload_id, parts=None):
         requests_auth = self._get_req_auth(endpoint)
-        parts = self.parts(endpoint, upload_id, requests_auth)
-        retries = 3
-        while True:
-            try:
-                return exceptions.raise_from_response(
-                    _obj.Object.complete_multipart_upload(
-                        self,
-                        endpoint,
-                        upload_id,
-                        parts["Parts"],
-                        headers,
-                        requests_auth=requests_auth,
-                    )
-                )
-            except Exception:
-                retries -= 1
-                if retries == 0:
-                    raise
+        if parts is None:
+            parts = self.parts(endpoint, upload_id, requests_auth)["Parts"]
+        return exceptions.raise_from_response(
+            _obj.Object.complete_multipart_upload(
+                self,
+                endpoint,
+                upload_id,
+                parts,
+                headers,
+                requests_auth=requests_auth,
+            )
+        )
 
     def _try_get_size(self, data):
         """Try to get the size of a data object if possible.
@@ -580,6 +1019,9 @@ class Proxy(sdk_proxy.Proxy):
                 return None
             try:
                 st = os.fstat(fileno)
+                if not stat.S_ISREG(st.st_mode):
+                    # Pipes and sockets do not report a meaningful size
+                    return None
                 return st.st_size
             except Exception:
                 self.log.debug(
@@ -602,35 +1044,56 @@ class Proxy(sdk_proxy.Proxy):
             pass
         return None
 
-    def _upload_large_data(self, endpoint, data, name, headers, segment_size):
+    def _upload_large_data(
+        self, endpoint, data, name, headers, segment_size, max_concurrency=None
+    ):
         """
         If the object is big, we need to break it up into segments that
         are no larger than segment_size, upload each of them individually
-        and then upload a manifest object. The segments can be uploaded in
-        parallel, so we'll use the async feature of the TaskManager.
+        and then complete the multipart upload. Segments are read from the
+        data source sequentially while up to ``max_concurrency`` of them
+        are uploaded in parallel using the connection pool executor.
         """
+        max_concurrency = max_concurrency or DEFAULT_UPLOAD_CONCURRENCY
+        requests_auth = self._get_req_auth(endpoint)
         upload_id = _obj.Object.initiate_multipart_upload(
-            self, endpoint, name, requests_auth=self._get_req_auth(endpoint)
+            self, endpoint, name, requests_auth=requests_auth
         )
         url = f"{endpoint}/{name}"
-        part_number = 1
+        part_etags = {}
+        in_flight = {}
 
         try:
-            while True:
-                segment = data.read(segment_size)
-                if not segment:
-                    break
-                result = self.put(
+            segments = self._read_segments(data, segment_size)
+            for part_number, segment in enumerate(segments, 1):
+                # Keep the read-ahead within the memory budget
+                while len(in_flight) >= max_concurrency:
+                    self._collect_parts(
+                        in_flight,
+                        part_etags,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                future = self._connection._pool_executor.submit(
+                    self._upload_part,
                     f"{url}?partNumber={part_number}&uploadId={upload_id}",
-                    headers=headers,
-                    data=segment,
-                    requests_auth=self._get_req_auth(endpoint),
+                    headers,
+                    segment,
+                    requests_auth,
                 )
-                result.raise_for_status()
-                part_number += 1
-
-            return self._finish_large_object_upload(url, headers, upload_id)
+                in_flight[future] = part_number
+            self._collect_parts(in_flight, part_etags)
+
+            parts = [
+                {"PartNumber": str(part_number), "ETag": part_etags[part_number]}
+                for part_number in sorted(part_etags)
+            ]
+            return self._finish_large_object_upload(
+                url, headers, upload_id, parts=parts
+            )
         except Exception:
+            for future in in_flight:
+                future.cancel()
+            concurrent.futures.wait(in_flight)
             try:
                 self.log.debug("Failed to upload large data. Aborting %s", upload_id)
                 self._abort_multipart_upload(endpoint=url, upload_id=upload_id)
@@ -638,6 +1101,64 @@ class Proxy(sdk_proxy.Proxy):
                 self.log.exception("Failed to cleanup multipart upload %s:", upload_id)
             raise
 
+    def _upload_part(self, url, headers, data, requests_auth):
+        """Upload a single part and return its ETag."""
+        result = self.put(url, headers=headers, data=data, requests_auth=requests_auth)
+        exceptions.raise_from_response(result)
+        return result.headers.get("ETag")
+
+    @staticmethod
+    def _collect_parts(
+        in_flight, part_etags, return_when=concurrent.futures.ALL_COMPLETED
+    ):
+        """Wait for running part uploads and record their ETags."""
+        done, _ = concurrent.futures.wait(list(in_flight), return_when=return_when)
+        for future in done:
+            part_number = in_flight.pop(future)
+            part_etags[part_number] = future.result()
+
+    @staticmethod
+    def _read_segments(data, segment_size):
+        """Split a data source into segments of ``segment_size`` bytes.
+
+        :param data: A file-like object or an iterable of bytes.
+        :returns: A generator of segments. Only the last one may be shorter
+            than ``segment_size``.
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        if isinstance(data, (bytes, bytearray)):
+            for start in range(0, len(data), segment_size):
+                yield data[start : start + segment_size]
+            return
+
+        if hasattr(data, "read"):
+
+            def _chunks():
+                while True:
+                    chunk = data.read(segment_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+            chunks = _chunks()
+        else:
+            chunks = iter(data)
+
+        buf = bytearray()
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if not buf and len(chunk) == segment_size:
+                yield chunk
+                continue
+            buf += chunk
+            while len(buf) >= segment_size:
+                yield bytes(buf[:segment_size])
+                del buf[:segment_size]
+        if buf:
+            yield bytes(buf)
+
     def _object_name_from_url(self, url):
         """Get container_name/object_name from the full URL called.
         Remove the Swift endpoint from the front of the URL, and remove
@@ -648,13 +1169,18 @@ class Proxy(sdk_proxy.Proxy):
             object_name = object_name[1:]
         return object_name
 
-    def is_object_stale(self, container, name, filename, file_md5=None):
+    def is_object_stale(
+        self, container, name, filename, file_md5=None, segment_size=None
+    ):
         """Check to see if an object matches the hashes of a file.
         :param container: Name of the container.
         :param name: Name of the object.
         :param filename: Path to the file.
         :param file_md5: Pre-calculated md5 of the file contents. Defaults to
             None which means calculate locally.
+        :param segment_size: Part size used to calculate the local ETag when
+            the object was uploaded as a multipart upload. (Optional) The
+            default segment size is tried as well.
         """
         try:
             metadata = self.get_object_metadata(name, container)
@@ -666,9 +1192,14 @@ class Proxy(sdk_proxy.Proxy):
             )
             return True
 
-        if not file_md5:
-            file_md5 = utils._get_file_hashes(filename)
-        if file_md5 == metadata.etag.strip('"'):
+        etag = metadata.etag.strip('"')
+        if "-" in etag:
+            up_to_date = self._matches_multipart_etag(filename, etag, segment_size)
+        else:
+            if not file_md5:
+                file_md5 = self._get_file_md5(filename)
+            up_to_date = file_md5 == etag
+        if up_to_date:
             self.log.debug(
                 "swift object up to date: %(container)s/%(name)s",
                 {"container": container, "name": name},
@@ -680,6 +1211,213 @@ class Proxy(sdk_proxy.Proxy):
         )
         return True
 
+    def _get_hash_cache(self):
+        """Return the file hash cache if configured.
+
+        The cache is enabled with the ``obs_hash_cache`` cloud config option
+        holding the path of the cache database. ``obs_hash_cache_size``
+        limits the number of cached entries.
+        """
+        cache = getattr(self, "_hash_cache", False)
+        if cache is False:
+            cache = None
+            try:
+                config = self._connection.config.config
+            except AttributeError:
+                config = {}
+            path = config.get("obs_hash_cache")
+            if isinstance(path, str):
+                cache = utils.FileHashCache(
+                    os.path.expanduser(path),
+                    max_entries=int(config.get("obs_hash_cache_size", 100000)),
+                )
+            self._hash_cache = cache
+        return cache
+
+    def _get_file_md5(self, filename):
+        cache = self._get_hash_cache()
+        if cache:
+            return cache.md5(filename)
+        return utils._get_file_hashes(filename)
+
+    def _matches_multipart_etag(self, filename, etag, segment_size=None):
+        """Check whether a file matches the ETag of a multipart upload.
+
+        The part size is not known from the ETag, so the given and the
+        default segment sizes are tried if they fit the number of parts.
+        """
+        try:
+            parts = int(etag.rsplit("-", 1)[1])
+        except ValueError:
+            return False
+        file_size = os.path.getsize(filename)
+        cache = self._get_hash_cache()
+        for part_size in {segment_size, DEFAULT_OBJECT_SEGMENT_SIZE}:
+            if not part_size or not (
+                (parts - 1) * part_size < file_size <= parts * part_size
+            ):
+                continue
+            if cache:
+                local_etag = cache.etag(filename, part_size)
+            else:
+                local_etag = utils._get_file_etag(filename, part_size)[1]
+            if local_etag == etag:
+                return True
+        return False
+
+    def sync_directory(
+        self,
+        container,
+        local_path,
+        prefix="",
+        delete=False,
+        segment_size=None,
+        max_workers=None,
+        hash_workers=None,
+        **headers,
+    ):
+        """Synchronize a local directory tree into a container.
+
+        The remote prefix is listed once and compared with the local files.
+        A file is uploaded when it is missing remotely or differs in size.
+        When the size matches but the local file was modified after the
+        remote object, the MD5 of the file is compared with the ETag of the
+        object. Hashes are calculated in a process pool and uploads and
+        deletions are done concurrently.
+
+        :param container: The value can be the name of a container or a
+               :class:`~otcextensions.sdk.obs.v1.container.Container`
+               instance.
+        :param local_path: Path of the local directory to synchronize.
+        :param prefix: Prefix prepended to the relative file paths to build
+            object names. (Optional)
+        :param bool delete: Delete objects under ``prefix`` which do not
+            exist locally.
+        :param segment_size: Files larger than this are uploaded as
+            multipart uploads. (Optional)
+        :param int max_workers: Number of concurrent uploads and deletions.
+            (Optional) Defaults to 4.
+        :param int hash_workers: Number of processes calculating MD5 of
+            local files. (Optional) Defaults to the number of CPUs.
+        :param dict headers: Headers to be set on uploaded objects.
+
+        :returns: A dict with ``uploaded``, ``deleted`` and ``unchanged``
+            lists of object names.
+        """
+        container = self._get_container_name(container=container)
+        endpoint = self.get_container_endpoint(container)
+        segment_size = self.get_object_segment_size(
+            int(segment_size) if segment_size else None
+        )
+
+        remote = {}
+        for obj in self.objects(container, prefix=prefix):
+            if obj.name.endswith("/"):
+                continue
+            remote[obj.name] = obj
+
+        cache = self._get_hash_cache()
+        uploads = []
+        unchanged = []
+        to_hash = []
+        for name, filename, st in self._walk_local_files(local_path, prefix):
+            obj = remote.pop(name, None)
+            if obj is None or obj.content_length != st.st_size:
+                uploads.append((name, filename, st.st_size))
+                continue
+            if not obj.last_modified or (
+                st.st_mtime <= iso8601.parse_date(obj.last_modified).timestamp()
+            ):
+                unchanged.append(name)
+                continue
+            etag = (obj.etag or "").strip('"')
+            # Multipart ETags are compared against parts of segment_size
+            local_hash = None
+            if cache:
+                local_hash = cache.get(
+                    filename, segment_size if "-" in etag else None, st=st
+                )
+            if local_hash is None:
+                to_hash.append((name, filename, st, etag))
+            elif local_hash == etag:
+                unchanged.append(name)
+            else:
+                uploads.append((name, filename, st.st_size))
+
+        if to_hash:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=hash_workers
+            ) as executor:
+                hashes = executor.map(
+                    utils._get_file_etag,
+                    [item[1] for item in to_hash],
+                    itertools.repeat(segment_size),
+                )
+                for (name, filename, st, etag), (md5, multipart_etag) in zip(
+                    to_hash, hashes
+                ):
+                    if cache:
+                        cache.set(filename, md5, st=st)
+                        cache.set(filename, multipart_etag, segment_size, st=st)
+                    if etag in (md5, multipart_etag):
+                        unchanged.append(name)
+                    else:
+                        uploads.append((name, filename, st.st_size))
+
+        deletes = list(remote) if delete else []
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or DEFAULT_UPLOAD_CONCURRENCY
+        ) as executor:
+            futures = []
+            for name, filename, size in uploads:
+                self.log.debug(
+                    "uploading %(filename)s to %(container)s/%(name)s",
+                    {"filename": filename, "container": container, "name": name},
+                )
+                if size <= segment_size:
+                    futures.append(
+                        executor.submit(
+                            self._upload_object, endpoint, filename, headers, name
+                        )
+                    )
+                else:
+                    futures.append(
+                        executor.submit(
+                            self._upload_large_object,
+                            endpoint,
+                            filename,
+                            name,
+                            headers,
+                            size,
+                            segment_size,
+                        )
+                    )
+            for name in deletes:
+                futures.append(
+                    executor.submit(self.delete_object, name, container=container)
+                )
+            concurrent.futures.wait(futures)
+            for future in futures:
+                future.result()
+
+        return {
+            "uploaded": sorted(item[0] for item in uploads),
+            "deleted": sorted(deletes),
+            "unchanged": sorted(unchanged),
+        }
+
+    @staticmethod
+    def _walk_local_files(local_path, prefix=""):
+        """Yield object name, path and stat result of all local files."""
+        for root, dirs, files in os.walk(local_path):
+            dirs.sort()
+            for file_name in sorted(files):
+                filename = os.path.join(root, file_name)
+                rel_path = os.path.relpath(filename, local_path)
+                name = prefix + rel_path.replace(os.sep, "/")
+                yield name, filename, os.stat(filename)
+
     def get_object_segment_size(self, segment_size):
         """Get a segment size that will work given capabilities"""
         if segment_size is None:
@@ -725,6 +1463,131 @@ class Proxy(sdk_proxy.Proxy):
             requests_auth=self._get_req_auth(endpoint),
         )
 
+    def delete_objects(
+        self,
+        container,
+        names=None,
+        prefix=None,
+        batch_size=DEFAULT_DELETE_BATCH_SIZE,
+        max_concurrency=None,
+    ):
+        """Delete many objects using multi-object delete requests.
+
+        Keys are sent in batches of up to ``batch_size`` keys per request
+        and up to ``max_concurrency`` batches are deleted in parallel. When
+        no ``names`` are given the objects are listed from the container
+        and deleted while the listing is still in progress.
+
+        :param container: The value can be the name of a container or a
+               :class:`~otcextensions.sdk.obs.v1.container.Container`
+               instance.
+        :param names: An iterable of object names or
+                      :class:`~otcextensions.sdk.obs.v1.obj.Object`
+                      instances to delete. (Optional)
+        :param prefix: Only delete objects whose name starts with the prefix
+                       when ``names`` is not given. If neither ``names`` nor
+                       ``prefix`` is given all objects of the container are
+                       deleted. (Optional)
+        :param int batch_size: Number of keys per request, at most 1000.
+        :param int max_concurrency: Number of batches deleted in parallel.
+
+        :returns: A dict with the list of ``deleted`` names and the list of
+            ``errors``, each a dict with ``Key``, ``Code`` and ``Message``
+            of an object which could not be deleted.
+        """
+        if not 0 < batch_size <= DEFAULT_DELETE_BATCH_SIZE:
+            raise ValueError(
+                "batch_size must be between 1 and %d" % DEFAULT_DELETE_BATCH_SIZE
+            )
+        max_concurrency = max_concurrency or DEFAULT_UPLOAD_CONCURRENCY
+        container_name = self._get_container_name(container=container)
+        endpoint = self.get_container_endpoint(container_name)
+        requests_auth = self._get_req_auth(endpoint)
+        if names is None:
+            query = {"prefix": prefix} if prefix else {}
+            names = self.objects(container_name, **query)
+
+        keys = (getattr(name, "name", name) for name in names)
+        result = {"deleted": [], "errors": []}
+        in_flight = {}
+        try:
+            while True:
+                batch = list(itertools.islice(keys, batch_size))
+                if not batch:
+                    break
+                while len(in_flight) >= max_concurrency:
+                    self._collect_deleted(
+                        in_flight,
+                        result,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                future = self._connection._pool_executor.submit(
+                    _obj.Object.delete_multiple,
+                    self,
+                    endpoint,
+                    batch,
+                    requests_auth,
+                )
+                in_flight[future] = batch
+            self._collect_deleted(in_flight, result)
+        except Exception:
+            for future in in_flight:
+                future.cancel()
+            concurrent.futures.wait(in_flight)
+            raise
+        return result
+
+    @staticmethod
+    def _collect_deleted(
+        in_flight, result, return_when=concurrent.futures.ALL_COMPLETED
+    ):
+        """Wait for running batch deletes and record their results."""
+        done, _ = concurrent.futures.wait(list(in_flight), return_when=return_when)
+        for future in done:
+            batch = in_flight.pop(future)
+            errors = future.result()
+            failed = {error.get("Key") for error in errors}
+            result["deleted"].extend(name for name in batch if name not in failed)
+            result["errors"].extend(errors)
+
+    def generate_presigned_url(
+        self, container, obj, method="GET", expires=3600, signature_version="v4"
+    ):
+        """Generate a presigned URL of an object.
+
+        The URL is signed with query string authentication, so it can be
+        used without credentials until it expires. No request is sent to
+        the server, URLs for many objects can be generated cheaply.
+
+        :param container: The value can be the name of a container or a
+               :class:`~otcextensions.sdk.obs.v1.container.Container`
+               instance.
+        :param obj: The value can be the name of an object or a
+                    :class:`~otcextensions.sdk.obs.v1.obj.Object` instance.
+        :param method: HTTP method the URL is used with, e.g. ``GET`` to
+                       download or ``PUT`` to upload the object.
+        :param int expires: Validity of the URL in seconds, at most 7 days
+                            for ``v4`` signatures.
+        :param signature_version: ``v4`` for AWS signature version 4 or
+                                  ``v2`` for the OBS signature.
+
+        :returns: The presigned URL.
+        """
+        container_name = self._get_container_name(obj, container)
+        name = self._get_resource(_obj.Object, obj).id
+        endpoint = self.get_container_endpoint(container_name)
+        requests_auth = self._get_req_auth(endpoint)
+        if requests_auth is None:
+            raise exceptions.SDKException("AK/SK are required to presign URLs")
+        url = "%s/%s" % (endpoint, parse.quote(name, safe="/-_.~"))
+        return requests_auth.presign_url(
+            method,
+            url,
+            expires=expires,
+            signature_version=signature_version,
+            bucket=container_name,
+        )
+
     def get_object_metadata(self, obj, container=None):
         """Get metadata for an object.
 
@@ -882,10 +1745,13 @@ class Proxy(sdk_proxy.Proxy):
         for container in self.containers():
             objects = []
             for obj in self.objects(container=container.name):
+                # Only identify the objects here (dry run, no delete
+                # function), they are removed below with a single
+                # multi-object delete request per batch
                 need_delete = self._service_cleanup_del_res(
-                    lambda o: self.delete_object(o, container=container.name),
+                    None,
                     obj,
-                    dry_run=dry_run,
+                    dry_run=True,
                     client_status_queue=client_status_queue,
                     identified_resources=identified_resources,
                     filters=filters,
@@ -893,14 +1759,22 @@ class Proxy(sdk_proxy.Proxy):
                 )
                 if not dry_run and need_delete:
                     objects.append(obj)
-            for obj in objects:
+            if objects:
                 try:
-                    self.wait_for_delete_object(obj, container=container.name)
+                    result = self.delete_objects(container.name, objects)
                 except Exception as e:
                     self.log.warning(
-                        f"Failed to delete object {obj.name} "
-                        f"from {container.name}: {e}"
+                        f"Failed to delete objects from {container.name}: {e}"
+                    )
+                    continue
+                for error in result["errors"]:
+                    self.log.warning(
+                        f"Failed to delete object {error.get('Key')} "
+                        f"from {container.name}: {error.get('Message')}"
                     )
+                if result["errors"]:
+                    # The container is not empty and can not be deleted
+                    continue
             need_delete = self._service_cleanup_del_res(
                 self.delete_container,
                 container,
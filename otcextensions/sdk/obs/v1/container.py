@@ -160,25 +160,19 @@ class Container(_base.BaseResource):
             session.get_endpoint(),
             params=query_params.copy(),
             requests_auth=requests_auth,
+            stream=True,
         )
 
-        root = ET.fromstring(response.content)
-
-        if root.tag != ET.QName(cls.OBS_NS, "ListAllMyBucketsResult"):
-            _logger.warn("Namespace in the response does not match " "expectation")
-            cls.OBS_NS = root.tag.split("}", 1)[0][1:]
-
-        for elements in root:
-
-            if elements.tag == ET.QName(cls.OBS_NS, cls.resources_key):
-                for el in elements:
-                    if el.tag == ET.QName(cls.OBS_NS, cls.resource_key):
-                        # Convert XML part into dict
-                        dict_raw_resource = cls.etree_to_dict(el)
-                        # extract resource data
-                        dict_resource = dict_raw_resource[cls.resource_key]
-                        value = cls.existing(**dict_resource)
-                        yield value
+        try:
+            exceptions.raise_from_response(response)
+            # Buckets are nested in the Buckets element below the root
+            for element in cls.iter_response_elements(
+                response, "ListAllMyBucketsResult", depth=2
+            ):
+                if element.tag == ET.QName(cls.OBS_NS, cls.resource_key):
+                    yield cls.existing(**cls.element_to_attrs(element))
+        finally:
+            response.close()
 
         return
 
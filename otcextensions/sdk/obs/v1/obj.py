@@ -12,9 +12,9 @@
 # under the License.
 # from botocore.exceptions import ClientError
 import base64
+import concurrent.futures
 import hashlib
 import xml.etree.ElementTree as ET
-from io import BufferedReader
 
 from openstack import _log
 from openstack import exceptions
@@ -45,6 +45,7 @@ class Object(_base.BaseResource):
         "prefix",
         "delimiter",
         "limit",
+        "marker",
         prefix="prefix",
         delimiter="delimiter",
         limit="max-keys",
@@ -64,6 +65,9 @@ class Object(_base.BaseResource):
     #: size of the response body. Instead it contains the size of
     #: the object, in bytes.
     content_length = resource.Body("Size", type=int)
+    #: Size of the object in bytes as reported in the headers of
+    #: a HEAD or GET response.
+    object_size = resource.Header("Content-Length", type=int)
     # Headers for requests
     #: private, public-read, public-read-write, authenticated-read
     #: bucket-owner-read, bucket-owner-full-control
@@ -190,8 +194,16 @@ class Object(_base.BaseResource):
         endpoint_override=None,
         headers=None,
         requests_auth=None,
+        prefetch=False,
         **params,
     ):
+        """List objects of a container.
+
+        Pages are parsed incrementally from the streamed response. With
+        ``prefetch=True`` the next page is requested in the background while
+        the objects of the current page are consumed. Prefetching is off by
+        default.
+        """
         if not cls.allow_list:
             raise exceptions.MethodNotSupported(cls, "list")
 
@@ -203,40 +215,97 @@ class Object(_base.BaseResource):
         get_args = cls._prepare_override_args(
             endpoint_override=endpoint_override, additional_headers=headers
         )
+        page_args = (session, uri, requests_auth, get_args)
+
+        executor = None
+        if prefetch:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            values, _, marker = cls._list_page(*page_args, query_params.copy())
+            while True:
+                next_page = None
+                if marker is not None:
+                    query_params["marker"] = marker
+                    if executor:
+                        next_page = executor.submit(
+                            cls._list_page, *page_args, query_params.copy()
+                        )
+                yield from values
+                if marker is None:
+                    return
+                if next_page:
+                    values, _, marker = next_page.result()
+                else:
+                    values, _, marker = cls._list_page(*page_args, query_params.copy())
+        finally:
+            if executor:
+                executor.shutdown(wait=False)
 
-        while uri:
+    @classmethod
+    def list_common_prefixes(
+        cls,
+        session,
+        endpoint_override=None,
+        requests_auth=None,
+        prefix=None,
+        delimiter="/",
+    ):
+        """List the common prefixes of the keys below a prefix.
 
-            response = session.get(
-                uri, params=query_params.copy(), requests_auth=requests_auth, **get_args
+        :returns: A sorted list of the prefixes up to and including the
+            first occurrence of ``delimiter`` after ``prefix``.
+        """
+        get_args = cls._prepare_override_args(endpoint_override=endpoint_override)
+        params = {"delimiter": delimiter}
+        if prefix:
+            params["prefix"] = prefix
+        prefixes = []
+        while True:
+            _, page_prefixes, marker = cls._list_page(
+                session, cls.base_path, requests_auth, get_args, dict(params)
             )
+            prefixes.extend(page_prefixes)
+            if marker is None:
+                return prefixes
+            params["marker"] = marker
 
-            uri = None
-            next_params = {}
-
-            root = ET.fromstring(response.content)
-
-            if root.tag != ET.QName(cls.OBS_NS, "ListBucketResult"):
-                _logger.warn("Namespace in the response does not match " "expectation")
-                cls.OBS_NS = root.tag.split("}", 1)[0][1:]
-
-            for element in root:
+    @classmethod
+    def _list_page(cls, session, uri, requests_auth, get_args, params):
+        """Fetch and parse a single listing page.
 
+        :returns: A tuple of the objects and the common prefixes of the page
+            and the marker of the next page or ``None`` if this is the last
+            page.
+        """
+        response = session.get(
+            uri, params=params, requests_auth=requests_auth, stream=True, **get_args
+        )
+        try:
+            exceptions.raise_from_response(response)
+            values = []
+            prefixes = []
+            next_marker = None
+            is_truncated = False
+            for element in cls.iter_response_elements(response, "ListBucketResult"):
                 if element.tag == ET.QName(cls.OBS_NS, cls.resource_key):
-                    # Convert XML part into dict
-                    dict_raw_resource = cls.etree_to_dict(element)
-                    # extract resource data
-                    dict_resource = dict_raw_resource[cls.resource_key]
-                    value = cls.existing(**dict_resource)
-                    yield value
-
+                    values.append(cls.existing(**cls.element_to_attrs(element)))
+                elif element.tag == ET.QName(cls.OBS_NS, "CommonPrefixes"):
+                    prefixes.extend(child.text for child in element)
                 elif element.tag == ET.QName(cls.OBS_NS, "NextMarker"):
-                    next_params["marker"] = element.text
-
-            if "marker" in next_params:
-                uri = cls.base_path % params
-                query_params.update(next_params)
-
-        return
+                    next_marker = element.text
+                elif element.tag == ET.QName(cls.OBS_NS, "IsTruncated"):
+                    is_truncated = element.text == "true"
+        finally:
+            response.close()
+
+        if not is_truncated:
+            return values, prefixes, None
+        # NextMarker is only returned together with a delimiter,
+        # otherwise the last returned key or prefix is the next marker
+        if not next_marker:
+            candidates = [value.name for value in values[-1:]] + prefixes[-1:]
+            next_marker = max(candidates, default=None)
+        return values, prefixes, next_marker or None
 
     def create(
         self,
@@ -252,13 +321,12 @@ class Object(_base.BaseResource):
 
         session = self._get_session(session)
 
-        if (
-            not self.content_md5
-            and self.data
-            and not isinstance(self.data, BufferedReader)
-        ):
-            md5 = hashlib.md5()
-            md5.update(str.encode(self.data))
+        if not self.content_md5 and self.data and not hasattr(self.data, "read"):
+            data = self.data
+            if isinstance(data, str):
+                data = data.encode()
+            # bytes-like objects are hashed in place without a copy
+            md5 = hashlib.md5(data)
             self.content_md5 = base64.b64encode(md5.digest()).decode()
 
         request = self._prepare_request(requires_id=True, prepend_key=prepend_key)
@@ -314,28 +382,116 @@ class Object(_base.BaseResource):
         return self
 
     def download(
-        self, session, filename=None, endpoint_override=None, requests_auth=None
+        self,
+        session,
+        filename=None,
+        endpoint_override=None,
+        requests_auth=None,
+        chunk_size=65536,
     ):
+        """Download the object content into a file.
+
+        The body is streamed, so at most ``chunk_size`` bytes are held in
+        memory at any time.
+
+        :param session: The session to use for making this request.
+        :param filename: Path of the target file or a writable file-like
+            object.
+        :param int chunk_size: Amount of bytes read from the response and
+            written at once.
+        """
+        response = self._open_stream(
+            session, endpoint_override=endpoint_override, requests_auth=requests_auth
+        )
+        try:
+            headers = self._consume_header_attrs(response.headers)
+            self._header.attributes.update(headers)
+            self._header.clean()
+
+            if hasattr(filename, "write"):
+                self._write_chunks(response, filename, chunk_size)
+            else:
+                with open(filename, "wb") as f:
+                    self._write_chunks(response, f, chunk_size)
+        finally:
+            response.close()
+
+        return
+
+    @staticmethod
+    def _write_chunks(response, f, chunk_size):
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            f.write(chunk)
 
+    def _open_stream(
+        self,
+        session,
+        start=None,
+        end=None,
+        endpoint_override=None,
+        requests_auth=None,
+        headers=None,
+    ):
         session = self._get_session(session)
 
         request = self._prepare_request(requires_id=True)
 
+        additional_headers = dict(headers or {})
+        if start is not None or end is not None:
+            additional_headers["Range"] = "bytes=%s-%s" % (
+                start or 0,
+                "" if end is None else end,
+            )
+
         req_args = self._prepare_override_args(
             endpoint_override=endpoint_override,
             request_headers=request.headers,
+            additional_headers=additional_headers,
             requests_auth=requests_auth,
         )
 
-        response = session.get(request.url, **req_args)
-        self._translate_response(response)
+        response = session.get(request.url, stream=True, **req_args)
+        try:
+            exceptions.raise_from_response(response)
+        except Exception:
+            response.close()
+            raise
+        return response
 
-        _logger.debug(response.content)
+    def stream(
+        self,
+        session,
+        chunk_size=1024,
+        start=None,
+        end=None,
+        endpoint_override=None,
+        requests_auth=None,
+        headers=None,
+    ):
+        """Stream the object content without buffering the whole body.
 
-        with open(filename, "wb") as f:
-            f.write(response.content)
+        :param session: The session to use for making this request.
+        :param int chunk_size: Amount of bytes yielded per iteration.
+        :param int start: First byte of the range to fetch (optional).
+        :param int end: Last byte (inclusive) of the range to fetch
+            (optional).
+        :param dict headers: Additional headers to be sent with the request.
 
-        return
+        :returns: A generator of ``bytes`` chunks.
+        """
+        response = self._open_stream(
+            session,
+            start=start,
+            end=end,
+            endpoint_override=endpoint_override,
+            requests_auth=requests_auth,
+            headers=headers,
+        )
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                yield chunk
+        finally:
+            response.close()
 
     @staticmethod
     def initiate_multipart_upload(proxy, endpoint, name, **params):
@@ -364,6 +520,43 @@ class Object(_base.BaseResource):
             dict_resource.update(dict_raw_resource)
         return dict_resource
 
+    @staticmethod
+    def delete_multiple(proxy, endpoint, names, requests_auth):
+        """Delete up to 1000 objects with a single request.
+
+        The request is sent in quiet mode, so the response only lists keys
+        which could not be deleted.
+
+        :returns: A list of dicts with ``Key``, ``Code`` and ``Message`` of
+            the keys which failed to be deleted.
+        """
+        root = ET.Element("Delete")
+        ET.SubElement(root, "Quiet").text = "true"
+        for name in names:
+            obj = ET.SubElement(root, "Object")
+            ET.SubElement(obj, "Key").text = name
+        data = ET.tostring(root)
+        headers = {
+            "Content-MD5": base64.b64encode(hashlib.md5(data).digest()).decode(),
+            "Content-Type": "application/xml",
+        }
+        response = proxy.post(
+            f"{endpoint}?delete",
+            data=data,
+            headers=headers,
+            requests_auth=requests_auth,
+        )
+        exceptions.raise_from_response(response)
+        errors = []
+        if not response.content:
+            return errors
+        for element in ET.fromstring(response.content):
+            if element.tag.endswith("Error"):
+                dict_raw_resource = _base.BaseResource.etree_to_dict(element)
+                dict_raw_resource = Object.clear_element(dict_raw_resource, proxy)
+                errors.append(dict_raw_resource["Error"])
+        return errors
+
     @staticmethod
     def clear_element(dict_raw_resource, proxy):
         if proxy.region_name == "eu-ch2":
@@ -390,4 +583,13 @@ class Object(_base.BaseResource):
             ET.SubElement(part, "ETag").text = item["ETag"]
         tree = ET.ElementTree(root)
         data = ET.tostring(tree.getroot()).decode()
-        return proxy.post(url, data=data, headers=headers, requests_auth=requests_auth)
+        # Completing the upload with the same parts again is safe to retry,
+        # OBS may also fail it with a transient 500 InternalError
+        return proxy.post(
+            url,
+            data=data,
+            headers=headers,
+            requests_auth=requests_auth,
+            idempotent=True,
+            retry_status_codes=(500,),
+        )
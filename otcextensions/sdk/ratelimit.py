@@ -0,0 +1,243 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import hashlib
+import os
+import struct
+import threading
+import time
+from urllib import parse
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from otcextensions import sdk
+
+# State of a shared bucket: available tokens and time of the last update
+_STATE = struct.Struct("dd")
+
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens are refilled with ``rate`` per second up to ``burst``. Requests
+    exceeding the available tokens reserve them in advance and wait until
+    they are refilled, so waiting callers are served in order.
+
+    :param float rate: Number of tokens refilled per second.
+    :param float burst: Capacity of the bucket. (Optional) Defaults to
+        ``rate``, but at least one token.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(self.rate, 1))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = _refill(
+                self._tokens, now - self._updated, self.rate, self.burst, tokens
+            )
+            self._updated = now
+        return wait
+
+    def acquire(self, tokens=1):
+        """Take tokens from the bucket, waiting until they are available.
+
+        :returns: The time waited in seconds.
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket shared by processes through a local file.
+
+    The state of the bucket is kept in ``path`` and updated under an
+    exclusive ``flock``, so all processes using the same file share the
+    rate. Only available on POSIX systems.
+    """
+
+    def __init__(self, path, rate, burst=None):
+        if fcntl is None:
+            raise NotImplementedError(
+                "Sharing rate limits between processes requires fcntl"
+            )
+        super(FileTokenBucket, self).__init__(rate, burst)
+        self.path = path
+
+    def _reserve(self, tokens):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            now = time.time()
+            data = os.pread(fd, _STATE.size, 0)
+            if len(data) == _STATE.size:
+                available, updated = _STATE.unpack(data)
+            else:
+                available, updated = self.burst, now
+            available, wait = _refill(
+                available, now - updated, self.rate, self.burst, tokens
+            )
+            os.pwrite(fd, _STATE.pack(available, now), 0)
+        finally:
+            # closing the descriptor releases the lock
+            os.close(fd)
+        return wait
+
+
+def _refill(available, elapsed, rate, burst, tokens):
+    """Refill the bucket and take ``tokens`` from it.
+
+    :returns: Tuple of the tokens left, possibly negative when reserved in
+        advance, and the time to wait for them.
+    """
+    available = min(burst, available + max(elapsed, 0) * rate) - tokens
+    if available >= 0:
+        return available, 0
+    return available, -available / rate
+
+
+class RateLimiters:
+    """Token buckets of the services of a connection.
+
+    Limits are configured with the ``otc_rate_limits`` cloud config option
+    mapping OTC service names (or service types) to requests per second.
+    A limit is either a number or a dict with ``rate``, ``burst`` and
+    ``per_endpoint``; the latter keeps a bucket per endpoint host. The
+    ``default`` entry applies to every service not listed separately. When
+    ``otc_rate_limit_dir`` is set, buckets are kept in files of this
+    directory and shared with other processes.
+
+    .. code-block:: yaml
+
+      otc_rate_limits:
+        dis: 50
+        ces: {rate: 10, burst: 20}
+        obs: {rate: 100, per_endpoint: true}
+
+    :param dict limits: The configured limits.
+    :param str shared_dir: Directory for buckets shared between processes.
+        (Optional)
+    :param str namespace: Prefix of the shared bucket names, e.g. the name
+        of the cloud.
+    """
+
+    def __init__(self, limits, shared_dir=None, namespace=""):
+        self.limits = limits
+        self.shared_dir = shared_dir
+        self.namespace = namespace
+        self._buckets = {}
+        self._named = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_connection(cls, conn):
+        """Return the rate limiters of the connection.
+
+        The limiters are created once and shared by all proxies and threads
+        of the connection.
+
+        :returns: :class:`RateLimiters` or ``None`` if no limits are
+            configured.
+        """
+        limiters = conn.__dict__.get("_otc_rate_limiters", False)
+        if limiters is not False:
+            return limiters
+        with _lock:
+            limiters = conn.__dict__.get("_otc_rate_limiters", False)
+            if limiters is False:
+                config = conn.config.config
+                limiters = None
+                if isinstance(config.get("otc_rate_limits"), dict):
+                    limiters = cls(
+                        config["otc_rate_limits"],
+                        shared_dir=config.get("otc_rate_limit_dir"),
+                        namespace=conn.config.name or "",
+                    )
+                conn._otc_rate_limiters = limiters
+        return limiters
+
+    def _find_limit(self, service_type):
+        for name in _service_names(service_type):
+            if name in self.limits:
+                return name, self.limits[name]
+        # Every service gets its own bucket with the default limit
+        return service_type, self.limits.get("default")
+
+    def get(self, service_type, endpoint=None):
+        """Return the bucket of a service.
+
+        :param str service_type: Service type of the proxy.
+        :param str endpoint: URL or host of the requested endpoint.
+            (Optional) Only used for limits set ``per_endpoint``.
+
+        :returns: A :class:`TokenBucket` or ``None`` if the service is not
+            limited.
+        """
+        key = (service_type, endpoint)
+        bucket = self._buckets.get(key, False)
+        if bucket is not False:
+            return bucket
+        with self._lock:
+            bucket = self._buckets.get(key, False)
+            if bucket is False:
+                bucket = self._create(service_type, endpoint)
+                self._buckets[key] = bucket
+        return bucket
+
+    def _create(self, service_type, endpoint):
+        name, limit = self._find_limit(service_type)
+        if not limit:
+            return None
+        if not isinstance(limit, dict):
+            limit = {"rate": limit}
+        if limit.get("per_endpoint") and endpoint:
+            name = "%s@%s" % (name, parse.urlsplit(endpoint).netloc or endpoint)
+        # Services sharing a limit share the bucket
+        if name in self._named:
+            return self._named[name]
+        rate = float(limit["rate"])
+        burst = limit.get("burst")
+        if self.shared_dir:
+            os.makedirs(self.shared_dir, mode=0o700, exist_ok=True)
+            digest = hashlib.sha256(
+                ("%s/%s" % (self.namespace, name)).encode("utf-8")
+            ).hexdigest()
+            bucket = FileTokenBucket(
+                os.path.join(self.shared_dir, digest + ".bucket"), rate, burst
+            )
+        else:
+            bucket = TokenBucket(rate, burst)
+        self._named[name] = bucket
+        return bucket
+
+
+def _service_names(service_type):
+    """Return the OTC service names of a service type"""
+    names = [service_type]
+    for name, service in sdk.OTC_SERVICES.items():
+        if service_type in (
+            service["service_type"],
+            service.get("endpoint_service_type"),
+        ):
+            names.append(name)
+    return names
@@ -0,0 +1,245 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import collections
+import email.utils
+import random
+import threading
+import time
+
+from keystoneauth1 import exceptions as ksa_exc
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30
+# Share of the requests which may be retried, see RetryBudget
+DEFAULT_BUDGET_RATIO = 0.2
+DEFAULT_BUDGET_TOKENS = 10
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+# 429 is retried for every method, as throttled requests are not processed
+RETRIABLE_STATUS_CODES = frozenset([429, 502, 503, 504])
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a share of the requests.
+
+    Every request deposits ``ratio`` tokens and every retry withdraws one,
+    so a failing service is not flooded with retries of all clients.
+
+    :param float ratio: Tokens deposited per request.
+    :param int max_tokens: Capacity of the bucket, also the number of
+        retries available initially.
+    """
+
+    def __init__(self, ratio=DEFAULT_BUDGET_RATIO, max_tokens=DEFAULT_BUDGET_TOKENS):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = float(max_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """Take a token for a retry.
+
+        :returns: ``False`` if the budget is exhausted.
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for throttled requests.
+
+    Requests answered with ``429 Too Many Requests`` and requests failing to
+    connect are retried for every method. Other retriable status codes and
+    connection errors are only retried for idempotent methods, unless
+    ``retry_non_idempotent`` is set. A ``Retry-After`` header of the response
+    replaces the computed delay, responses asking to wait longer than
+    ``max_backoff`` are not retried.
+
+    :param int max_retries: Maximum number of retries of a request.
+    :param float backoff: Base of the exponential delay in seconds.
+    :param float max_backoff: Maximum delay in seconds.
+    :param retriable_status_codes: Status codes of responses to retry.
+    :param bool retry_non_idempotent: Retry non idempotent requests on
+        server errors as well.
+    :param budget: :class:`RetryBudget` shared by the requests using this
+        policy. (Optional)
+    """
+
+    def __init__(
+        self,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        max_backoff=DEFAULT_MAX_BACKOFF,
+        retriable_status_codes=RETRIABLE_STATUS_CODES,
+        retry_non_idempotent=False,
+        budget=None,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retriable_status_codes = frozenset(retriable_status_codes)
+        self.retry_non_idempotent = retry_non_idempotent
+        self.budget = budget
+        #: Counters of requests, retries (also per status code or error)
+        #: and requests given up
+        self.stats = collections.Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, service_type):
+        """Build the policy of a service from the cloud config.
+
+        The ``otc_max_retries``, ``otc_retry_backoff``,
+        ``otc_retry_max_backoff`` and ``otc_retry_budget`` options can be
+        overridden per service, e.g. ``dis_otc_max_retries``. A retry budget
+        of ``0`` disables the budget.
+
+        :param config: A :class:`~openstack.config.cloud_region.CloudRegion`.
+        :param str service_type: Service type of the proxy.
+        """
+        prefix = (service_type or "").lower().replace("-", "_")
+
+        def get(name, default):
+            value = config.config.get("%s_%s" % (prefix, name))
+            if value is None:
+                value = config.config.get(name, default)
+            return value
+
+        ratio = float(get("otc_retry_budget", DEFAULT_BUDGET_RATIO))
+        return cls(
+            max_retries=int(get("otc_max_retries", DEFAULT_MAX_RETRIES)),
+            backoff=float(get("otc_retry_backoff", DEFAULT_BACKOFF)),
+            max_backoff=float(get("otc_retry_max_backoff", DEFAULT_MAX_BACKOFF)),
+            budget=RetryBudget(ratio) if ratio else None,
+        )
+
+    def _count(self, *keys):
+        with self._lock:
+            for key in keys:
+                self.stats[key] += 1
+
+    def record_request(self):
+        """Account a request sent using the policy."""
+        self._count("requests")
+        if self.budget:
+            self.budget.deposit()
+
+    def is_retriable(
+        self,
+        method,
+        status_code=None,
+        error=None,
+        idempotent=None,
+        retry_status_codes=None,
+    ):
+        """Check whether the outcome of a request may be retried.
+
+        :param bool idempotent: Whether the request is idempotent.
+            (Optional) Derived from the method by default.
+        :param retry_status_codes: Status codes retried for this request in
+            addition to ``retriable_status_codes``.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        idempotent = idempotent or self.retry_non_idempotent
+        if status_code is not None:
+            if status_code == 429:
+                return True
+            return idempotent and (
+                status_code in self.retriable_status_codes
+                or status_code in (retry_status_codes or ())
+            )
+        if isinstance(error, ksa_exc.ConnectTimeout):
+            # The request has not been sent
+            return True
+        return idempotent and isinstance(error, ksa_exc.RetriableConnectionFailure)
+
+    def get_delay(self, attempt, response=None):
+        """Return the delay before retry number ``attempt`` (from 0).
+
+        :returns: Delay in seconds or ``None`` if the server asks to wait
+            longer than ``max_backoff``.
+        """
+        retry_after = _parse_retry_after(response)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_backoff else None
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def next_delay(
+        self,
+        method,
+        attempt,
+        response=None,
+        error=None,
+        idempotent=None,
+        retry_status_codes=None,
+    ):
+        """Decide on retrying a request.
+
+        :param str method: HTTP method of the request.
+        :param int attempt: Number of retries done so far.
+        :param response: The response, if one was received.
+        :param error: The exception raised sending the request.
+        :param bool idempotent: Whether the request is idempotent.
+            (Optional) Derived from the method by default.
+        :param retry_status_codes: Status codes retried for this request in
+            addition to ``retriable_status_codes``.
+
+        :returns: Delay in seconds before the retry or ``None`` if the
+            request must not be retried.
+        """
+        status_code = None
+        if response is not None:
+            status_code = response.status_code
+        if not self.is_retriable(
+            method, status_code, error, idempotent, retry_status_codes
+        ):
+            return None
+        reason = status_code if status_code is not None else type(error).__name__
+        if attempt >= self.max_retries:
+            self._count("exhausted")
+            return None
+        delay = self.get_delay(attempt, response)
+        if delay is None:
+            self._count("exhausted")
+            return None
+        if self.budget and not self.budget.withdraw():
+            self._count("budget_exhausted")
+            return None
+        self._count("retries", "retries.%s" % reason)
+        return delay
+
+
+def _parse_retry_after(response):
+    """Return the Retry-After header of a response in seconds"""
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
@@ -9,15 +9,134 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import threading
+import time
+
+from keystoneauth1 import exceptions as ksa_exc
+
 from openstack import _log
 from openstack import exceptions
 from openstack import proxy as os_proxy
+from otcextensions.sdk import ratelimit
+from otcextensions.sdk import retry
 
 _logger = _log.setup_logging("openstack")
 
 
 class Proxy(os_proxy.Proxy):
 
+    _retry_policy = None
+    _retry_lock = threading.Lock()
+
+    @property
+    def retry_policy(self):
+        """The :class:`~otcextensions.sdk.retry.RetryPolicy` of the service.
+
+        Built from the cloud config on first use and shared by all requests
+        of this proxy, so its retry budget and statistics are per service.
+        """
+        if self._retry_policy is None:
+            with self._retry_lock:
+                if self._retry_policy is None:
+                    conn = self._get_connection()
+                    self._retry_policy = retry.RetryPolicy.from_config(
+                        conn.config, self.service_type
+                    )
+        return self._retry_policy
+
+    @retry_policy.setter
+    def retry_policy(self, policy):
+        self._retry_policy = policy
+
+    def request(self, url, method, *args, **kwargs):
+        """Send a request, retrying it according to the retry policy
+
+        Requests are delayed to stay within the configured rate limit of
+        the service, see :class:`~otcextensions.sdk.ratelimit.RateLimiters`.
+        Throttled requests and, for idempotent methods, requests failing
+        with a server or connection error are sent again after a delay.
+        Request bodies are only resent if they can be rewound.
+
+        :param bool idempotent: Mark a request as idempotent regardless of
+            its method, so it is retried on server errors.
+        :param retry_status_codes: Status codes to retry for this request in
+            addition to the ones of the retry policy.
+        """
+        policy = self.retry_policy
+        idempotent = kwargs.pop("idempotent", None)
+        retry_status_codes = kwargs.pop("retry_status_codes", None)
+        limiter = self._get_rate_limiter(url, kwargs.get("endpoint_override"))
+        body = kwargs.get("data")
+        position = None
+        if hasattr(body, "seek") and hasattr(body, "tell"):
+            position = body.tell()
+        replayable = position is not None or isinstance(
+            body, (type(None), bytes, bytearray, memoryview, str, dict, list, tuple)
+        )
+
+        attempt = 0
+        while True:
+            response = error = None
+            if limiter:
+                limiter.acquire()
+            policy.record_request()
+            try:
+                response = super(Proxy, self).request(url, method, *args, **kwargs)
+            except ksa_exc.HttpError as e:
+                # raise_exc=True was requested
+                error = e
+                response = e.response
+            except ksa_exc.RetriableConnectionFailure as e:
+                error = e
+
+            delay = None
+            if replayable:
+                delay = policy.next_delay(
+                    method, attempt, response, error, idempotent, retry_status_codes
+                )
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+
+            _logger.debug(
+                "Retrying %s %s in %.2fs (attempt %d), got %s",
+                method,
+                url,
+                delay,
+                attempt + 1,
+                response.status_code if response is not None else error,
+            )
+            self._report_retry()
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            if position is not None:
+                body.seek(position)
+            attempt += 1
+
+    def _get_rate_limiter(self, url, endpoint_override=None):
+        """Return the token bucket limiting requests to the endpoint"""
+        limiters = ratelimit.RateLimiters.for_connection(self._get_connection())
+        if not limiters:
+            return None
+        endpoint = url
+        if not url.startswith(("http://", "https://")):
+            endpoint = endpoint_override or self.endpoint_override
+        return limiters.get(self.service_type, endpoint)
+
+    def _report_retry(self):
+        if self._statsd_client and self._statsd_prefix:
+            self._statsd_client.incr(
+                ".".join(
+                    [
+                        self._statsd_prefix,
+                        os_proxy.normalize_metric_name(self.service_type),
+                        "retries",
+                    ]
+                )
+            )
+
     def _find(
         self,
         resource_type,
@@ -9,6 +9,9 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import queue
+import threading
+
 from openstack import _log
 from openstack import exceptions
 from openstack import resource
@@ -17,6 +20,55 @@ from otcextensions.common import utils
 
 _logger = _log.setup_logging("openstack")
 
+_DONE = object()
+
+
+def _prefetch_pages(pages, depth):
+    """Consume a page generator in a background thread
+
+    At most ``depth`` pages are fetched ahead of the page being consumed.
+    Errors of the background thread are raised to the caller.
+
+    :param pages: Generator of pages.
+    :param int depth: Number of pages to fetch ahead. With ``0`` the
+        generator is consumed directly.
+    """
+    if not depth:
+        yield from pages
+        return
+
+    buffer = queue.Queue()
+    slots = threading.Semaphore(depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            while True:
+                slots.acquire()
+                if stop.is_set():
+                    return
+                page = next(pages, _DONE)
+                buffer.put(page)
+                if page is _DONE:
+                    return
+        except Exception as e:
+            buffer.put(e)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            page = buffer.get()
+            if page is _DONE:
+                return
+            if isinstance(page, Exception):
+                raise page
+            slots.release()
+            yield page
+    finally:
+        stop.set()
+        slots.release()
+
 
 class Resource(resource.Resource):
 
@@ -332,6 +384,7 @@ class Resource(resource.Resource):
         endpoint_override=None,
         headers=None,
         requests_auth=None,
+        prefetch=0,
         **params
     ):
         """Override default list to incorporate endpoint overriding
@@ -351,6 +404,8 @@ class Resource(resource.Resource):
                                **When paginated is False only one
                                page of data will be returned regardless
                                of the API's support of pagination.**
+        :param int prefetch: Number of pages requested in the background
+            while the current page is consumed. ``0`` disables prefetching.
         :param dict params: These keyword arguments are passed through the
             :meth:`~openstack.resource.QueryParamter._transpose` method
             to find if any of them match expected query parameters to be
@@ -378,8 +433,6 @@ class Resource(resource.Resource):
         query_params = cls._query_mapping._transpose(params, cls)
         uri = cls.base_path % params
 
-        limit = query_params.get("limit")
-
         # Build additional arguments to the GET call
         get_args = cls._prepare_override_args(
             endpoint_override=endpoint_override,
@@ -387,54 +440,17 @@ class Resource(resource.Resource):
             additional_headers=headers,
         )
 
-        total_yielded = 0
-        while uri:
-            response = session.get(uri, params=query_params.copy(), **get_args)
-            exceptions.raise_from_response(response)
-            if response.status_code == 204 or (
-                response.status_code == 200 and not response.json()
-            ):
-                # Some bad APIs (i.e. DCS.Backup.List) return emptiness
-                return
-            data = response.json()
-
-            # Discard any existing pagination keys
-            query_params.pop("marker", None)
-            query_params.pop("limit", None)
-
-            if cls.resources_key:
-                resources = data[cls.resources_key]
-            else:
-                resources = data
-
-            if not isinstance(resources, list):
-                resources = [resources]
-
-            marker = None
-            for raw_resource in resources:
-                # Do not allow keys called "self" through. Glance chose
-                # to name a key "self", so we need to pop it out because
-                # we can't send it through cls.existing and into the
-                # Resource initializer. "self" is already the first
-                # argument and is practically a reserved word.
-                raw_resource.pop("self", None)
-
-                if cls.resource_key and cls.resource_key in raw_resource:
-                    raw_resource = raw_resource[cls.resource_key]
-
-                value = cls.existing(**raw_resource)
-
-                marker = value.id
-                yield value
-                total_yielded += 1
-
-            if resources and paginated:
-                uri, next_params = cls._get_next_link(
-                    uri, response, data, marker, limit, total_yielded
-                )
-                query_params.update(next_params)
-            else:
-                return
+        pages = cls._list_pages(
+            session,
+            uri,
+            query_params,
+            get_args,
+            paginated,
+            lambda data: data[cls.resources_key],
+            allow_empty=True,
+        )
+        for page in _prefetch_pages(pages, prefetch):
+            yield from page
 
     @staticmethod
     def find_value_by_accessor(input_dict, accessor):
@@ -449,7 +465,13 @@ class Resource(resource.Resource):
 
     @classmethod
     def list_ext(
-        cls, session, paginated=False, endpoint_override=None, headers=None, **params
+        cls,
+        session,
+        paginated=False,
+        endpoint_override=None,
+        headers=None,
+        prefetch=0,
+        **params
     ):
         """Override default list to incorporate endpoint overriding
         and custom headers
@@ -468,6 +490,8 @@ class Resource(resource.Resource):
                                **When paginated is False only one
                                page of data will be returned regardless
                                of the API's support of pagination.**
+        :param int prefetch: Number of pages requested in the background
+            while the current page is consumed. ``0`` disables prefetching.
         :param dict params: These keyword arguments are passed through the
             :meth:`~openstack.resource.QueryParamter._transpose` method
             to find if any of them match expected query parameters to be
@@ -497,8 +521,6 @@ class Resource(resource.Resource):
         if scaling_group_id:
             uri_params = {"scaling_group_id": scaling_group_id}
 
-        print("got params %s" % params)
-
         cls._query_mapping._validate(params, base_path=cls.base_path)
         query_params = cls._query_mapping._transpose(params, cls)
         uri = None
@@ -507,8 +529,6 @@ class Resource(resource.Resource):
         else:
             uri = cls.list_path % uri_params
 
-        limit = query_params.get("limit")
-
         # Build additional arguments to the GET call
         get_args = cls._prepare_override_args(
             endpoint_override=endpoint_override,
@@ -516,25 +536,65 @@ class Resource(resource.Resource):
             additional_headers=headers,
         )
 
+        pages = cls._list_pages(
+            session,
+            uri,
+            query_params,
+            get_args,
+            paginated,
+            lambda data: cls.find_value_by_accessor(data, cls.resources_key),
+        )
+        for page in _prefetch_pages(pages, prefetch):
+            yield from page
+
+    @classmethod
+    def _list_pages(
+        cls,
+        session,
+        uri,
+        query_params,
+        get_args,
+        paginated,
+        get_resources,
+        allow_empty=False,
+    ):
+        """Generate the resources of consecutive pages as lists
+
+        The response of every page is parsed only once and the link to the
+        next page is resolved before the page is returned, so pages can be
+        fetched ahead of the caller.
+
+        :param get_resources: Function returning the list of raw resources
+            from the response body, used when ``resources_key`` is set.
+        :param bool allow_empty: Stop on empty responses instead of
+            treating them as a resource.
+        """
+        limit = query_params.get("limit")
+
         total_yielded = 0
         while uri:
             response = session.get(uri, params=query_params.copy(), **get_args)
             exceptions.raise_from_response(response)
+            if allow_empty and response.status_code == 204:
+                # Some bad APIs (i.e. DCS.Backup.List) return emptiness
+                return
             data = response.json()
+            if allow_empty and not data:
+                return
 
             # Discard any existing pagination keys
             query_params.pop("marker", None)
             query_params.pop("limit", None)
 
             if cls.resources_key:
-                resources = cls.find_value_by_accessor(data, cls.resources_key)
+                resources = get_resources(data)
             else:
                 resources = data
 
             if not isinstance(resources, list):
                 resources = [resources]
 
-            marker = None
+            values = []
             for raw_resource in resources:
                 # Do not allow keys called "self" through. Glance chose
                 # to name a key "self", so we need to pop it out because
@@ -546,19 +606,17 @@ class Resource(resource.Resource):
                 if cls.resource_key and cls.resource_key in raw_resource:
                     raw_resource = raw_resource[cls.resource_key]
 
-                value = cls.existing(**raw_resource)
+                values.append(cls.existing(**raw_resource))
 
-                marker = value.id
-                yield value
-                total_yielded += 1
-
-            if resources and paginated:
+            total_yielded += len(values)
+            if values and paginated:
                 uri, next_params = cls._get_next_link(
-                    uri, response, data, marker, limit, total_yielded
+                    uri, response, data, values[-1].id, limit, total_yielded
                 )
                 query_params.update(next_params)
             else:
-                return
+                uri = None
+            yield values
 
     @classmethod
     def find(
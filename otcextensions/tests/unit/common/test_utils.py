@@ -9,8 +9,17 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import base64
+import datetime
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from unittest import mock
 
 from openstack.tests.unit import base
+from otcextensions.common import utils
 from otcextensions.common.utils import normalize_tags
 
 
@@ -28,3 +37,241 @@ class TestUtils(base.TestCase):
         result = normalize_tags(tags)
 
         self.assertEqual(result, verify_result)
+
+    def test_to_milliseconds(self):
+        self.assertEqual(1500, utils.to_milliseconds(1.5))
+        self.assertEqual(
+            86400000,
+            utils.to_milliseconds(
+                datetime.datetime(1970, 1, 2, tzinfo=datetime.timezone.utc)
+            ),
+        )
+
+    def test_dimensions_list(self):
+        self.assertEqual([], utils.dimensions_list(None))
+        self.assertEqual(
+            [{"name": "instance_id", "value": "i1"}],
+            utils.dimensions_list({"instance_id": "i1"}),
+        )
+        dimensions = ({"name": "instance_id", "value": "i1"},)
+        self.assertEqual(list(dimensions), utils.dimensions_list(dimensions))
+
+
+class TestFileSegment(base.TestCase):
+
+    def setUp(self):
+        super(TestFileSegment, self).setUp()
+        self.data = os.urandom(mmap.ALLOCATIONGRANULARITY * 2 + 100)
+        fd, self.filename = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.data)
+        self.addCleanup(os.remove, self.filename)
+
+    def test_read_unaligned(self):
+        offset = mmap.ALLOCATIONGRANULARITY + 7
+        segment = utils.FileSegment(self.filename, offset, 50)
+        self.addCleanup(segment.close)
+
+        self.assertEqual(50, len(segment))
+        chunk = segment.read(20)
+        self.assertIsInstance(chunk, bytes)
+        self.assertEqual(self.data[offset : offset + 20], chunk)
+        self.assertEqual(20, segment.tell())
+        self.assertEqual(self.data[offset + 20 : offset + 50], segment.read())
+        self.assertEqual(b"", segment.read())
+
+        segment.seek(0)
+        self.assertEqual(self.data[offset : offset + 50], segment.read(100))
+
+    def test_read_truncated(self):
+        segment = utils.FileSegment(self.filename, 100, 1000)
+        self.addCleanup(segment.close)
+        self.assertEqual(self.data[100:110], segment.read(10))
+
+        os.truncate(self.filename, 500)
+        self.assertRaisesRegex(IOError, "truncated", segment.read, 10)
+        self.assertRaisesRegex(IOError, "truncated", segment.md5)
+
+    def test_seek_end(self):
+        segment = utils.FileSegment(self.filename, 10, 30)
+        self.addCleanup(segment.close)
+
+        self.assertEqual(30, segment.seek(0, 2))
+        self.assertEqual(30, segment.tell())
+        self.assertEqual(b"", segment.read())
+
+    def test_md5(self):
+        segment = utils.FileSegment(self.filename, 5, len(self.data) - 5)
+        self.addCleanup(segment.close)
+
+        expected = base64.b64encode(hashlib.md5(self.data[5:]).digest()).decode()
+        self.assertEqual(expected, segment.md5(chunk_size=1000))
+
+    def test_get_file_segments(self):
+        segments = utils._get_file_segments(
+            "ep", self.filename, len(self.data), mmap.ALLOCATIONGRANULARITY
+        )
+        self.assertEqual(["ep/1", "ep/2", "ep/3"], list(segments))
+        self.assertEqual(self.data, b"".join(seg.read() for seg in segments.values()))
+        for segment in segments.values():
+            segment.close()
+
+
+class TestFileHashCache(base.TestCase):
+    def setUp(self):
+        super(TestFileHashCache, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "data")
+        self.content = os.urandom(2500)
+        with open(self.filename, "wb") as f:
+            f.write(self.content)
+        self.cache = utils.FileHashCache(os.path.join(self.tmpdir, "cache.db"))
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        self.cache.close()
+        for name in os.listdir(self.tmpdir):
+            os.remove(os.path.join(self.tmpdir, name))
+        os.rmdir(self.tmpdir)
+
+    def test_get_file_etag(self):
+        digests = b"".join(
+            hashlib.md5(self.content[i : i + 1000]).digest()
+            for i in range(0, 2500, 1000)
+        )
+        md5, etag = utils._get_file_etag(self.filename, 1000)
+        self.assertEqual(hashlib.md5(self.content).hexdigest(), md5)
+        self.assertEqual(hashlib.md5(digests).hexdigest() + "-3", etag)
+        self.assertEqual((md5, md5), utils._get_file_etag(self.filename, 4096))
+
+    def test_md5_cached(self):
+        expected = hashlib.md5(self.content).hexdigest()
+        self.assertIsNone(self.cache.get(self.filename))
+        self.assertEqual(expected, self.cache.md5(self.filename))
+        self.assertEqual(expected, self.cache.get(self.filename))
+        with mock.patch.object(utils, "_get_file_hashes") as get_hashes:
+            self.assertEqual(expected, self.cache.md5(self.filename))
+        get_hashes.assert_not_called()
+
+    def test_etag_cached(self):
+        etag = self.cache.etag(self.filename, 1000)
+        self.assertEqual(utils._get_file_etag(self.filename, 1000)[1], etag)
+        self.assertEqual(etag, self.cache.get(self.filename, 1000))
+        self.assertEqual(
+            hashlib.md5(self.content).hexdigest(), self.cache.get(self.filename)
+        )
+
+    def test_modified_file_invalidates(self):
+        self.cache.md5(self.filename)
+        st = os.stat(self.filename)
+        os.utime(self.filename, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+        self.assertIsNone(self.cache.get(self.filename))
+
+    def test_persistent(self):
+        self.cache.md5(self.filename)
+        other = utils.FileHashCache(self.cache.path)
+        self.addCleanup(other.close)
+        self.assertEqual(
+            hashlib.md5(self.content).hexdigest(), other.get(self.filename)
+        )
+
+    def test_evict_lru(self):
+        self.cache.max_entries = 10
+        for segment_size in range(1, 11):
+            self.cache.set(self.filename, str(segment_size), segment_size)
+        self.cache.get(self.filename, 1)
+        self.cache.set(self.filename, "11", 11)
+        # Evicted down to 9 entries, least recently used first
+        self.assertEqual("1", self.cache.get(self.filename, 1))
+        self.assertIsNone(self.cache.get(self.filename, 2))
+        self.assertIsNone(self.cache.get(self.filename, 3))
+        self.assertEqual("4", self.cache.get(self.filename, 4))
+        self.assertEqual("11", self.cache.get(self.filename, 11))
+
+    def test_count_only_on_eviction(self):
+        self.cache.set(self.filename, "a", 1)
+        self.cache.set(self.filename, "b", 1)
+        self.assertEqual("b", self.cache.get(self.filename, 1))
+        self.assertEqual(1, self.cache._count)
+        with mock.patch.object(self.cache, "_evict") as evict:
+            self.cache.etag(self.filename, 1000)
+        evict.assert_not_called()
+        self.assertEqual(3, self.cache._count)
+
+
+class TestMergeProducers(base.TestCase):
+
+    def _producer(self, items, error=None):
+        def produce(put, stop):
+            for item in items:
+                if not put(item):
+                    return
+            if error is not None:
+                raise error
+
+        return produce
+
+    def test_ordered(self):
+        producers = [self._producer(range(i * 10, i * 10 + 10)) for i in range(5)]
+        result = list(
+            utils.merge_producers(producers, max_workers=2, ordered=True, buffer_size=3)
+        )
+        self.assertEqual(list(range(50)), result)
+
+    def test_unordered(self):
+        producers = [self._producer(range(i * 10, i * 10 + 10)) for i in range(5)]
+        result = list(utils.merge_producers(producers, buffer_size=3))
+        self.assertEqual(list(range(50)), sorted(result))
+
+    def test_empty(self):
+        self.assertEqual([], list(utils.merge_producers([])))
+
+    def test_error(self):
+        producers = [
+            self._producer([1, 2], error=ValueError("boom")),
+            self._producer([3]),
+        ]
+        result = utils.merge_producers(producers, ordered=True)
+        # Items put before the failure are yielded first
+        self.assertEqual([1, 2], [next(result), next(result)])
+        self.assertRaises(ValueError, next, result)
+
+    def test_on_error(self):
+        errors = []
+        producers = [
+            self._producer([1], error=ValueError("boom")),
+            self._producer([2]),
+        ]
+        result = list(
+            utils.merge_producers(
+                producers, on_error=lambda i, e: errors.append((i, str(e)))
+            )
+        )
+        self.assertEqual([1, 2], sorted(result))
+        self.assertEqual([(0, "boom")], errors)
+
+    def test_timeout_and_stop(self):
+        stopped = threading.Event()
+
+        def produce(put, stop):
+            put(1)
+            if stop.wait(5):
+                stopped.set()
+
+        self.assertEqual([1], list(utils.merge_producers([produce], timeout=0.1)))
+        # Waiting producers are interrupted once the consumer stopped
+        self.assertTrue(stopped.wait(5))
+
+    def test_close_stops_producers(self):
+        produced = []
+
+        def produce(put, stop):
+            for i in range(1000):
+                if not put(i):
+                    break
+                produced.append(i)
+
+        result = utils.merge_producers([produce], buffer_size=1)
+        self.assertEqual(0, next(result))
+        result.close()
+        self.assertLess(len(produced), 1000)
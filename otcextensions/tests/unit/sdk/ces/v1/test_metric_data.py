@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import importlib
+
 from openstack.tests.unit import base
 from otcextensions.sdk.ces.v1 import metric_data
 
@@ -24,3 +26,81 @@ class TestMetricData(base.TestCase):
         self.assertFalse(sot.allow_fetch)
         self.assertFalse(sot.allow_commit)
         self.assertFalse(sot.allow_delete)
+
+
+DATAPOINTS = [
+    {"average": 1.0, "timestamp": 1556625600000, "unit": "%"},
+    {"average": 3.0, "timestamp": 1556625660000, "unit": "%"},
+    {"average": 2.0, "timestamp": 1556625720000, "unit": "%"},
+    {"average": 6.0, "timestamp": 1556625900000, "unit": "%"},
+]
+
+
+class TestMetricSeries(base.TestCase):
+
+    def setUp(self):
+        super(TestMetricSeries, self).setUp()
+        self.sot = metric_data.MetricSeries.from_datapoints(
+            "cpu_util", "average", DATAPOINTS, dimensions={"instance_id": "i1"}
+        )
+
+    def test_from_datapoints(self):
+        self.assertEqual(4, len(self.sot))
+        self.assertEqual("%", self.sot.unit)
+        self.assertEqual({"instance_id": "i1"}, self.sot.dimensions)
+        self.assertEqual(
+            [(p["timestamp"], p["average"]) for p in DATAPOINTS], list(self.sot)
+        )
+        self.assertEqual("q", self.sot.timestamps.typecode)
+        self.assertEqual("d", self.sot.values.typecode)
+
+    def test_guess_statistic(self):
+        sot = metric_data.MetricSeries.from_datapoints(
+            "cpu_util", None, [{"timestamp": 1, "max": 2, "unit": "%"}]
+        )
+        self.assertEqual("max", sot.statistic)
+        self.assertEqual([(1, 2.0)], list(sot))
+
+    def test_empty(self):
+        sot = metric_data.MetricSeries.from_datapoints("cpu_util", "average", [])
+        self.assertEqual(0, len(sot))
+        self.assertEqual(0, len(sot.downsample(300)))
+
+    def test_downsample(self):
+        sot = self.sot.downsample(300)
+        self.assertEqual([(1556625600000, 2.0), (1556625900000, 6.0)], list(sot))
+        self.assertEqual("cpu_util", sot.metric_name)
+        self.assertEqual("%", sot.unit)
+
+        self.assertEqual([3.0, 6.0], list(self.sot.downsample(300, "max").values))
+        self.assertEqual([3.0, 1.0], list(self.sot.downsample(300, "count").values))
+        self.assertEqual([2.0, 6.0], list(self.sot.downsample(300, "last").values))
+
+    def test_downsample_unsorted(self):
+        sot = metric_data.MetricSeries(
+            "m", "sum", timestamps=[120000, 0, 60000], values=[3, 1, 2]
+        )
+        self.assertEqual([(0, 3.0), (120000, 3.0)], list(sot.downsample(120, "sum")))
+
+    def test_downsample_invalid(self):
+        self.assertRaises(ValueError, self.sot.downsample, 300, "median")
+        self.assertRaises(ValueError, self.sot.downsample, 0)
+
+    def test_to_numpy(self):
+        numpy = self._import("numpy")
+        timestamps, values = self.sot.to_numpy()
+        self.assertEqual(numpy.int64, timestamps.dtype)
+        self.assertEqual([1.0, 3.0, 2.0, 6.0], values.tolist())
+
+    def test_to_pandas(self):
+        self._import("pandas")
+        series = self.sot.to_pandas()
+        self.assertEqual("cpu_util", series.name)
+        self.assertEqual(3.0, series.iloc[1])
+        self.assertEqual("UTC", str(series.index.tz))
+
+    def _import(self, name):
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            self.skipTest("%s is not installed" % name)
@@ -9,6 +9,10 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import threading
+from unittest import mock
+
+from openstack import exceptions
 from openstack.tests.unit import test_proxy_base
 from otcextensions.sdk.ces.v1 import _proxy
 from otcextensions.sdk.ces.v1 import alarm
@@ -68,6 +72,215 @@ class TestCesMetricData(TestCesProxy):
     def test_metric_data(self):
         self.verify_list(self.proxy.metric_data, metric_data.MetricData)
 
+    def test_metric_data_columnar(self):
+        self.proxy.get = mock.Mock(
+            return_value=mock.Mock(
+                status_code=200,
+                json=mock.Mock(
+                    return_value={
+                        "metric_name": "cpu_util",
+                        "datapoints": [
+                            {"average": 0.5, "timestamp": 1000, "unit": "%"},
+                            {"average": 0.7, "timestamp": 2000, "unit": "%"},
+                        ],
+                    }
+                ),
+            )
+        )
+        query = {
+            "namespace": "SYS.ECS",
+            "metric_name": "cpu_util",
+            "dim.0": "instance_id,i1",
+            "from": 0,
+            "to": 3000,
+            "period": 1,
+            "filter": "average",
+        }
+
+        result = list(self.proxy.metric_data(columnar=True, **query))
+
+        self.assertEqual(1, len(result))
+        self.assertIsInstance(result[0], metric_data.MetricSeries)
+        self.assertEqual([(1000, 0.5), (2000, 0.7)], list(result[0]))
+        self.assertEqual({"instance_id": "i1"}, result[0].dimensions)
+        self.assertEqual("average", result[0].statistic)
+        self.proxy.get.assert_called_once_with("/metric-data", params=query)
+
+
+class TestCesBatchMetricData(TestCesProxy):
+    def setUp(self):
+        super(TestCesBatchMetricData, self).setUp()
+        self.proxy.post = mock.Mock(side_effect=self._post)
+        self.metrics = [
+            {
+                "namespace": "SYS.ECS",
+                "metric_name": "cpu_util",
+                "dimensions": {"instance_id": "i%d" % i},
+            }
+            for i in range(25)
+        ]
+
+    def _post(self, url, json=None):
+        self.assertEqual("/batch-query-metric-data", url)
+        metrics = [
+            dict(
+                metric,
+                unit="%",
+                datapoints=[
+                    {
+                        json.get("filter"): float(i),
+                        "timestamp": json["from"] + 60000 * i,
+                    }
+                    for i in range(3)
+                ],
+            )
+            for metric in json["metrics"]
+        ]
+        return mock.Mock(
+            status_code=200, json=mock.Mock(return_value={"metrics": metrics})
+        )
+
+    def test_batch_metric_data(self):
+        result = list(
+            self.proxy.batch_metric_data(
+                self.metrics, 1000, 2000, period=300, filter="max", max_workers=2
+            )
+        )
+
+        self.assertEqual(
+            [{"instance_id": "i%d" % i} for i in range(25)],
+            [series.dimensions for series in result],
+        )
+        self.assertEqual(
+            [(1000000, 0.0), (1060000, 1.0), (1120000, 2.0)], list(result[0])
+        )
+        self.assertEqual("%", result[0].unit)
+        self.assertEqual("max", result[0].statistic)
+        self.assertEqual(
+            [10, 10, 5],
+            [len(c[1]["json"]["metrics"]) for c in self.proxy.post.call_args_list],
+        )
+        body = self.proxy.post.call_args_list[0][1]["json"]
+        self.assertEqual(
+            {"from": 1000000, "to": 2000000, "period": "300", "filter": "max"},
+            {k: v for k, v in body.items() if k != "metrics"},
+        )
+        self.assertEqual(
+            [{"name": "instance_id", "value": "i0"}], body["metrics"][0]["dimensions"]
+        )
+
+    def test_batch_metric_data_error(self):
+        self.proxy.post.side_effect = [
+            self._post("/batch-query-metric-data", json={"from": 0, "metrics": []}),
+            mock.Mock(status_code=400, headers={}, json=mock.Mock(return_value={})),
+            self._post("/batch-query-metric-data", json={"from": 0, "metrics": []}),
+        ]
+
+        self.assertRaises(
+            exceptions.HttpException,
+            list,
+            self.proxy.batch_metric_data(self.metrics, 0, 1, max_workers=1),
+        )
+
+
+class TestCesCreateMetricData(TestCesProxy):
+    def test_create_metric_data(self):
+        self.proxy.post = mock.Mock(return_value=mock.Mock(status_code=200))
+        data = [{"metric": {"namespace": "MINE.APP"}, "value": 1}]
+
+        self.assertIsNone(self.proxy.create_metric_data(data))
+        self.proxy.post.assert_called_once_with("/metric-data", json=data)
+
+
+class TestCesMetricPublisher(TestCesProxy):
+    def setUp(self):
+        super(TestCesMetricPublisher, self).setUp()
+        self.proxy.create_metric_data = mock.Mock()
+
+    def _sent(self):
+        return [
+            point
+            for call in self.proxy.create_metric_data.call_args_list
+            for point in call[0][0]
+        ]
+
+    def test_batches(self):
+        with self.proxy.metric_publisher(batch_size=3, ttl=3600) as publisher:
+            for i in range(7):
+                publisher.add(
+                    "MINE.APP",
+                    "requests",
+                    i,
+                    dimensions={"instance_id": "i1"},
+                    unit="count/s",
+                    value_type="int",
+                    collect_time=100 + i,
+                )
+
+        self.assertEqual(
+            [3, 3, 1],
+            [len(c[0][0]) for c in self.proxy.create_metric_data.call_args_list],
+        )
+        self.assertEqual(
+            {
+                "metric": {
+                    "namespace": "MINE.APP",
+                    "metric_name": "requests",
+                    "dimensions": [{"name": "instance_id", "value": "i1"}],
+                },
+                "ttl": 3600,
+                "collect_time": 100000,
+                "value": 0,
+                "unit": "count/s",
+                "type": "int",
+            },
+            self._sent()[0],
+        )
+        self.assertEqual(7, publisher.sent)
+
+    def test_aggregate(self):
+        publisher = self.proxy.metric_publisher(aggregate="average")
+        for i in range(4):
+            publisher.add("MINE.APP", "latency", i, {"host": "a"}, collect_time=i)
+        publisher.add("MINE.APP", "latency", 10, {"host": "b"}, collect_time=5)
+        publisher.close()
+
+        points = self._sent()
+        self.assertEqual(
+            [
+                ({"name": "host", "value": "a"}, 1.5, 3000),
+                ({"name": "host", "value": "b"}, 10, 5000),
+            ],
+            [
+                (p["metric"]["dimensions"][0], p["value"], p["collect_time"])
+                for p in points
+            ],
+        )
+        self.assertRaises(exceptions.SDKException, publisher.add, "N", "m", 1)
+
+    def test_invalid_aggregate(self):
+        self.assertRaises(ValueError, self.proxy.metric_publisher, aggregate="median")
+
+    def test_interval(self):
+        sent = threading.Event()
+        self.proxy.create_metric_data.side_effect = lambda data: sent.set()
+        publisher = self.proxy.metric_publisher(flush_interval=0.01)
+        publisher.add("MINE.APP", "requests", 1)
+
+        # Sent without flushing
+        self.assertTrue(sent.wait(5))
+        publisher.close()
+        self.assertEqual(1, publisher.sent)
+
+    def test_error(self):
+        self.proxy.create_metric_data.side_effect = exceptions.SDKException("boom")
+        publisher = self.proxy.metric_publisher()
+        publisher.add("MINE.APP", "requests", 1)
+
+        self.assertRaises(exceptions.SDKException, publisher.flush)
+        self.assertEqual(1, publisher.failed)
+        publisher.close()
+
 
 class TestCesQuota(TestCesProxy):
     def test_quotas(self):
@@ -9,8 +9,15 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import datetime
+import gzip
+import json
+import os
+from unittest import mock
 
+import fixtures
 
+from openstack import exceptions
 from openstack.tests.unit import test_proxy_base
 from otcextensions.sdk.ctsv3.v3 import _proxy
 from otcextensions.sdk.ctsv3.v3 import key_event as _key_event
@@ -51,6 +58,69 @@ class TestTraces(TestCTSv3Proxy):
         self.verify_list(self.proxy.traces, _trace.Trace)
 
 
+class TestTracesBetween(TestCTSv3Proxy):
+    def setUp(self):
+        super(TestTracesBetween, self).setUp()
+        # One trace every 10 minutes
+        self.times = list(range(0, 7200000, 600000))
+        self.proxy._list = mock.Mock(side_effect=self._list)
+
+    def _list(self, resource_type, **query):
+        self.assertEqual(_trace.Trace, resource_type)
+        for t in self.times:
+            if query["from"] <= t <= query["to"]:
+                yield _trace.Trace(time=t, trace_id="t%d" % t)
+
+    def test_windows(self):
+        traces = list(
+            self.proxy.traces_between(0, 7200, window=1800, trace_type="data")
+        )
+
+        self.assertEqual(self.times, [t.time for t in traces])
+        self.assertEqual(4, self.proxy._list.call_count)
+        self.proxy._list.assert_any_call(
+            _trace.Trace,
+            trace_type="data",
+            limit=200,
+            **{"from": 1800000, "to": 3599999}
+        )
+
+    def test_datetime_range(self):
+        start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        self.times = [int(start.timestamp() * 1000) + 1000]
+        traces = list(
+            self.proxy.traces_between(start, start + datetime.timedelta(hours=1))
+        )
+
+        self.assertEqual(self.times, [t.time for t in traces])
+
+    def test_error(self):
+        def fail(resource_type, **query):
+            if query["from"] >= 3600000:
+                raise exceptions.SDKException("boom")
+            return self._list(resource_type, **query)
+
+        self.proxy._list.side_effect = fail
+        traces = self.proxy.traces_between(0, 7200, window=1800)
+
+        # Traces of the windows before the failing one are returned first
+        self.assertEqual(self.times[:6], [next(traces).time for _ in range(6)])
+        self.assertRaises(exceptions.SDKException, list, traces)
+
+    def test_export(self):
+        tmp = self.useFixture(fixtures.TempDir()).path
+        for name, opener in (("traces.jsonl", open), ("traces.jsonl.gz", gzip.open)):
+            filename = os.path.join(tmp, name)
+            result = self.proxy.export_traces(filename, 0, 7200, window=1800)
+
+            self.assertEqual(len(self.times), result["traces"])
+            with opener(filename, "rt") as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual(self.times, [line["time"] for line in lines])
+            self.assertEqual("t0", lines[0]["trace_id"])
+        self.assertEqual(["traces.jsonl", "traces.jsonl.gz"], sorted(os.listdir(tmp)))
+
+
 class TestTracker(TestCTSv3Proxy):
     def test_tracker_list(self):
         self.verify_list(self.proxy.trackers, _tracker.Tracker)
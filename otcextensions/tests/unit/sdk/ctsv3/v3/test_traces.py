@@ -10,6 +10,9 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from unittest import mock
+
+from openstack import proxy
 from openstack.tests.unit import base
 from otcextensions.sdk.ctsv3.v3 import trace
 
@@ -44,3 +47,32 @@ class TestTrace(base.TestCase):
         sot = trace.Trace(**EXAMPLE)
         self.assertEqual(EXAMPLE["time"], sot.time)
         self.assertEqual(EXAMPLE["user"]["name"], sot.user.name)
+
+    def test_list_follows_marker(self):
+        pages = [
+            {
+                "traces": [dict(EXAMPLE, trace_id="t1"), dict(EXAMPLE, trace_id="t2")],
+                "meta_data": {"count": 2, "marker": "t2"},
+            },
+            {
+                "traces": [dict(EXAMPLE, trace_id="t3")],
+                "meta_data": {"count": 1, "marker": None},
+            },
+        ]
+        sess = mock.Mock(spec=proxy.Proxy)
+        sess.default_microversion = None
+        sess.get.side_effect = [
+            mock.Mock(status_code=200, json=mock.Mock(return_value=page))
+            for page in pages
+        ]
+
+        result = list(trace.Trace.list(sess, trace_type="system", limit=2))
+
+        self.assertEqual(["t1", "t2", "t3"], [t.trace_id for t in result])
+        self.assertEqual(
+            [
+                {"trace_type": "system", "limit": 2},
+                {"trace_type": "system", "limit": 2, "next": "t2"},
+            ],
+            [call[1]["params"] for call in sess.get.call_args_list],
+        )
@@ -9,11 +9,19 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import base64
+import os
+import tempfile
+import threading
 
+import mock
+
+from openstack import exceptions
 from openstack.tests.unit import test_proxy_base
 from otcextensions.sdk.dis.v2 import _proxy
 from otcextensions.sdk.dis.v2 import app
 from otcextensions.sdk.dis.v2 import checkpoint
+from otcextensions.sdk.dis.v2 import data as data_mod
 from otcextensions.sdk.dis.v2 import dump_task
 from otcextensions.sdk.dis.v2 import stream
 
@@ -188,3 +196,357 @@ class TestDumpTask(TestDisProxy):
             method_args=["test-stream"],
             expected_args=[self.proxy, "test-stream", "stop"],
         )
+
+
+class TestUploadRecords(TestDisProxy):
+
+    def setUp(self):
+        super(TestUploadRecords, self).setUp()
+        self.requests = []
+        self.rejected = set()
+        self.lock = threading.Lock()
+        self.proxy.post = mock.Mock(side_effect=self._post)
+        patcher = mock.patch.object(_proxy.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, url, json=None):
+        self.assertEqual("/records", url)
+        with self.lock:
+            self.requests.append(json)
+        records = []
+        for record in json["records"]:
+            data = record["data"]
+            if data in self.rejected:
+                self.rejected.discard(data)
+                records.append({"error_code": "DIS.4303", "error_message": "throttled"})
+            else:
+                records.append({"partition_id": "0", "sequence_number": "1"})
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {
+            "failed_record_count": sum(1 for r in records if "error_code" in r),
+            "records": records,
+        }
+        return response
+
+    def _sent(self):
+        return [r["data"] for body in self.requests for r in body["records"]]
+
+    def test_batches_by_count(self):
+        records = (b"%04d" % i for i in range(1200))
+        result = self.proxy.upload_records(
+            "stream", records, batch_records=100, max_concurrency=3
+        )
+
+        self.assertEqual(1200, result["records"])
+        self.assertEqual([], result["failed"])
+        self.assertEqual(12, len(self.requests))
+        self.assertTrue(all(len(r["records"]) == 100 for r in self.requests))
+        expected = {base64.b64encode(b"%04d" % i).decode() for i in range(1200)}
+        self.assertEqual(expected, set(self._sent()))
+        self.assertEqual(sum(len(d) for d in expected), result["bytes"])
+        self.assertIn("records_per_second", result)
+
+    def test_batches_by_size(self):
+        records = [{"data": "x" * 30} for _ in range(10)]
+        self.proxy.upload_records(
+            "stream", records, encoded=True, batch_bytes=100, max_concurrency=1
+        )
+        self.assertEqual([3, 3, 3, 1], [len(r["records"]) for r in self.requests])
+
+    def test_partition_order(self):
+        records = [
+            {"data": "%s-%03d" % (key, i), "partition_key": key}
+            for i in range(100)
+            for key in ("a", "b", "c")
+        ]
+        self.proxy.upload_records(
+            "stream", records, encoded=True, batch_records=7, max_concurrency=4
+        )
+        for key in ("a", "b", "c"):
+            sent = [d for d in self._sent() if d.startswith(key)]
+            self.assertEqual(["%s-%03d" % (key, i) for i in range(100)], sent)
+        # a batch holds records of a single lane
+        for body in self.requests:
+            keys = {r["partition_key"] for r in body["records"]}
+            self.assertTrue(len(keys) <= 3)
+        self.assertEqual("stream", self.requests[0]["stream_name"])
+        self.assertNotIn("stream_id", self.requests[0])
+
+    def test_retry_rejected(self):
+        self.rejected = {"r1", "r3"}
+        result = self.proxy.upload_records(
+            "stream", ["r0", "r1", "r2", "r3"], stream_id="sid", encoded=True
+        )
+
+        self.assertEqual(4, result["records"])
+        self.assertEqual(2, len(self.requests))
+        self.assertEqual([{"data": "r1"}, {"data": "r3"}], self.requests[1]["records"])
+        self.assertEqual("sid", self.requests[1]["stream_id"])
+        self.sleep.assert_called_once()
+
+    def test_retry_exhausted(self):
+        self.rejected = {"r1"}
+        result = self.proxy.upload_records(
+            "stream", ["r0", "r1"], encoded=True, max_retries=0
+        )
+
+        self.assertEqual(1, result["records"])
+        self.assertEqual(
+            [
+                {
+                    "data": "r1",
+                    "error_code": "DIS.4303",
+                    "error_message": "throttled",
+                }
+            ],
+            result["failed"],
+        )
+
+    def test_retry_keeps_partition_order(self):
+        self.rejected = {"a1"}
+        records = [
+            {"data": "a0", "partition_key": "a"},
+            {"data": "a1", "partition_key": "a"},
+            {"data": "b0", "partition_key": "b"},
+            {"data": "a2", "partition_key": "a"},
+        ]
+        result = self.proxy.upload_records(
+            "stream", records, encoded=True, max_concurrency=1
+        )
+
+        self.assertEqual(4, result["records"])
+        # a2 was written, but is sent again after a1
+        self.assertEqual([records[1], records[3]], self.requests[1]["records"])
+
+    def test_truncated_response(self):
+        post = self._post
+
+        def truncated(url, json=None):
+            response = post(url, json=json)
+            results = response.json.return_value["records"]
+            if len(self.requests) == 1:
+                del results[1:]
+            return response
+
+        self.proxy.post = mock.Mock(side_effect=truncated)
+        result = self.proxy.upload_records(
+            "stream", ["r0", "r1", "r2"], encoded=True, max_concurrency=1
+        )
+
+        self.assertEqual(3, result["records"])
+        self.assertEqual([], result["failed"])
+        self.assertEqual([{"data": "r1"}, {"data": "r2"}], self.requests[1]["records"])
+
+    def test_truncated_response_exhausted(self):
+        post = self._post
+
+        def truncated(url, json=None):
+            response = post(url, json=json)
+            del response.json.return_value["records"][1:]
+            return response
+
+        self.proxy.post = mock.Mock(side_effect=truncated)
+        result = self.proxy.upload_records(
+            "stream", ["r0", "r1"], encoded=True, max_retries=0
+        )
+
+        self.assertEqual(1, result["records"])
+        self.assertEqual(["r1"], [r["data"] for r in result["failed"]])
+        self.assertEqual("MissingResult", result["failed"][0]["error_code"])
+
+    def test_error(self):
+        response = mock.Mock(status_code=400, headers={})
+        response.json.return_value = {"error_code": "DIS.4200"}
+        self.proxy.post = mock.Mock(return_value=response)
+        result = self.proxy.upload_records(
+            "stream", ["a", "b"], encoded=True, batch_records=1, max_concurrency=1
+        )
+
+        # Failed batches are reported without aborting the upload
+        self.assertEqual(0, result["records"])
+        self.assertEqual(["a", "b"], [r["data"] for r in result["failed"]])
+        self.assertEqual("400", result["failed"][0]["error_code"])
+        self.assertEqual(2, self.proxy.post.call_count)
+
+    def test_missing_data(self):
+        self.assertRaises(
+            ValueError, self.proxy.upload_records, "stream", [{"partition_key": "a"}]
+        )
+
+    def test_filename(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("data,partition_key\nfoo,a\nbar,\n")
+        self.addCleanup(os.remove, f.name)
+        self.proxy.upload_records("stream", filename=f.name, max_concurrency=1)
+
+        self.assertEqual(
+            sorted(
+                [
+                    {"data": base64.b64encode(b"foo").decode(), "partition_key": "a"},
+                    {"data": base64.b64encode(b"bar").decode()},
+                ],
+                key=str,
+            ),
+            sorted([r for body in self.requests for r in body["records"]], key=str),
+        )
+
+
+class TestConsumeRecords(TestDisProxy):
+
+    def setUp(self):
+        super(TestConsumeRecords, self).setUp()
+        self.data = {
+            "shardId-0": ["a%d" % i for i in range(7)],
+            "shardId-1": ["b%d" % i for i in range(5)],
+        }
+        self.checkpoints = {}
+        self.expire = set()
+        self.proxy.get_stream = mock.Mock(
+            return_value=stream.Stream(
+                partitions=[
+                    {"partition_id": "shardId-0", "status": "ACTIVE"},
+                    {"partition_id": "shardId-1", "status": "ACTIVE"},
+                    {"partition_id": "shardId-2", "status": "EXPIRED"},
+                ]
+            )
+        )
+        self.proxy.get_data_cursor = mock.Mock(side_effect=self._get_cursor)
+        self.proxy.get_checkpoint = mock.Mock(side_effect=self._get_checkpoint)
+        self.proxy.create_checkpoint = mock.Mock()
+        self.proxy.get = mock.Mock(side_effect=self._get)
+
+    def _get_cursor(self, stream_name, partition_id, **params):
+        start = 0
+        if params["cursor-type"] == "AFTER_SEQUENCE_NUMBER":
+            start = int(params["starting-sequence-number"]) + 1
+        return mock.Mock(partition_cursor="%s:%d" % (partition_id, start))
+
+    def _get_checkpoint(self, stream_name, app_name, partition_id):
+        return mock.Mock(sequence_number=self.checkpoints.get(partition_id, "-1"))
+
+    def _get(self, url, params=None):
+        self.assertEqual("/records", url)
+        cursor = params["partition-cursor"]
+        response = mock.Mock(status_code=200)
+        if cursor in self.expire:
+            self.expire.discard(cursor)
+            response.status_code = 400
+            response.headers = {}
+            response.json.return_value = {"errorCode": "DIS.4319"}
+            return response
+        partition_id, start = cursor.split(":")
+        start = int(start)
+        records = [
+            {"sequence_number": str(i), "data": data}
+            for i, data in enumerate(self.data[partition_id])
+        ][start : start + 3]
+        response.json.return_value = {
+            "records": records,
+            "next_partition_cursor": "%s:%d" % (partition_id, start + len(records)),
+        }
+        return response
+
+    def _consume(self, **kwargs):
+        kwargs.setdefault("idle_timeout", 0.2)
+        kwargs.setdefault("poll_interval", 0.01)
+        return self.proxy.consume_records("stream", **kwargs)
+
+    def test_consume(self):
+        records = list(self._consume())
+
+        for partition_id, data in self.data.items():
+            self.assertEqual(
+                data, [r.data for r in records if r.partition_id == partition_id]
+            )
+        self.assertEqual(
+            data_mod.Record("shardId-1", "4", "b4", None, None),
+            [r for r in records if r.partition_id == "shardId-1"][-1],
+        )
+        self.proxy.get_data_cursor.assert_any_call(
+            "stream", "shardId-0", **{"cursor-type": "TRIM_HORIZON"}
+        )
+        self.proxy.create_checkpoint.assert_not_called()
+
+    def test_checkpoints(self):
+        self.checkpoints = {"shardId-0": "4"}
+        records = list(self._consume(app_name="app", checkpoint_interval=0))
+
+        self.assertEqual(
+            ["a5", "a6"], [r.data for r in records if r.partition_id == "shardId-0"]
+        )
+        self.proxy.create_checkpoint.assert_any_call(
+            stream_name="stream",
+            app_name="app",
+            partition_id="shardId-0",
+            sequence_number="6",
+        )
+        self.proxy.create_checkpoint.assert_any_call(
+            stream_name="stream",
+            app_name="app",
+            partition_id="shardId-1",
+            sequence_number="4",
+        )
+
+    def test_checkpoint_at_least_once(self):
+        consumer = self._consume(
+            app_name="app", partitions=["shardId-0"], checkpoint_interval=3600
+        )
+        self.assertEqual("a0", next(consumer).data)
+        self.assertEqual("a1", next(consumer).data)
+        consumer.close()
+
+        # a1 was not acknowledged by requesting the next record
+        self.proxy.create_checkpoint.assert_called_once_with(
+            stream_name="stream",
+            app_name="app",
+            partition_id="shardId-0",
+            sequence_number="0",
+        )
+
+    def test_cursor_expired(self):
+        self.expire = {"shardId-0:3"}
+        records = list(self._consume(partitions=["shardId-0"]))
+
+        self.assertEqual(self.data["shardId-0"], [r.data for r in records])
+        self.proxy.get_data_cursor.assert_any_call(
+            "stream",
+            "shardId-0",
+            **{
+                "cursor-type": "AFTER_SEQUENCE_NUMBER",
+                "starting-sequence-number": "2",
+            }
+        )
+
+    def test_cursor_expired_before_first_record(self):
+        for cursor_type, refresh in (
+            ("TRIM_HORIZON", {"cursor-type": "TRIM_HORIZON"}),
+            ("LATEST", {"cursor-type": "AT_TIMESTAMP", "timestamp": mock.ANY}),
+        ):
+            self.expire = {"shardId-0:0"}
+            self.proxy.get_data_cursor.reset_mock()
+            list(self._consume(partitions=["shardId-0"], cursor_type=cursor_type))
+
+            self.assertEqual(
+                [
+                    mock.call("stream", "shardId-0", **{"cursor-type": cursor_type}),
+                    mock.call("stream", "shardId-0", **refresh),
+                ],
+                self.proxy.get_data_cursor.call_args_list,
+            )
+
+    def test_http_error_not_refreshed(self):
+        response = mock.Mock(status_code=403, headers={})
+        response.json.return_value = {"errorCode": "DIS.4201"}
+        self.proxy.get = mock.Mock(return_value=response)
+
+        self.assertRaises(
+            exceptions.HttpException, list, self._consume(partitions=["shardId-0"])
+        )
+        self.proxy.get_data_cursor.assert_called_once()
+
+    def test_error(self):
+        self.proxy.get_data_cursor = mock.Mock(
+            side_effect=exceptions.HttpException("boom")
+        )
+        self.assertRaises(exceptions.HttpException, list, self._consume())
@@ -9,8 +9,10 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import threading
 from unittest import mock
 
+from openstack import exceptions
 from openstack.tests.unit import test_proxy_base
 from otcextensions.sdk.dms.v1 import _proxy
 from otcextensions.sdk.dms.v1 import az as _az
@@ -293,3 +295,118 @@ class TestDMSProxy(test_proxy_base.TestProxyBase):
 
     def test_mws(self):
         self.verify_list(self.proxy.maintenance_windows, _mw.MaintenanceWindow)
+
+
+class TestMessageProducer(test_proxy_base.TestProxyBase):
+    def setUp(self):
+        super(TestMessageProducer, self).setUp()
+        self.proxy = _proxy.Proxy(self.session)
+        self.proxy.post = mock.Mock(return_value=mock.Mock(status_code=200))
+
+    def _sent(self):
+        return [call[1]["json"]["messages"] for call in self.proxy.post.call_args_list]
+
+    def test_batches(self):
+        with self.proxy.message_producer("qid", batch_messages=4) as producer:
+            for i in range(10):
+                producer.send("m%d" % i, attributes={"i": i})
+
+        batches = self._sent()
+        self.assertEqual([4, 4, 2], sorted(map(len, batches), reverse=True))
+        self.assertEqual(
+            {"body": "m0", "attributes": {"i": 0}},
+            min((m for b in batches for m in b), key=lambda m: m["attributes"]["i"]),
+        )
+        self.assertEqual(10, producer.sent)
+        for call in self.proxy.post.call_args_list:
+            self.assertEqual("/queues/qid/messages", call[0][0])
+            self.assertFalse(call[1]["json"]["returnId"])
+
+    def test_batch_bytes(self):
+        producer = self.proxy.message_producer("qid", batch_bytes=40)
+        producer.send_messages(
+            [{"body": "x" * 10}, _message.Message(body="y" * 10), {"body": "z"}]
+        )
+        producer.close()
+
+        self.assertEqual(3, sum(map(len, self._sent())))
+        self.assertTrue(all(len(b) < 3 for b in self._sent()))
+
+    def test_linger(self):
+        posted = threading.Event()
+        self.proxy.post.side_effect = lambda *args, **kwargs: (
+            posted.set() or mock.Mock(status_code=200)
+        )
+        producer = self.proxy.message_producer("qid", linger=0.01)
+        producer.send("m")
+
+        # Sent without flushing
+        self.assertTrue(posted.wait(5))
+        producer.close()
+        self.assertEqual(1, producer.sent)
+        self.assertEqual(1, self.proxy.post.call_count)
+
+    def test_error(self):
+        self.proxy.post.return_value = mock.Mock(
+            status_code=500, headers={}, json=mock.Mock(return_value={})
+        )
+        producer = self.proxy.message_producer("qid")
+        producer.send("m")
+
+        self.assertRaises(exceptions.HttpException, producer.flush)
+        self.assertEqual(1, producer.failed)
+        producer.close()
+        self.assertRaises(exceptions.SDKException, producer.send, "m")
+
+
+class TestConsumeMessages(test_proxy_base.TestProxyBase):
+    def setUp(self):
+        super(TestConsumeMessages, self).setUp()
+        self.proxy = _proxy.Proxy(self.session)
+        self.batches = [
+            [{"handler": "h%d" % i, "message": {"body": "m%d" % i}} for i in range(3)],
+            [{"handler": "h3", "message": {"body": "m3"}}],
+        ]
+        self.proxy.get = mock.Mock(side_effect=self._get)
+        self.proxy.post = mock.Mock(return_value=mock.Mock(status_code=200))
+
+    def _get(self, uri, headers=None, params=None):
+        self.assertEqual("/queues/qid/groups/gid/messages", uri)
+        response = mock.Mock(status_code=200)
+        response.json.return_value = self.batches.pop(0) if self.batches else []
+        return response
+
+    def _acked(self):
+        return [
+            [m["handler"] for m in call[1]["json"]["message"]]
+            for call in self.proxy.post.call_args_list
+        ]
+
+    def test_consume(self):
+        messages = list(
+            self.proxy.consume_messages(
+                "qid", "gid", time_wait=5, idle_timeout=0, poll_interval=0
+            )
+        )
+
+        self.assertEqual(["m0", "m1", "m2", "m3"], [m.body for m in messages])
+        self.assertEqual("h0", messages[0].id)
+        self.assertEqual([["h0", "h1", "h2"], ["h3"]], self._acked())
+        self.proxy.post.assert_called_with(
+            "queues/qid/groups/gid/ack",
+            json={"message": [{"handler": "h3", "status": "success"}]},
+        )
+        self.proxy.get.assert_called_with(
+            "/queues/qid/groups/gid/messages",
+            headers={"Accept": "application/json"},
+            params={"max_msgs": 10, "time_wait": 5},
+        )
+
+    def test_close(self):
+        consumer = self.proxy.consume_messages("qid", "gid")
+        next(consumer)
+        next(consumer)
+        consumer.close()
+
+        # The last message handed out is not acknowledged
+        self.assertEqual([["h0"]], self._acked())
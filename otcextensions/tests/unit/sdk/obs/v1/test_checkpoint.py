@@ -0,0 +1,55 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import os
+import tempfile
+
+from openstack.tests.unit import base
+from otcextensions.sdk.obs.v1 import _checkpoint
+
+
+class TestUploadCheckpoint(base.TestCase):
+
+    def setUp(self):
+        super(TestUploadCheckpoint, self).setUp()
+        tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(tmp_dir, "upload.json")
+        self.addCleanup(os.rmdir, tmp_dir)
+
+    def test_journal(self):
+        sot = _checkpoint.UploadCheckpoint(self.path)
+        self.assertFalse(sot.load(url="u"))
+
+        sot.start("UID", url="u", file_size=10)
+        sot.add_part(2, '"etag2"')
+
+        loaded = _checkpoint.UploadCheckpoint(self.path)
+        self.assertTrue(loaded.load(url="u", file_size=10))
+        self.assertEqual("UID", loaded.upload_id)
+        self.assertEqual({2: '"etag2"'}, loaded.parts)
+
+        loaded.remove()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_load_mismatch(self):
+        _checkpoint.UploadCheckpoint(self.path).start("UID", url="u", file_size=10)
+        self.addCleanup(os.remove, self.path)
+
+        sot = _checkpoint.UploadCheckpoint(self.path)
+        self.assertFalse(sot.load(url="u", file_size=11))
+        self.assertIsNone(sot.upload_id)
+
+    def test_load_corrupted(self):
+        with open(self.path, "w") as f:
+            f.write("{broken")
+        self.addCleanup(os.remove, self.path)
+
+        self.assertFalse(_checkpoint.UploadCheckpoint(self.path).load())
@@ -66,7 +66,9 @@ class TestContainer(base.TestCase):
 
         mock_response = mock.Mock()
         mock_response.status_code = 200
-        mock_response.content = EXAMPLE_LIST
+        mock_response.iter_content.return_value = [
+            EXAMPLE_LIST[i : i + 64] for i in range(0, len(EXAMPLE_LIST), 64)
+        ]
 
         self.sess.get.return_value = mock_response
 
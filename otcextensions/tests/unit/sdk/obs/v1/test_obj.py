@@ -11,11 +11,14 @@
 # under the License.
 import base64
 import hashlib
+import io
+import time
 from collections import namedtuple
 
 import mock
 from keystoneauth1 import adapter
 
+from openstack import exceptions
 from openstack.tests.unit import base
 from otcextensions.sdk.obs.v1 import obj
 
@@ -74,6 +77,26 @@ COMPLETE_MPU_RESP = (
     "</CompleteMultipartUpload>"
 )
 
+DELETE_RESP = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<DeleteResult xmlns="http://obs.otc.t-systems.com/doc/2016-01-01/">
+<Error><Key>b</Key><Code>AccessDenied</Code><Message>Access Denied</Message>
+</Error></DeleteResult>
+"""
+
+EXAMPLE_PREFIXES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<ListBucketResult xmlns="http://obs.otc.t-systems.com/doc/2016-01-01/">
+<Name>ag-test-v1</Name><Prefix></Prefix><Marker></Marker>
+<MaxKeys>2</MaxKeys><Delimiter>/</Delimiter><IsTruncated>%s</IsTruncated>
+<CommonPrefixes><Prefix>%s</Prefix></CommonPrefixes>
+<CommonPrefixes><Prefix>%s</Prefix></CommonPrefixes>
+</ListBucketResult>
+"""
+
+
+def _chunks(data, size=64):
+    data = data.encode()
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
 
 class TestObject(base.TestCase):
 
@@ -106,7 +129,7 @@ class TestObject(base.TestCase):
 
         mock_response = mock.Mock()
         mock_response.status_code = 200
-        mock_response.content = EXAMPLE_LIST
+        mock_response.iter_content.return_value = _chunks(EXAMPLE_LIST)
 
         self.sess.get.return_value = mock_response
 
@@ -121,6 +144,93 @@ class TestObject(base.TestCase):
         self.assertEqual("9c24605289b49ad77a51ba7986425158", result[0].etag)
         self.assertEqual(1030, result[0].content_length)
 
+    def test_list_truncated(self):
+        sot = obj.Object()
+
+        page1 = mock.Mock(status_code=200)
+        page1.iter_content.return_value = _chunks(
+            EXAMPLE_LIST.replace(
+                "<IsTruncated>false</IsTruncated>", "<IsTruncated>true</IsTruncated>"
+            )
+        )
+        page2 = mock.Mock(status_code=200)
+        page2.iter_content.return_value = _chunks(
+            EXAMPLE_LIST.replace("setup.py", "setup.cfg")
+        )
+
+        for prefetch in (True, False):
+            self.sess.get.reset_mock()
+            self.sess.get.side_effect = [page1, page2]
+
+            result = list(sot.list(self.sess, prefetch=prefetch))
+
+            self.assertEqual(["setup.py", "setup.cfg"], [o.name for o in result])
+            self.assertEqual(
+                {"marker": "setup.py"}, self.sess.get.call_args_list[1][1]["params"]
+            )
+            self.assertTrue(self.sess.get.call_args_list[1][1]["stream"])
+
+    def test_list_prefetch(self):
+        sot = obj.Object()
+
+        page1 = mock.Mock(status_code=200)
+        page1.iter_content.return_value = _chunks(
+            EXAMPLE_LIST.replace(
+                "<IsTruncated>false</IsTruncated>",
+                "<NextMarker>next</NextMarker><IsTruncated>true</IsTruncated>",
+            )
+        )
+        page2 = mock.Mock(status_code=200)
+        page2.iter_content.return_value = _chunks(EXAMPLE_LIST)
+        self.sess.get.side_effect = [page1, page2]
+
+        result = sot.list(self.sess, prefetch=True)
+        self.assertEqual("setup.py", next(result).name)
+        # The second page is fetched while the first one is consumed
+        for _ in range(100):
+            if page2.close.called:
+                break
+            time.sleep(0.01)
+        page2.close.assert_called_once_with()
+        self.assertEqual(
+            {"marker": "next"}, self.sess.get.call_args_list[1][1]["params"]
+        )
+        self.assertEqual(1, len(list(result)))
+
+    def test_list_common_prefixes(self):
+        page1 = mock.Mock(status_code=200)
+        page1.iter_content.return_value = _chunks(
+            EXAMPLE_PREFIXES % ("true", "a/", "b/")
+        )
+        page2 = mock.Mock(status_code=200)
+        page2.iter_content.return_value = _chunks(
+            EXAMPLE_PREFIXES % ("false", "c/", "d/")
+        )
+        self.sess.get.side_effect = [page1, page2]
+
+        result = obj.Object.list_common_prefixes(
+            self.sess, requests_auth="auth", prefix="p"
+        )
+
+        self.assertEqual(["a/", "b/", "c/", "d/"], result)
+        self.assertEqual(
+            [
+                {"delimiter": "/", "prefix": "p"},
+                {"delimiter": "/", "prefix": "p", "marker": "b/"},
+            ],
+            [c[1]["params"] for c in self.sess.get.call_args_list],
+        )
+
+    def test_list_error(self):
+        sot = obj.Object()
+
+        mock_response = mock.Mock(status_code=404, headers={}, content=b"")
+        mock_response.reason = "Not Found"
+        self.sess.get.return_value = mock_response
+
+        self.assertRaises(exceptions.NotFoundException, list, sot.list(self.sess))
+        mock_response.close.assert_called_once_with()
+
     def test_create(self):
         data = "some test data"
         md5 = hashlib.md5()
@@ -145,6 +255,91 @@ class TestObject(base.TestCase):
             headers={"Content-MD5": data_md5},
         )
 
+    def test_create_bytes(self):
+        data = b"some test data"
+        data_md5 = base64.b64encode(hashlib.md5(data).digest()).decode()
+        sot = obj.Object(name="test-v1", data=data)
+
+        mock_response = mock.Mock()
+        mock_response.status_code = 200
+        mock_response.content = ""
+        mock_response.headers = {}
+
+        self.sess.put.return_value = mock_response
+
+        sot.create(self.sess)
+
+        self.sess.put.assert_called_once_with(
+            "/test-v1",
+            data=data,
+            headers={"Content-MD5": data_md5},
+        )
+
+    def test_stream(self):
+        sot = obj.Object(name="test-v1")
+
+        mock_response = mock.Mock()
+        mock_response.status_code = 206
+        mock_response.iter_content.return_value = iter([b"ab", b"cd"])
+
+        self.sess.get.return_value = mock_response
+
+        result = list(
+            sot.stream(
+                self.sess,
+                chunk_size=2,
+                start=10,
+                end=13,
+                endpoint_override="epo",
+                requests_auth=2,
+            )
+        )
+
+        self.assertEqual([b"ab", b"cd"], result)
+        self.sess.get.assert_called_once_with(
+            "/test-v1",
+            stream=True,
+            endpoint_override="epo",
+            requests_auth=2,
+            headers={"Range": "bytes=10-13"},
+        )
+        mock_response.iter_content.assert_called_once_with(chunk_size=2)
+        mock_response.close.assert_called_once_with()
+
+    def test_download_file_like(self):
+        sot = obj.Object(name="test-v1")
+
+        mock_response = mock.Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {"ETag": '"etag"', "Content-Length": "4"}
+        mock_response.iter_content.return_value = iter([b"ab", b"cd"])
+
+        self.sess.get.return_value = mock_response
+
+        out = io.BytesIO()
+        sot.download(self.sess, filename=out, chunk_size=2)
+
+        self.assertEqual(b"abcd", out.getvalue())
+        self.assertEqual(4, sot.object_size)
+        self.sess.get.assert_called_once_with("/test-v1", stream=True)
+        mock_response.iter_content.assert_called_once_with(chunk_size=2)
+        mock_response.close.assert_called_once_with()
+
+    def test_stream_error(self):
+        sot = obj.Object(name="test-v1")
+
+        mock_response = mock.Mock()
+        mock_response.status_code = 404
+        mock_response.headers = {}
+        mock_response.content = b""
+        mock_response.reason = "Not Found"
+
+        self.sess.get.return_value = mock_response
+
+        self.assertRaises(exceptions.NotFoundException, list, sot.stream(self.sess))
+        mock_response.iter_content.assert_not_called()
+        mock_response.close.assert_called_once_with()
+
     def test_initiate_multipart_upload(self):
         sot = obj.Object()
         return_data = namedtuple("response", ["content"])
@@ -198,4 +393,35 @@ class TestObject(base.TestCase):
             data=COMPLETE_MPU_RESP,
             headers={},
             requests_auth="requests_auth",
+            idempotent=True,
+            retry_status_codes=(500,),
+        )
+
+    def test_delete_multiple(self):
+        mock_response = mock.Mock()
+        mock_response.status_code = 200
+        mock_response.content = DELETE_RESP.encode()
+        self.sess.post = mock.Mock(return_value=mock_response)
+        self.sess.region_name = "eu-de"
+
+        errors = obj.Object.delete_multiple(
+            self.sess, "http://obs.otc.t-systems.com", ["a", "b&c"], "auth"
+        )
+
+        self.assertEqual(
+            [{"Key": "b", "Code": "AccessDenied", "Message": "Access Denied"}],
+            errors,
+        )
+        data = (
+            b"<Delete><Quiet>true</Quiet><Object><Key>a</Key></Object>"
+            b"<Object><Key>b&amp;c</Key></Object></Delete>"
+        )
+        self.sess.post.assert_called_once_with(
+            "http://obs.otc.t-systems.com?delete",
+            data=data,
+            headers={
+                "Content-MD5": base64.b64encode(hashlib.md5(data).digest()).decode(),
+                "Content-Type": "application/xml",
+            },
+            requests_auth="auth",
         )
@@ -9,10 +9,24 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import base64
+import concurrent.futures
+import hashlib
+import io
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
 from unittest.mock import MagicMock
 
+from openstack import exceptions
 from openstack.tests.unit import test_proxy_base
+from otcextensions.common import utils
 from otcextensions.sdk.ak_auth import AKRequestsAuth
+from otcextensions.sdk.obs.v1 import _checkpoint
 from otcextensions.sdk.obs.v1 import _proxy
 from otcextensions.sdk.obs.v1 import container as _container
 from otcextensions.sdk.obs.v1 import obj as _obj
@@ -135,6 +149,121 @@ class TestObsProxy(test_proxy_base.TestProxyBase):
             },
         )
 
+    def test_delete_objects(self):
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+        remote = [_obj.Object.existing(Key="p/%d" % i) for i in range(5)]
+
+        def delete_multiple(proxy, endpoint, names, requests_auth):
+            if "p/3" in names:
+                return [{"Key": "p/3", "Code": "AccessDenied", "Message": "Denied"}]
+            return []
+
+        with mock.patch.object(
+            self.proxy, "objects", return_value=iter(remote)
+        ) as objects, mock.patch.object(
+            _obj.Object, "delete_multiple", side_effect=delete_multiple
+        ) as delete:
+            result = self.proxy.delete_objects(
+                "container", prefix="p/", batch_size=2, max_concurrency=2
+            )
+
+        objects.assert_called_once_with("container", prefix="p/")
+        self.assertEqual(
+            [["p/0", "p/1"], ["p/2", "p/3"], ["p/4"]],
+            sorted(c[0][2] for c in delete.call_args_list),
+        )
+        for c in delete.call_args_list:
+            self.assertEqual("https://container.obs.regio.otc.t-systems.com", c[0][1])
+            self.assertEqual(self._ak_auth, c[0][3])
+        self.assertEqual(["p/0", "p/1", "p/2", "p/4"], sorted(result["deleted"]))
+        self.assertEqual(
+            [{"Key": "p/3", "Code": "AccessDenied", "Message": "Denied"}],
+            result["errors"],
+        )
+
+    def test_service_cleanup(self):
+        containers = [
+            _container.Container.existing(name="ok", id="ok"),
+            _container.Container.existing(name="broken", id="broken"),
+        ]
+        objects = {
+            name: [_obj.Object.existing(id=name + "/a", name=name + "/a")]
+            for name in ("ok", "broken")
+        }
+
+        def delete_objects(container, objs):
+            if container == "broken":
+                return {"deleted": [], "errors": [{"Key": "broken/a"}]}
+            return {"deleted": [o.name for o in objs], "errors": []}
+
+        status = queue.Queue()
+        with mock.patch.object(
+            self.proxy, "containers", return_value=containers
+        ), mock.patch.object(
+            self.proxy, "objects", side_effect=lambda container: objects[container]
+        ), mock.patch.object(
+            self.proxy, "delete_objects", side_effect=delete_objects
+        ) as delete, mock.patch.object(
+            self.proxy, "delete_container"
+        ) as delete_container, mock.patch.object(
+            self.proxy, "wait_for_delete_container"
+        ) as wait:
+            self.proxy._service_cleanup(dry_run=False, client_status_queue=status)
+
+        self.assertEqual(2, delete.call_count)
+        delete_container.assert_called_once_with(containers[0])
+        wait.assert_called_once_with(containers[0])
+        self.assertEqual(
+            ["ok/a", "ok", "broken/a"],
+            [status.get_nowait().id for _ in range(status.qsize())],
+        )
+
+    def test_delete_objects_names(self):
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+
+        with mock.patch.object(self.proxy, "objects") as objects, mock.patch.object(
+            _obj.Object, "delete_multiple", return_value=[]
+        ) as delete:
+            result = self.proxy.delete_objects("container", ["a", "b"])
+
+        objects.assert_not_called()
+        delete.assert_called_once_with(
+            self.proxy,
+            "https://container.obs.regio.otc.t-systems.com",
+            ["a", "b"],
+            self._ak_auth,
+        )
+        self.assertEqual({"deleted": ["a", "b"], "errors": []}, result)
+        self.assertRaises(
+            ValueError, self.proxy.delete_objects, "container", batch_size=1001
+        )
+
+    def test_generate_presigned_url(self):
+        with mock.patch.object(
+            self._ak_auth, "presign_url", return_value="url"
+        ) as presign:
+            self.assertEqual(
+                "url",
+                self.proxy.generate_presigned_url(
+                    "container", "dir/a b", method="PUT", expires=60
+                ),
+            )
+        presign.assert_called_once_with(
+            "PUT",
+            "https://container.obs.regio.otc.t-systems.com/dir/a%20b",
+            expires=60,
+            signature_version="v4",
+            bucket="container",
+        )
+
     def test_download_object(self):
         self._verify(
             "otcextensions.sdk.obs.v1.obj.Object.download",
@@ -149,11 +278,721 @@ class TestObsProxy(test_proxy_base.TestProxyBase):
             },
         )
 
-    def test_stream_object(self):
+    def test_download_object_parallel(self):
+        data = bytes(range(256)) * 40
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=3
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+
+        def head(obj, container):
+            obj._header.attributes.update(
+                {"Content-Length": len(data), "ETag": '"etag"'}
+            )
+            return obj
+
+        calls = []
+
+        def stream(obj, session, start=None, end=None, headers=None, **kwargs):
+            calls.append((start, end))
+            self.assertEqual({"If-Match": '"etag"'}, headers)
+            yield data[start : end + 1]
+
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, filename)
+
+        with mock.patch.object(
+            self.proxy, "get_object_metadata", side_effect=head
+        ), mock.patch.object(_obj.Object, "stream", autospec=True, side_effect=stream):
+            self.proxy.download_object(
+                "obj",
+                container="container",
+                file=filename,
+                parallel=True,
+                part_size=4096,
+            )
+
+        self.assertEqual([(0, 4095), (4096, 8191), (8192, 10239)], sorted(calls))
+        with open(filename, "rb") as f:
+            self.assertEqual(data, f.read())
+
+    def test_download_object_parallel_resume(self):
+        data = b"0123456789"
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+
+        def head(obj, container):
+            obj._header.attributes.update({"Content-Length": len(data)})
+            return obj
+
+        calls = []
+
+        def stream(obj, session, start=None, end=None, headers=None, **kwargs):
+            calls.append(start)
+            yield data[start : start + 4]
+            if len(calls) == 1:
+                raise IOError("connection reset")
+            yield data[start + 4 : end + 1]
+
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, filename)
+
+        with mock.patch.object(
+            self.proxy, "get_object_metadata", side_effect=head
+        ), mock.patch.object(_obj.Object, "stream", autospec=True, side_effect=stream):
+            self.proxy.download_object(
+                "obj", container="container", file=filename, parallel=True
+            )
+
+        self.assertEqual([0, 4], calls)
+        with open(filename, "rb") as f:
+            self.assertEqual(data, f.read())
+
+    def test_download_object_parallel_changed(self):
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+
+        def head(obj, container):
+            obj._header.attributes.update({"Content-Length": 10, "ETag": '"etag"'})
+            return obj
+
+        stream = mock.Mock(
+            side_effect=exceptions.HttpException(
+                response=mock.Mock(status_code=412, headers={})
+            )
+        )
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        filename = os.path.join(tmp_dir, "obj")
+
+        with mock.patch.object(
+            self.proxy, "get_object_metadata", side_effect=head
+        ), mock.patch.object(_obj.Object, "stream", stream):
+            self.assertRaisesRegex(
+                exceptions.SDKException,
+                "changed during the download",
+                self.proxy.download_object,
+                "obj",
+                container="container",
+                file=filename,
+                parallel=True,
+            )
+        stream.assert_called_once()
+        self.assertFalse(os.path.exists(filename))
+
+    def test_download_object_parallel_failure_stops_parts(self):
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+
+        def head(obj, container):
+            obj._header.attributes.update({"Content-Length": 10000, "ETag": '"etag"'})
+            return obj
+
+        started = threading.Event()
+        calls = []
+        written = []
+
+        def stream(obj, session, start=None, end=None, **kwargs):
+            calls.append(start)
+            if start == 0:
+                started.wait(5)
+                raise exceptions.HttpException(
+                    response=mock.Mock(status_code=412, headers={})
+                )
+            started.set()
+            # Would take seconds unless the failure of the first range
+            # stops this one
+            for _ in range(end - start + 1):
+                threading.Event().wait(0.005)
+                written.append(1)
+                yield b"x"
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        filename = os.path.join(tmp_dir, "obj")
+
+        with mock.patch.object(
+            self.proxy, "get_object_metadata", side_effect=head
+        ), mock.patch.object(_obj.Object, "stream", autospec=True, side_effect=stream):
+            self.assertRaises(
+                exceptions.SDKException,
+                self.proxy.download_object,
+                "obj",
+                container="container",
+                file=filename,
+                parallel=True,
+                part_size=1000,
+            )
+
+        # Pending ranges are cancelled, running ones stop early
+        self.assertLess(len(calls), 5)
+        self.assertLess(len(written), 1000)
+        self.assertFalse(os.path.exists(filename))
+
+    def test_download_object_parallel_requires_file(self):
         self.assertRaises(
-            NotImplementedError,
+            ValueError,
+            self.proxy.download_object,
+            "obj",
+            container="container",
+            parallel=True,
+        )
+
+    def test_upload_large_object(self):
+        data = os.urandom(10000)
+        fd, filename = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        self.addCleanup(os.remove, filename)
+
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+        self.proxy._connection._wait_for_futures.side_effect = (
+            lambda futures, raise_on_error: ([f.result() for f in futures], [])
+        )
+
+        uploaded = {}
+
+        def put(url, headers=None, data=None, **kwargs):
+            body = b"".join(bytes(chunk) for chunk in iter(lambda: data.read(999), b""))
+            uploaded[url] = (body, headers["Content-MD5"])
+            return mock.Mock(status_code=200, url=url, headers={"ETag": url[-20:]})
+
+        with mock.patch.object(
+            _obj.Object, "initiate_multipart_upload", return_value="UID"
+        ), mock.patch.object(self.proxy, "put", side_effect=put), mock.patch.object(
+            self.proxy, "_finish_large_object_upload"
+        ) as finish:
+            self.proxy._upload_large_object(
+                "https://ep", filename, "obj", {}, len(data), 4096
+            )
+
+        url = "https://ep/obj?partNumber=%d&uploadId=UID"
+        self.assertEqual({url % 1, url % 2, url % 3}, set(uploaded))
+        for number, start in ((1, 0), (2, 4096), (3, 8192)):
+            body, md5 = uploaded[url % number]
+            self.assertEqual(data[start : start + 4096], body)
+            self.assertEqual(base64.b64encode(hashlib.md5(body).digest()).decode(), md5)
+        finish.assert_called_once_with(
+            "https://ep/obj",
+            {},
+            "UID",
+            parts=[
+                {"PartNumber": str(number), "ETag": (url % number)[-20:]}
+                for number in (1, 2, 3)
+            ],
+        )
+
+    def _setup_resumable_upload(self):
+        data = os.urandom(10000)
+        tmp_dir = tempfile.mkdtemp()
+        filename = os.path.join(tmp_dir, "data")
+        checkpoint_file = os.path.join(tmp_dir, "checkpoint")
+        with open(filename, "wb") as f:
+            f.write(data)
+        self.addCleanup(shutil.rmtree, tmp_dir)
+
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+        self.proxy._connection._wait_for_futures.side_effect = (
+            lambda futures, raise_on_error: ([f.result() for f in futures], [])
+        )
+        return data, filename, checkpoint_file
+
+    def test_upload_large_object_resume(self):
+        data, filename, checkpoint_file = self._setup_resumable_upload()
+        url = "https://ep/obj"
+        _checkpoint.UploadCheckpoint(checkpoint_file).start(
+            "UID",
+            url=url,
+            file_size=len(data),
+            mtime_ns=os.stat(filename).st_mtime_ns,
+            segment_size=4096,
+        )
+
+        uploaded = []
+
+        def put(url, headers=None, data=None, **kwargs):
+            uploaded.append(url)
+            return mock.Mock(status_code=200, url=url, headers={"ETag": "etag"})
+
+        with mock.patch.object(
+            _obj.Object, "initiate_multipart_upload"
+        ) as initiate, mock.patch.object(
+            self.proxy,
+            "_list_committed_parts",
+            return_value={1: {"PartNumber": "1", "ETag": "etag1", "Size": "4096"}},
+        ), mock.patch.object(
+            self.proxy, "put", side_effect=put
+        ), mock.patch.object(
+            self.proxy, "_finish_large_object_upload"
+        ) as finish:
+            self.proxy._upload_large_object(
+                "https://ep",
+                filename,
+                "obj",
+                {},
+                len(data),
+                4096,
+                checkpoint_file=checkpoint_file,
+            )
+
+        initiate.assert_not_called()
+        part_url = url + "?partNumber=%d&uploadId=UID"
+        self.assertEqual({part_url % 2, part_url % 3}, set(uploaded))
+        finish.assert_called_once_with(
+            url,
+            {},
+            "UID",
+            parts=[
+                {"PartNumber": "1", "ETag": "etag1"},
+                {"PartNumber": "2", "ETag": "etag"},
+                {"PartNumber": "3", "ETag": "etag"},
+            ],
+        )
+        self.assertFalse(os.path.exists(checkpoint_file))
+
+    def test_upload_large_object_resume_truncated_parts(self):
+        data, filename, checkpoint_file = self._setup_resumable_upload()
+        url = "https://ep/obj"
+        _checkpoint.UploadCheckpoint(checkpoint_file).start(
+            "UID",
+            url=url,
+            file_size=len(data),
+            mtime_ns=os.stat(filename).st_mtime_ns,
+            segment_size=4096,
+        )
+        # The committed parts are listed on two pages
+        pages = [
+            {
+                "UploadId": "UID",
+                "IsTruncated": "true",
+                "NextPartNumberMarker": "1",
+                "Parts": [{"PartNumber": "1", "ETag": "etag1", "Size": "4096"}],
+            },
+            {
+                "UploadId": "UID",
+                "IsTruncated": "false",
+                "Parts": [{"PartNumber": "2", "ETag": "etag2", "Size": "4096"}],
+            },
+        ]
+
+        def put(url, headers=None, data=None, **kwargs):
+            return mock.Mock(status_code=200, url=url, headers={"ETag": "etag3"})
+
+        with mock.patch.object(
+            _obj.Object, "get_parts", side_effect=pages
+        ), mock.patch.object(
+            self.proxy, "put", side_effect=put
+        ) as put_mock, mock.patch.object(
+            _obj.Object, "complete_multipart_upload"
+        ) as complete:
+            complete.return_value.status_code = 200
+            self.proxy._upload_large_object(
+                "https://ep",
+                filename,
+                "obj",
+                {},
+                len(data),
+                4096,
+                checkpoint_file=checkpoint_file,
+            )
+
+        put_mock.assert_called_once()
+        self.assertEqual(
+            [
+                {"PartNumber": "1", "ETag": "etag1"},
+                {"PartNumber": "2", "ETag": "etag2"},
+                {"PartNumber": "3", "ETag": "etag3"},
+            ],
+            complete.call_args[0][3],
+        )
+
+    def test_upload_large_object_checkpoint_kept(self):
+        data, filename, checkpoint_file = self._setup_resumable_upload()
+
+        def put(url, headers=None, data=None, **kwargs):
+            return mock.Mock(status_code=200, url=url, headers={"ETag": url[-20:]})
+
+        with mock.patch.object(
+            _obj.Object, "initiate_multipart_upload", return_value="UID"
+        ), mock.patch.object(self.proxy, "put", side_effect=put), mock.patch.object(
+            self.proxy,
+            "_finish_large_object_upload",
+            side_effect=exceptions.HttpException("broken"),
+        ), mock.patch.object(
+            self.proxy, "_abort_multipart_upload"
+        ) as abort:
+            self.assertRaises(
+                exceptions.HttpException,
+                self.proxy._upload_large_object,
+                "https://ep",
+                filename,
+                "obj",
+                {},
+                len(data),
+                4096,
+                checkpoint_file=checkpoint_file,
+            )
+
+        abort.assert_not_called()
+        checkpoint = _checkpoint.UploadCheckpoint(checkpoint_file)
+        self.assertTrue(checkpoint.load(url="https://ep/obj"))
+        self.assertEqual("UID", checkpoint.upload_id)
+        self.assertEqual([1, 2, 3], sorted(checkpoint.parts))
+
+    def test_list_committed_parts(self):
+        pages = [
+            {
+                "UploadId": "UID",
+                "IsTruncated": "true",
+                "NextPartNumberMarker": "1",
+                "Parts": [{"PartNumber": "1"}],
+            },
+            {"UploadId": "UID", "IsTruncated": "false", "Parts": [{"PartNumber": "2"}]},
+        ]
+        with mock.patch.object(
+            _obj.Object, "get_parts", side_effect=pages
+        ) as get_parts:
+            parts = self.proxy._list_committed_parts("https://ep/obj", "UID", "auth")
+
+        self.assertEqual([1, 2], sorted(parts))
+        get_parts.assert_has_calls(
+            [
+                mock.call(self.proxy, "https://ep/obj?uploadId=UID", "auth"),
+                mock.call(
+                    self.proxy,
+                    "https://ep/obj?uploadId=UID&part-number-marker=1",
+                    "auth",
+                ),
+            ]
+        )
+
+    def test_sync_directory(self):
+        local_path = tempfile.mkdtemp()
+        files = {
+            "new": b"new",
+            "sub/same": b"same",
+            "touched": b"touched",
+            "changed": b"changed",
+            "resized": b"resized",
+        }
+        for name, content in files.items():
+            filename = os.path.join(local_path, *name.split("/"))
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, "wb") as f:
+                f.write(content)
+            os.utime(filename, (1600000000, 1600000000))
+        self.addCleanup(shutil.rmtree, local_path)
+        for name in ("touched", "changed"):
+            os.utime(os.path.join(local_path, name), (1700000000, 1700000000))
+
+        last_modified = "2022-01-01T00:00:00.000Z"
+        remote = [
+            _obj.Object.existing(
+                Key="p/sub/same",
+                Size=4,
+                ETag="x",
+                LastModified=last_modified,
+            ),
+            _obj.Object.existing(
+                Key="p/touched",
+                Size=7,
+                ETag=hashlib.md5(b"touched").hexdigest(),
+                LastModified="2020-01-01T00:00:00.000Z",
+            ),
+            _obj.Object.existing(
+                Key="p/changed",
+                Size=7,
+                ETag="x",
+                LastModified="2020-01-01T00:00:00.000Z",
+            ),
+            _obj.Object.existing(
+                Key="p/resized", Size=1, ETag="x", LastModified=last_modified
+            ),
+            _obj.Object.existing(
+                Key="p/stale", Size=1, ETag="x", LastModified=last_modified
+            ),
+        ]
+
+        with mock.patch.object(
+            self.proxy, "objects", return_value=iter(remote)
+        ) as objects, mock.patch.object(
+            self.proxy, "_upload_object"
+        ) as upload, mock.patch.object(
+            self.proxy, "delete_object"
+        ) as delete:
+            result = self.proxy.sync_directory(
+                "container", local_path, prefix="p/", delete=True
+            )
+
+        objects.assert_called_once_with("container", prefix="p/")
+        self.assertEqual(
+            {
+                "uploaded": ["p/changed", "p/new", "p/resized"],
+                "deleted": ["p/stale"],
+                "unchanged": ["p/sub/same", "p/touched"],
+            },
+            result,
+        )
+        self.assertEqual(
+            ["p/changed", "p/new", "p/resized"],
+            sorted(c[0][3] for c in upload.call_args_list),
+        )
+        delete.assert_called_once_with("p/stale", container="container")
+
+    def _mock_objects(self, keys):
+        keys = sorted(keys)
+
+        def objects(container, prefix=None, marker=None):
+            for key in keys:
+                if prefix and not key.startswith(prefix):
+                    continue
+                if marker is None or key > marker:
+                    yield _obj.Object.existing(Key=key)
+
+        return mock.patch.object(self.proxy, "objects", side_effect=objects)
+
+    def test_objects_parallel(self):
+        keys = ["a", "a/1", "b/1", "b/2", "c", "c/1", "d/1", "e"]
+        with self._mock_objects(keys) as objects:
+            result = list(
+                self.proxy.objects_parallel(
+                    "container", split_points=["c", "b/1"], max_concurrency=2
+                )
+            )
+
+        self.assertEqual(keys, [o.name for o in result])
+        self.assertEqual(
+            [
+                mock.call("container"),
+                mock.call("container", marker="b/1"),
+                mock.call("container", marker="c"),
+            ],
+            sorted(objects.call_args_list, key=lambda c: c[1].get("marker", "")),
+        )
+
+    def test_objects_parallel_unordered(self):
+        keys = ["p/%03d/x" % i for i in range(50)] + ["q"]
+        prefixes = ["p/%03d/" % i for i in range(50)]
+        with self._mock_objects(keys), mock.patch.object(
+            _obj.Object, "list_common_prefixes", return_value=prefixes
+        ) as list_prefixes:
+            result = list(
+                self.proxy.objects_parallel(
+                    "container", shards=5, ordered=False, prefix="p/"
+                )
+            )
+
+        list_prefixes.assert_called_once_with(
+            self.proxy,
+            endpoint_override="https://container.obs.regio.otc.t-systems.com",
+            requests_auth=self._ak_auth,
+            prefix="p/",
+            delimiter="/",
+        )
+        self.assertEqual(keys[:-1], sorted(o.name for o in result))
+
+    def test_objects_parallel_without_prefixes(self):
+        keys = ["a", "b", "c"]
+        for prefixes in ([], ["a/"]):
+            with self._mock_objects(keys) as objects, mock.patch.object(
+                _obj.Object, "list_common_prefixes", return_value=prefixes
+            ):
+                result = list(self.proxy.objects_parallel("container"))
+
+            self.assertEqual(keys, [o.name for o in result])
+            # Listed serially as a single range
+            objects.assert_called_once_with("container")
+
+    def test_objects_parallel_error(self):
+        with mock.patch.object(
+            self.proxy, "objects", side_effect=exceptions.SDKException("boom")
+        ):
+            self.assertRaises(
+                exceptions.SDKException,
+                list,
+                self.proxy.objects_parallel("container", split_points=["m"]),
+            )
+
+    def _make_file(self, content):
+        fd, filename = tempfile.mkstemp()
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def test_is_object_stale_multipart(self):
+        content = os.urandom(2500)
+        filename = self._make_file(content)
+        etag = utils._get_file_etag(filename, 1000)[1]
+        metadata = _obj.Object.existing(etag='"%s"' % etag)
+        with mock.patch.object(
+            self.proxy, "get_object_metadata", return_value=metadata
+        ):
+            self.assertFalse(
+                self.proxy.is_object_stale(
+                    "container", "name", filename, segment_size=1000
+                )
+            )
+            self.assertTrue(
+                self.proxy.is_object_stale(
+                    "container", "name", filename, segment_size=2000
+                )
+            )
+
+    def test_is_object_stale_hash_cache(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        filename = self._make_file(b"data")
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection.config.config = {
+            "obs_hash_cache": os.path.join(tmpdir, "cache.db")
+        }
+        cache = self.proxy._get_hash_cache()
+        self.addCleanup(cache.close)
+        self.assertIs(cache, self.proxy._get_hash_cache())
+        cache.set(filename, "cached")
+
+        metadata = _obj.Object.existing(etag='"cached"')
+        with mock.patch.object(
+            self.proxy, "get_object_metadata", return_value=metadata
+        ), mock.patch.object(utils, "_get_file_hashes") as get_hashes:
+            self.assertFalse(self.proxy.is_object_stale("container", "name", filename))
+        get_hashes.assert_not_called()
+
+    def test_read_segments(self):
+        self.assertEqual(
+            [b"abc", b"def", b"g"],
+            list(self.proxy._read_segments(iter([b"ab", b"cdefg"]), 3)),
+        )
+        self.assertEqual(
+            [b"abc", b"def", b"g"],
+            list(self.proxy._read_segments(io.BytesIO(b"abcdefg"), 3)),
+        )
+        self.assertEqual([b"abc", b"d"], list(self.proxy._read_segments("abcd", 3)))
+
+    def test_upload_large_data_stream(self):
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=3
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+
+        in_flight = []
+        max_in_flight = []
+        lock = threading.Lock()
+
+        def put(url, headers=None, data=None, **kwargs):
+            with lock:
+                in_flight.append(url)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.remove(url)
+            part_number = url.split("partNumber=")[1].split("&")[0]
+            return mock.Mock(
+                status_code=200, headers={"ETag": '"%s-%s"' % (part_number, data)}
+            )
+
+        def chunks():
+            for i in range(7):
+                yield b"%d" % i
+
+        with mock.patch.object(
+            _obj.Object, "initiate_multipart_upload", return_value="UID"
+        ), mock.patch.object(self.proxy, "put", side_effect=put), mock.patch.object(
+            self.proxy, "_finish_large_object_upload"
+        ) as finish:
+            self.proxy.create_object(
+                "container",
+                "obj",
+                data=chunks(),
+                segment_size=2,
+                max_concurrency=2,
+            )
+
+        self.assertLessEqual(max(max_in_flight), 2)
+        finish.assert_called_once_with(
+            "https://container.obs.regio.otc.t-systems.com/obj",
+            {},
+            "UID",
+            parts=[
+                {"PartNumber": "1", "ETag": "\"1-b'01'\""},
+                {"PartNumber": "2", "ETag": "\"2-b'23'\""},
+                {"PartNumber": "3", "ETag": "\"3-b'45'\""},
+                {"PartNumber": "4", "ETag": "\"4-b'6'\""},
+            ],
+        )
+
+    def test_upload_large_data_abort(self):
+        self.proxy._connection = mock.Mock()
+        self.proxy._connection._pool_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2
+        )
+        self.addCleanup(self.proxy._connection._pool_executor.shutdown)
+
+        with mock.patch.object(
+            _obj.Object, "initiate_multipart_upload", return_value="UID"
+        ), mock.patch.object(
+            self.proxy, "put", side_effect=IOError("broken")
+        ), mock.patch.object(
+            self.proxy, "_abort_multipart_upload"
+        ) as abort:
+            self.assertRaises(
+                IOError,
+                self.proxy._upload_large_data,
+                "https://ep",
+                io.BytesIO(b"abcdef"),
+                "obj",
+                {},
+                2,
+            )
+        abort.assert_called_once_with(endpoint="https://ep/obj", upload_id="UID")
+
+    def test_create_object_small_stream(self):
+        with mock.patch(
+            "otcextensions.sdk.sdk_proxy.Proxy._create"
+        ) as create, mock.patch.object(self.proxy, "_upload_large_data") as large:
+            self.proxy.create_object(
+                "container", "obj", data=iter([b"ab", b"c"]), segment_size=10
+            )
+        large.assert_not_called()
+        self.assertEqual(b"abc", create.call_args[1]["data"])
+
+    def test_stream_object(self):
+        self._verify(
+            "otcextensions.sdk.obs.v1.obj.Object.stream",
             self.proxy.stream_object,
-            "container",
+            method_args=["object"],
+            method_kwargs={"container": "container", "chunk_size": 10, "start": 5},
+            expected_args=[self.proxy],
+            expected_kwargs={
+                "chunk_size": 10,
+                "start": 5,
+                "end": None,
+                "endpoint_override": "https://container.obs.regio." "otc.t-systems.com",
+                "requests_auth": self._ak_auth,
+            },
         )
 
     def test_copy_object(self):
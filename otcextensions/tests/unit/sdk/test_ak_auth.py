@@ -0,0 +1,159 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import datetime
+import threading
+
+import mock
+import requests
+
+from openstack.tests.unit import base
+from otcextensions.sdk import ak_auth
+
+NOW = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+
+
+class TestAKRequestsAuth(base.TestCase):
+    def setUp(self):
+        super(TestAKRequestsAuth, self).setUp()
+        self.auth = ak_auth.AKRequestsAuth(
+            access_key="ak",
+            secret_access_key="sk",
+            host="obs.eu-de.otc.t-systems.com",
+            region="eu-de",
+            service="s3",
+            token="tok",
+        )
+        patcher = mock.patch.object(ak_auth.datetime, "datetime")
+        self.datetime = patcher.start()
+        self.datetime.now.return_value = NOW
+        self.addCleanup(patcher.stop)
+
+    def _sign(self, method, url, **kwargs):
+        request = requests.Request(method, url, **kwargs).prepare()
+        self.auth(request)
+        return request
+
+    def test_sign_head(self):
+        request = self._sign(
+            "HEAD",
+            "https://bucket.obs.eu-de.otc.t-systems.com/some%20key.txt"
+            "?versionId=1&acl",
+            headers={"Content-Type": "text/plain", "X-Amz-Meta-Foo": "a   b"},
+        )
+        self.assertEqual("20240102T030405Z", request.headers["X-Amz-Date"])
+        self.assertEqual(
+            "AWS4-HMAC-SHA256 Credential=ak/20240102/eu-de/s3/aws4_request, "
+            "SignedHeaders=content-type;host;x-amz-content-sha256;"
+            "x-amz-date;x-amz-meta-foo;x-amz-security-token, "
+            "Signature=be6b8d2bd61c4f4d0dccfa289249ffc9"
+            "ed67594e16994f39c5db78a48aab6c57",
+            request.headers["Authorization"],
+        )
+
+    def test_sign_put_port(self):
+        request = self._sign(
+            "PUT", "https://bucket.obs.eu-de.otc.t-systems.com:8443/", data=b"x"
+        )
+        self.assertEqual(
+            "AWS4-HMAC-SHA256 Credential=ak/20240102/eu-de/s3/aws4_request, "
+            "SignedHeaders=content-length;host;x-amz-content-sha256;"
+            "x-amz-date;x-amz-security-token, "
+            "Signature=1325ae2b64a3349b42ad1f6cf307def1"
+            "258f8497b58ee231ee20a72f5602c0cc",
+            request.headers["Authorization"],
+        )
+
+    def test_canonical_querystring(self):
+        request = requests.Request("GET", "https://host/?uploads&b=2&a=1&a=0").prepare()
+        self.assertEqual(
+            "a=0&a=1&b=2&uploads=",
+            self.auth.get_canonical_querystring(request),
+        )
+        request = requests.Request("GET", "https://host").prepare()
+        self.assertEqual("", self.auth.get_canonical_querystring(request))
+        self.assertEqual("/", self.auth.get_canonical_path(request))
+
+    def test_signing_key_cached(self):
+        with mock.patch.object(self.auth, "_sign", wraps=self.auth._sign) as sign:
+            self._sign("GET", "https://host/a")
+            self.assertEqual(5, sign.call_count)
+            self._sign("GET", "https://host/b")
+            self.assertEqual(6, sign.call_count)
+            self.datetime.now.return_value = NOW + datetime.timedelta(days=1)
+            self._sign("GET", "https://host/c")
+            self.assertEqual(11, sign.call_count)
+        self.assertEqual("20240103", self.auth._signing_key[0])
+
+    def test_timestamp_per_thread(self):
+        self.auth.timestamp = "main"
+        timestamps = []
+        thread = threading.Thread(target=lambda: timestamps.append(self.auth.timestamp))
+        thread.start()
+        thread.join()
+        self.assertEqual([None], timestamps)
+        self.assertEqual("main", self.auth.timestamp)
+
+    def test_presign_url_v4(self):
+        url = self.auth.presign_url(
+            "GET", "https://bucket.obs.eu-de.otc.t-systems.com/dir/some%20key.txt"
+        )
+        self.assertEqual(
+            "https://bucket.obs.eu-de.otc.t-systems.com/dir/some%20key.txt"
+            "?X-Amz-Algorithm=AWS4-HMAC-SHA256"
+            "&X-Amz-Credential=ak%2F20240102%2Feu-de%2Fs3%2Faws4_request"
+            "&X-Amz-Date=20240102T030405Z&X-Amz-Expires=3600"
+            "&X-Amz-SignedHeaders=host&X-Amz-Security-Token=tok"
+            "&X-Amz-Signature=6bc2a32fddc7070f5b3402d2f61dbb5c"
+            "cbf0ca9da10b807d276165a36155724e",
+            url,
+        )
+
+    def test_presign_url_v4_expires(self):
+        self.assertRaises(
+            ValueError, self.auth.presign_url, "GET", "https://host/k", 604801
+        )
+        self.assertRaises(ValueError, self.auth.presign_url, "GET", "https://host/k", 0)
+
+    def test_presign_url_v2(self):
+        self.auth.aws_token = None
+        url = self.auth.presign_url(
+            "GET",
+            "https://bucket.obs.eu-de.otc.t-systems.com/dir/some%20key.txt",
+            signature_version="v2",
+            bucket="bucket",
+        )
+        self.assertEqual(
+            "https://bucket.obs.eu-de.otc.t-systems.com/dir/some%20key.txt"
+            "?AccessKeyId=ak&Expires=1704168245"
+            "&Signature=1sB0WuJCpZ73LHsaMBCfc%2FCmw%2Bc%3D",
+            url,
+        )
+
+    def test_presign_url_v2_token(self):
+        url = self.auth.presign_url(
+            "PUT", "https://host/key", 60, signature_version="v2", bucket="b"
+        )
+        self.assertTrue(
+            url.startswith(
+                "https://host/key?x-obs-security-token=tok"
+                "&AccessKeyId=ak&Expires=1704164705&Signature="
+            )
+        )
+
+    def test_presign_url_unsupported(self):
+        self.assertRaises(
+            ValueError,
+            self.auth.presign_url,
+            "GET",
+            "https://host/k",
+            signature_version="v3",
+        )
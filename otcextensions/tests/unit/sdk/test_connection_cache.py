@@ -0,0 +1,142 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import json
+import os
+import shutil
+import stat
+import tempfile
+
+import mock
+
+from openstack.tests.unit import base
+from otcextensions import sdk
+from otcextensions.sdk import connection_cache
+
+
+class FakeDescriptor:
+    def __init__(self, service_name):
+        self.service_type = sdk.OTC_SERVICES[service_name]["service_type"]
+        self.all_types = [self.service_type]
+
+    def __get__(self, conn, owner):
+        return self
+
+
+class TestConnectionCache(base.TestCase):
+    def setUp(self):
+        super(TestConnectionCache, self).setUp()
+        self.use_keystone_v3()
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        patcher = mock.patch.object(sdk, "_get_descriptor", FakeDescriptor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _connect(self):
+        self._make_test_cloud(identity_api_version="3")
+        self.cloud.config.config["otc_connection_cache"] = self.path
+        return self.cloud
+
+    def _token_requests(self):
+        return [
+            r
+            for r in self.adapter.request_history
+            if r.method == "POST" and r.path.endswith("/v3/auth/tokens")
+        ]
+
+    def test_from_config(self):
+        conn = self._connect()
+        self.assertEqual(
+            self.path, connection_cache.ConnectionCache.from_config(conn).path
+        )
+        conn.config.config["otc_connection_cache"] = True
+        self.assertEqual(
+            os.path.expanduser(connection_cache.DEFAULT_CACHE_DIR),
+            connection_cache.ConnectionCache.from_config(conn).path,
+        )
+        del conn.config.config["otc_connection_cache"]
+        self.assertIsNone(connection_cache.ConnectionCache.from_config(conn))
+
+    def test_load_reuses_token(self):
+        conn = self._connect()
+        with mock.patch.object(
+            conn, "endpoint_for", return_value="https://kms.example.com/v1.0"
+        ) as endpoint_for:
+            sdk.load(conn, services=["kms"])
+        endpoint_for.assert_called_once_with("kms")
+        self.assertEqual(1, len(self._token_requests()))
+        (filename,) = os.listdir(self.path)
+        mode = os.stat(os.path.join(self.path, filename)).st_mode
+        self.assertEqual(0o600, stat.S_IMODE(mode))
+
+        conn = self._connect()
+        with mock.patch.object(conn, "endpoint_for") as endpoint_for:
+            sdk.load(conn, services=["kms"])
+        endpoint_for.assert_not_called()
+        self.assertEqual(1, len(self._token_requests()))
+        self.assertEqual(
+            "https://kms.example.com/v1.0/%(project_id)s",
+            conn.config.config["kms_endpoint_override"],
+        )
+        self.assertEqual(self.os_fixture.project_id, conn.current_project_id)
+
+    def test_load_expired(self):
+        conn = self._connect()
+        sdk.load(conn, services=[])
+        (filename,) = os.listdir(self.path)
+        filename = os.path.join(self.path, filename)
+        with open(filename) as f:
+            data = json.load(f)
+        data["expires"] = 0
+        with open(filename, "w") as f:
+            json.dump(data, f)
+
+        conn = self._connect()
+        self.assertFalse(connection_cache.ConnectionCache(self.path).load(conn))
+        sdk.load(conn, services=[])
+        self.assertEqual(2, len(self._token_requests()))
+
+    def test_load_corrupted(self):
+        conn = self._connect()
+        cache = connection_cache.ConnectionCache(self.path)
+        with open(cache._filename(conn), "w") as f:
+            f.write("{")
+        self.assertFalse(cache.load(conn))
+
+    def test_key_depends_on_auth(self):
+        conn = self._connect()
+        cache = connection_cache.ConnectionCache(self.path)
+        filename = cache._filename(conn)
+        conn.config.config["auth"]["project_name"] = "other"
+        self.assertNotEqual(filename, cache._filename(conn))
+
+    def test_invalidate(self):
+        conn = self._connect()
+        sdk.load(conn, services=[])
+        connection_cache.ConnectionCache(self.path).invalidate(conn)
+        self.assertEqual([], os.listdir(self.path))
+
+    def test_invalidate_on_rejected_token(self):
+        conn = self._connect()
+        sdk.load(conn, services=[])
+        self.assertEqual(1, len(os.listdir(self.path)))
+
+        conn = self._connect()
+        sdk.load(conn, services=[])
+        self.assertEqual(1, len(self._token_requests()))
+        url = "https://example.com/res"
+        self.adapter.register_uri(
+            "GET", url, [{"status_code": 401}, {"status_code": 200}]
+        )
+        self.assertEqual(200, conn.session.get(url).status_code)
+        self.assertEqual(2, len(self._token_requests()))
+        self.assertEqual([], os.listdir(self.path))
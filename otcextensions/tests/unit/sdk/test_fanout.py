@@ -0,0 +1,125 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import threading
+
+import mock
+
+from openstack import exceptions
+from openstack.tests.unit import base
+from otcextensions import sdk
+from otcextensions.sdk import fanout
+
+
+class TestConnect(base.TestCase):
+    def setUp(self):
+        super(TestConnect, self).setUp()
+        self.use_keystone_v3()
+
+    def test_connect(self):
+        self.cloud.config.config["auth"]["project_id"] = "123"
+        conn = fanout.connect(self.cloud, region_name="eu-nl", project_name="other")
+
+        self.assertEqual("eu-nl", conn.config.region_name)
+        self.assertEqual(self.cloud.name, conn.name)
+        auth = conn.config.config["auth"]
+        self.assertEqual("other", auth["project_name"])
+        self.assertNotIn("project_id", auth)
+        self.assertEqual("admin", auth["username"])
+        self.assertIsInstance(conn, sdk._LazyConnection)
+        self.assertEqual("admin", self.cloud.config.config["auth"]["project_name"])
+
+    def test_connect_drops_computed_overrides(self):
+        self.cloud.config.config["dns_endpoint_override"] = "https://dns"
+        sdk.load(self.cloud, lazy=True)
+        self.cloud.config.config["kms_endpoint_override"] = "https://kms"
+
+        conn = fanout.connect(self.cloud, region_name="eu-nl")
+
+        self.assertEqual("https://dns", conn.config.config["dns_endpoint_override"])
+        self.assertNotIn("kms_endpoint_override", conn.config.config)
+
+
+class TestListResources(base.TestCase):
+    def setUp(self):
+        super(TestListResources, self).setUp()
+        self.connections = {}
+        patcher = mock.patch.object(fanout, "connect", side_effect=self._connect)
+        self.connect = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _connect(self, conn, region_name=None, project_name=None):
+        target = mock.Mock()
+        target.config.region_name = region_name
+        target.config.config = {"auth": {"project_name": project_name}}
+        target.rds.instances.side_effect = lambda **query: iter(
+            ["%s-%d" % (project_name, i) for i in range(3)]
+        )
+        self.connections[project_name] = target
+        return target
+
+    def test_list_resources(self):
+        targets = [
+            {"region_name": "eu-de", "project_name": "eu-de_a"},
+            {"region_name": "eu-nl", "project_name": "eu-nl_b"},
+            "eu-de_c",
+        ]
+        result = list(
+            fanout.list_resources(self.cloud, "rds.instances", targets, limit=5)
+        )
+
+        self.assertEqual(9, len(result))
+        self.assertIn(fanout.FanoutResult("eu-nl", "eu-nl_b", "eu-nl_b-2"), result)
+        self.assertIn(fanout.FanoutResult(None, "eu-de_c", "eu-de_c-0"), result)
+        self.connect.assert_any_call(
+            self.cloud, region_name="eu-de", project_name="eu-de_a"
+        )
+        self.connections["eu-de_a"].rds.instances.assert_called_once_with(limit=5)
+
+    def test_list_resources_concurrent(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def instances(**query):
+            # all targets are listed at the same time
+            barrier.wait()
+            return iter(["x"])
+
+        targets = ["a", "b", "c"]
+        for name in targets:
+            self._connect(self.cloud, project_name=name)
+            self.connections[name].rds.instances.side_effect = instances
+        targets = [self.connections[name] for name in targets]
+        with mock.patch.object(fanout.connection, "Connection", mock.Mock):
+            result = list(fanout.list_resources(self.cloud, "rds.instances", targets))
+
+        self.assertEqual(["a", "b", "c"], sorted(item.project for item in result))
+        self.connect.assert_not_called()
+
+    def test_list_resources_error(self):
+        def connect(conn, region_name=None, project_name=None):
+            target = self._connect(conn, region_name, project_name)
+            if project_name == "bad":
+                target.rds.instances.side_effect = exceptions.HttpException("boom")
+            return target
+
+        self.connect.side_effect = connect
+        self.assertRaises(
+            exceptions.HttpException,
+            list,
+            fanout.list_resources(self.cloud, "rds.instances", ["good", "bad"]),
+        )
+
+        result = fanout.list_resources(
+            self.cloud, "rds.instances", ["good", "bad"], ignore_errors=True
+        )
+        self.assertEqual(
+            ["good-0", "good-1", "good-2"], sorted(item.resource for item in result)
+        )
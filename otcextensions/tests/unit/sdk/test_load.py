@@ -0,0 +1,88 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import mock
+
+from openstack import connection
+from openstack.tests.unit import base
+from otcextensions import sdk
+
+
+class FakeDescriptor:
+    def __init__(self, service_name):
+        service = sdk.OTC_SERVICES[service_name]
+        self.service_type = service.get("endpoint_service_type", service_name)
+        self.all_types = [self.service_type, service["service_type"]]
+        self.proxy = mock.Mock(name=service_name)
+
+    def __get__(self, conn, owner):
+        return self.proxy
+
+
+class TestLoad(base.TestCase):
+    def setUp(self):
+        super(TestLoad, self).setUp()
+        self.descriptors = {}
+
+        def get_descriptor(service_name):
+            descriptor = FakeDescriptor(service_name)
+            self.descriptors[service_name] = descriptor
+            return descriptor
+
+        patcher = mock.patch.object(sdk, "_get_descriptor", side_effect=get_descriptor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(
+            sdk, "register_single_service", wraps=sdk.register_single_service
+        )
+        self.register = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_load_lazy(self):
+        sdk.load(self.cloud, lazy=True)
+
+        self.register.assert_not_called()
+        self.assertEqual({}, self.descriptors)
+
+        kms = self.cloud.kms
+        self.assertIs(self.descriptors["kms"].proxy, kms)
+        self.assertIs(kms, self.cloud.kms)
+        self.register.assert_called_once_with(
+            self.cloud, "kms", service=sdk.OTC_SERVICES["kms"]
+        )
+        self.assertEqual(["kms"], list(self.descriptors))
+        self.assertTrue(callable(self.cloud.get_ak_sk))
+        # Stubs are installed on the class of this connection only
+        self.assertNotIsInstance(
+            connection.Connection.__dict__.get("kms"), sdk._LazyService
+        )
+
+    def test_load_lazy_alias(self):
+        sdk.load(self.cloud, lazy=True)
+
+        # OBS is registered as "obs" and by its catalog type "object"
+        self.assertIs(self.cloud.object, self.cloud.obs)
+        self.register.assert_called_once()
+
+    def test_load_lazy_config(self):
+        self.cloud.config.config["otc_lazy_services"] = True
+        sdk.load(self.cloud)
+
+        self.register.assert_not_called()
+        self.assertIsInstance(self.cloud, sdk._LazyConnection)
+
+    def test_load_services(self):
+        sdk.load(self.cloud, services=["kms", "unknown"])
+
+        self.register.assert_called_once_with(
+            self.cloud, "kms", self.cloud.current_project_id, sdk.OTC_SERVICES["kms"]
+        )
+        self.assertIs(self.descriptors["kms"].proxy, self.cloud.kms)
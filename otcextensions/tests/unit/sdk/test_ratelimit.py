@@ -0,0 +1,141 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import os
+import shutil
+import tempfile
+
+import mock
+
+from openstack.tests.unit import base
+from otcextensions.sdk import ratelimit
+from otcextensions.sdk import sdk_proxy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(base.TestCase):
+    def setUp(self):
+        super(TestTokenBucket, self).setUp()
+        self.clock = FakeClock()
+        for name in ("monotonic", "time", "sleep"):
+            patcher = mock.patch.object(
+                ratelimit.time,
+                name,
+                self.clock.sleep if name == "sleep" else self.clock.time,
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_acquire(self):
+        bucket = ratelimit.TokenBucket(rate=2, burst=4)
+        waits = [bucket.acquire() for _ in range(6)]
+        self.assertEqual([0, 0, 0, 0, 0.5, 0.5], waits)
+        self.clock.now += 10
+        # refilled up to the burst only
+        self.assertEqual(0, bucket.acquire(4))
+        self.assertEqual(0.5, bucket.acquire())
+
+    def test_default_burst(self):
+        self.assertEqual(1, ratelimit.TokenBucket(0.5).burst)
+        self.assertEqual(10, ratelimit.TokenBucket(10).burst)
+
+    def test_file_bucket_shared(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        filename = os.path.join(path, "bucket")
+        first = ratelimit.FileTokenBucket(filename, rate=1, burst=2)
+        second = ratelimit.FileTokenBucket(filename, rate=1, burst=2)
+
+        self.assertEqual(0, first.acquire())
+        self.assertEqual(0, second.acquire())
+        self.assertEqual(1, first.acquire())
+        self.assertEqual(1, second.acquire())
+
+
+class TestRateLimiters(base.TestCase):
+    def test_get(self):
+        limiters = ratelimit.RateLimiters(
+            {
+                "dis": 5,
+                "lts": {"rate": 2, "burst": 10},
+                "obs": {"rate": 1, "per_endpoint": True},
+            }
+        )
+        dis = limiters.get("dis")
+        self.assertEqual(5, dis.rate)
+        self.assertIs(dis, limiters.get("dis"))
+        # limits are looked up by the OTC service name as well
+        self.assertEqual(10, limiters.get("ltsv2").burst)
+        self.assertIsNone(limiters.get("ces"))
+
+        bucket = limiters.get("obs", "https://a.obs.example.com/key")
+        self.assertIs(bucket, limiters.get("obs", "https://a.obs.example.com/x"))
+        self.assertIsNot(bucket, limiters.get("obs", "https://b.obs.example.com/x"))
+
+    def test_default(self):
+        limiters = ratelimit.RateLimiters({"default": 3})
+        self.assertEqual(3, limiters.get("dis").rate)
+        self.assertIsNot(limiters.get("dis"), limiters.get("ces"))
+
+    def test_shared_dir(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        limiters = ratelimit.RateLimiters({"dis": 5}, shared_dir=path)
+        bucket = limiters.get("dis")
+        self.assertIsInstance(bucket, ratelimit.FileTokenBucket)
+        other = ratelimit.RateLimiters({"dis": 5}, shared_dir=path)
+        self.assertEqual(bucket.path, other.get("dis").path)
+
+    def test_for_connection(self):
+        self.assertIsNone(ratelimit.RateLimiters.for_connection(self.cloud))
+        self._make_test_cloud()
+        self.cloud.config.config["otc_rate_limits"] = {"dis": 5}
+        limiters = ratelimit.RateLimiters.for_connection(self.cloud)
+        self.assertIs(limiters, ratelimit.RateLimiters.for_connection(self.cloud))
+
+
+class TestProxyRateLimit(base.TestCase):
+    def setUp(self):
+        super(TestProxyRateLimit, self).setUp()
+        self.use_keystone_v3()
+        self.cloud.config.config["otc_rate_limits"] = {"test": 5}
+        self.proxy = sdk_proxy.Proxy(
+            self.cloud.session,
+            service_type="test",
+            endpoint_override="https://test.example.com/v1",
+        )
+        self.proxy._connection = self.cloud
+
+    def test_request_acquires_token(self):
+        self.adapter.register_uri(
+            "GET",
+            "https://test.example.com/v1/res",
+            [{"status_code": 503}, {"status_code": 200}],
+        )
+        bucket = ratelimit.RateLimiters.for_connection(self.cloud).get(
+            "test", "https://test.example.com/v1"
+        )
+        with mock.patch.object(bucket, "acquire") as acquire, mock.patch.object(
+            sdk_proxy.time, "sleep"
+        ):
+            self.assertEqual(200, self.proxy.get("/res").status_code)
+        # the retry is limited as well
+        self.assertEqual(2, acquire.call_count)
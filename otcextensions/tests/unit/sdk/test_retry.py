@@ -0,0 +1,190 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import io
+
+import mock
+from keystoneauth1 import exceptions as ksa_exc
+
+from openstack.tests.unit import base
+from otcextensions.sdk import retry
+from otcextensions.sdk import sdk_proxy
+
+URL = "https://test.example.com/v1/res"
+
+
+def _response(status_code, headers=None):
+    response = mock.Mock(status_code=status_code)
+    response.headers = headers or {}
+    return response
+
+
+class TestRetryPolicy(base.TestCase):
+    def test_is_retriable(self):
+        policy = retry.RetryPolicy()
+        self.assertTrue(policy.is_retriable("GET", 503))
+        self.assertTrue(policy.is_retriable("POST", 429))
+        self.assertFalse(policy.is_retriable("POST", 503))
+        self.assertTrue(policy.is_retriable("POST", 503, idempotent=True))
+        self.assertFalse(policy.is_retriable("GET", 500))
+        self.assertFalse(policy.is_retriable("GET", 404))
+        self.assertTrue(policy.is_retriable("POST", error=ksa_exc.ConnectTimeout()))
+        self.assertFalse(policy.is_retriable("POST", error=ksa_exc.ConnectFailure()))
+        self.assertTrue(policy.is_retriable("PUT", error=ksa_exc.ConnectFailure()))
+        self.assertFalse(policy.is_retriable("GET", error=ValueError()))
+        self.assertTrue(
+            policy.is_retriable("POST", 500, idempotent=True, retry_status_codes=[500])
+        )
+        policy = retry.RetryPolicy(retry_non_idempotent=True)
+        self.assertTrue(policy.is_retriable("POST", 503))
+
+    def test_delay(self):
+        policy = retry.RetryPolicy(backoff=1, max_backoff=5)
+        for attempt in range(6):
+            delay = policy.get_delay(attempt)
+            self.assertTrue(0 <= delay <= min(5, 2**attempt))
+
+    def test_delay_retry_after(self):
+        policy = retry.RetryPolicy(max_backoff=10)
+        self.assertEqual(3, policy.get_delay(0, _response(429, {"Retry-After": "3"})))
+        self.assertIsNone(policy.get_delay(0, _response(429, {"Retry-After": "60"})))
+        delay = policy.get_delay(
+            0, _response(503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        )
+        self.assertEqual(0, delay)
+
+    def test_next_delay(self):
+        policy = retry.RetryPolicy(max_retries=2, budget=None)
+        self.assertIsNotNone(policy.next_delay("GET", 0, _response(503)))
+        self.assertIsNotNone(policy.next_delay("GET", 1, _response(503)))
+        self.assertIsNone(policy.next_delay("GET", 2, _response(503)))
+        self.assertIsNone(policy.next_delay("POST", 0, _response(503)))
+        self.assertEqual(2, policy.stats["retries"])
+        self.assertEqual(2, policy.stats["retries.503"])
+        self.assertEqual(1, policy.stats["exhausted"])
+
+    def test_budget(self):
+        budget = retry.RetryBudget(ratio=0.5, max_tokens=2)
+        policy = retry.RetryPolicy(budget=budget)
+        self.assertIsNotNone(policy.next_delay("GET", 0, _response(429)))
+        self.assertIsNotNone(policy.next_delay("GET", 0, _response(429)))
+        self.assertIsNone(policy.next_delay("GET", 0, _response(429)))
+        self.assertEqual(1, policy.stats["budget_exhausted"])
+        policy.record_request()
+        policy.record_request()
+        self.assertIsNotNone(policy.next_delay("GET", 0, _response(429)))
+
+    def test_from_config(self):
+        config = mock.Mock()
+        config.config = {
+            "otc_max_retries": 5,
+            "dis_otc_max_retries": "1",
+            "otc_retry_budget": 0,
+        }
+        policy = retry.RetryPolicy.from_config(config, "dis")
+        self.assertEqual(1, policy.max_retries)
+        self.assertIsNone(policy.budget)
+        policy = retry.RetryPolicy.from_config(config, "dms")
+        self.assertEqual(5, policy.max_retries)
+        self.assertEqual(retry.DEFAULT_BACKOFF, policy.backoff)
+
+
+class TestProxyRetry(base.TestCase):
+    def setUp(self):
+        super(TestProxyRetry, self).setUp()
+        self.use_keystone_v3()
+        self.proxy = sdk_proxy.Proxy(
+            self.cloud.session,
+            service_type="test",
+            endpoint_override="https://test.example.com/v1",
+        )
+        self.proxy._connection = self.cloud
+        patcher = mock.patch.object(sdk_proxy.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _requests(self, method):
+        return [
+            r
+            for r in self.adapter.request_history
+            if r.method == method and r.url == URL
+        ]
+
+    def test_retry_throttled(self):
+        self.adapter.register_uri(
+            "POST",
+            URL,
+            [
+                {"status_code": 429, "headers": {"Retry-After": "2"}},
+                {"status_code": 200, "json": {}},
+            ],
+        )
+        response = self.proxy.post("/res", json={"a": 1})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(self._requests("POST")))
+        self.sleep.assert_called_once_with(2.0)
+        self.assertEqual(1, self.proxy.retry_policy.stats["retries.429"])
+
+    def test_retry_idempotent_only(self):
+        self.adapter.register_uri("POST", URL, status_code=503)
+        self.assertEqual(503, self.proxy.post("/res").status_code)
+        self.assertEqual(1, len(self._requests("POST")))
+
+        self.adapter.register_uri("GET", URL, status_code=503)
+        self.assertEqual(503, self.proxy.get("/res").status_code)
+        self.assertEqual(retry.DEFAULT_MAX_RETRIES + 1, len(self._requests("GET")))
+
+        self.proxy.post("/res", idempotent=True)
+        self.assertEqual(retry.DEFAULT_MAX_RETRIES + 2, len(self._requests("POST")))
+
+    def test_retry_raise_exc(self):
+        self.adapter.register_uri(
+            "GET", URL, [{"status_code": 502}, {"status_code": 404}]
+        )
+        self.assertRaises(ksa_exc.NotFound, self.proxy.get, "/res", raise_exc=True)
+        self.assertEqual(2, len(self._requests("GET")))
+
+    def test_retry_rewinds_body(self):
+        bodies = []
+
+        def put(request, context):
+            bodies.append(request.body.read())
+            context.status_code = 503 if len(bodies) == 1 else 200
+            return ""
+
+        self.adapter.register_uri("PUT", URL, text=put)
+        data = io.BytesIO(b"0123456789")
+        data.seek(2)
+        self.assertEqual(200, self.proxy.put("/res", data=data).status_code)
+        self.assertEqual([b"23456789", b"23456789"], bodies)
+
+    def test_retry_extra_status_codes(self):
+        self.adapter.register_uri(
+            "POST", URL, [{"status_code": 500}, {"status_code": 200}]
+        )
+        response = self.proxy.post(
+            "/res", data=bytearray(b"abc"), idempotent=True, retry_status_codes=(500,)
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(self._requests("POST")))
+
+    def test_retry_memoryview_body(self):
+        self.adapter.register_uri("PUT", URL, [{"status_code": 503}, {}])
+        response = self.proxy.put("/res", data=memoryview(b"abc"))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, len(self._requests("PUT")))
+
+    def test_no_retry_of_streamed_body(self):
+        self.adapter.register_uri("PUT", URL, status_code=503)
+        response = self.proxy.put("/res", data=iter([b"a", b"b"]))
+        self.assertEqual(503, response.status_code)
+        self.assertEqual(1, len(self._requests("PUT")))
@@ -9,9 +9,12 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
+import time
+
 import mock
 from keystoneauth1 import adapter
 
+from openstack import exceptions
 from openstack.tests.unit import base
 from otcextensions.sdk import sdk_resource
 
@@ -117,3 +120,83 @@ class TestBaseResource(base.TestCase):
         )
 
         self.assertEqual([self.sot], result)
+
+
+class PagedRes(sdk_resource.Resource):
+
+    base_path = "/res"
+    resources_key = "res"
+    allow_list = True
+
+
+class TestListPrefetch(base.TestCase):
+    def setUp(self):
+        super(TestListPrefetch, self).setUp()
+        self.sess = mock.Mock(spec=adapter.Adapter)
+        self.sess.get_project_id = mock.Mock(return_value=PROJECT_ID)
+        self.pages = 5
+        self.sess.get.side_effect = self._get
+
+    def _get(self, uri, params=None, **kwargs):
+        # the query of the next link is passed as a list
+        page = int(params.get("page", ["0"])[0])
+        response = mock.Mock()
+        response.status_code = 200
+        response.links = {}
+        body = {"res": [{"id": "%d-%d" % (page, i)} for i in range(2)]}
+        if page + 1 < self.pages:
+            body["next"] = "/res?page=%d" % (page + 1)
+        response.json.return_value = body
+        return response
+
+    def _ids(self, **kwargs):
+        return [r.id for r in PagedRes.list(self.sess, paginated=True, **kwargs)]
+
+    def test_list_prefetch(self):
+        expected = self._ids()
+        self.assertEqual(10, len(expected))
+        self.assertEqual(expected, self._ids(prefetch=1))
+        self.assertEqual(expected, self._ids(prefetch=3))
+        self.assertEqual(15, self.sess.get.call_count)
+
+    def test_list_parses_json_once(self):
+        responses = []
+
+        def get(*args, **kwargs):
+            responses.append(self._get(*args, **kwargs))
+            return responses[-1]
+
+        self.sess.get.side_effect = get
+        self._ids()
+        for response in responses:
+            response.json.assert_called_once_with()
+
+    def test_list_prefetch_depth(self):
+        results = PagedRes.list(self.sess, paginated=True, prefetch=2)
+        self.assertEqual("0-0", next(results).id)
+        # the page being consumed and two pages ahead
+        for _ in range(100):
+            if self.sess.get.call_count == 3:
+                break
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(3, self.sess.get.call_count)
+        results.close()
+
+    def test_list_prefetch_error(self):
+        def get(uri, params=None, **kwargs):
+            if params.get("page") == ["2"]:
+                raise exceptions.HttpException("boom")
+            return self._get(uri, params=params)
+
+        self.sess.get.side_effect = get
+        results = PagedRes.list(self.sess, paginated=True, prefetch=2)
+        self.assertEqual(
+            ["0-0", "0-1", "1-0", "1-1"], [next(results).id for _ in range(4)]
+        )
+        self.assertRaises(exceptions.HttpException, next, results)
+
+    def test_list_ext_prefetch(self):
+        ids = [r.id for r in PagedRes.list_ext(self.sess, paginated=True, prefetch=2)]
+        self.assertEqual(10, len(ids))
+        self.assertEqual("4-1", ids[-1])
@@ -0,0 +1,45 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+import os
+import subprocess
+import sys
+
+from openstack.tests.unit import base
+
+CODE = """
+import sys
+import openstack
+before = set(sys.modules)
+import otcextensions.sdk
+print("\\n".join(sorted(set(sys.modules) - before)))
+"""
+
+
+class TestImport(base.TestCase):
+    def test_import_sdk_is_light(self):
+        # Importing otcextensions.sdk is paid by every openstack CLI call,
+        # service modules must only be imported on registration
+        result = subprocess.run(
+            [sys.executable, "-c", CODE],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        )
+        modules = result.stdout.split()
+
+        self.assertEqual(
+            ["otcextensions", "otcextensions.sdk"],
+            [name for name in modules if name.startswith("otcextensions")],
+        )
+        for name in ("pkg_resources", "setuptools", "distutils"):
+            self.assertNotIn(name, modules)
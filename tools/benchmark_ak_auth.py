@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""Micro-benchmark of the AK/SK request signing overhead.
+
+Signs prepared OBS requests in a loop and reports the time spent per
+request. Run it with ``tox -e ak-auth-benchmark``, or with otcextensions
+installed into the current environment, e.g.::
+
+    tox -e ak-auth-benchmark -- --number 50000
+"""
+
+import argparse
+import timeit
+
+import requests
+
+from otcextensions.sdk import ak_auth
+
+REQUESTS = {
+    "HEAD": dict(
+        method="HEAD",
+        url="https://bucket.obs.eu-de.otc.t-systems.com/path/to/object.txt",
+    ),
+    "PUT": dict(
+        method="PUT",
+        url="https://bucket.obs.eu-de.otc.t-systems.com/path/to/object.txt",
+        headers={"Content-Type": "text/plain", "X-Amz-Meta-Owner": "bench"},
+        data=b"data",
+    ),
+    "GET ?query": dict(
+        method="GET",
+        url="https://bucket.obs.eu-de.otc.t-systems.com/",
+        params={"prefix": "path/", "marker": "path/to/o", "max-keys": "1000"},
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    auth = ak_auth.AKRequestsAuth(
+        access_key="ak",
+        secret_access_key="sk",
+        host="obs.eu-de.otc.t-systems.com",
+        region="eu-de",
+        service="s3",
+    )
+    for name, attrs in REQUESTS.items():
+        request = requests.Request(**attrs).prepare()
+        timings = timeit.repeat(
+            lambda: auth(request), number=args.number, repeat=args.repeat
+        )
+        print("%-12s %8.2f us/request" % (name, min(timings) / args.number * 1000000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""Benchmark of the import and service registration time.
+
+Reports the time to import ``otcextensions.sdk`` on top of ``openstack``,
+the ``-X importtime`` breakdown per OTC service package and the wall-clock
+time spent creating the service descriptors during registration, e.g.::
+
+    python tools/benchmark_import.py --budget-ms 50
+
+The exit code is 1 when the median import time exceeds the budget.
+"""
+
+import argparse
+import collections
+import statistics
+import subprocess
+import sys
+
+# Budget for "import otcextensions.sdk" once openstack is imported
+IMPORT_BUDGET_MS = 50
+
+IMPORT_CODE = "import openstack; import otcextensions.sdk"
+
+REGISTRATION_CODE = """
+import time
+import openstack
+from otcextensions import sdk
+start = time.perf_counter()
+for name in sdk.OTC_SERVICES:
+    t = time.perf_counter()
+    sdk._get_descriptor(name)
+    print("service %s %f" % (name, time.perf_counter() - t))
+print("total %f" % (time.perf_counter() - start))
+"""
+
+
+def _run(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = (
+            part.strip() for part in line[len("import time:") :].split("|")
+        )
+        # Skip the header line
+        if self_us.isdigit():
+            imports[name] = (int(self_us), int(cumulative_us))
+    return imports, result.stdout
+
+
+def import_time(repeat):
+    """Return cumulative import times of otcextensions.sdk in ms"""
+    timings = []
+    for _ in range(repeat):
+        imports, _ = _run(IMPORT_CODE)
+        timings.append(imports["otcextensions.sdk"][1] / 1000.0)
+    return timings
+
+
+def registration_time():
+    """Return import time per service package and descriptor timings"""
+    imports, stdout = _run(REGISTRATION_CODE)
+    packages = collections.Counter()
+    for name, (self_us, _) in imports.items():
+        parts = name.split(".")
+        if parts[:2] == ["otcextensions", "sdk"] and len(parts) > 2:
+            packages[parts[2]] += self_us / 1000.0
+    descriptors = {}
+    total = None
+    for line in stdout.splitlines():
+        fields = line.split()
+        if fields[0] == "service":
+            descriptors[fields[1]] = float(fields[2]) * 1000.0
+        elif fields[0] == "total":
+            total = float(fields[1]) * 1000.0
+    return packages, descriptors, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+
+    timings = import_time(args.repeat)
+    median = statistics.median(timings)
+    print(
+        "import otcextensions.sdk: median %.1f ms, min %.1f ms (budget %.1f ms)"
+        % (median, min(timings), args.budget_ms)
+    )
+
+    packages, descriptors, total = registration_time()
+    print("\nService registration (descriptors only): %.1f ms" % total)
+    print("%-24s %12s %12s" % ("service", "import ms", "register ms"))
+    for name, import_ms in packages.most_common(args.top):
+        print("%-24s %12.1f %12.1f" % (name, import_ms, descriptors.get(name, 0.0)))
+
+    if median > args.budget_ms:
+        print("\nImport time budget exceeded")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())